@@ -91,6 +91,13 @@ def _get_institution_member_role(user_app_id: str) -> str:
 
 def render_sidebar():
 
+    # Background expiry sweeper (idempotent; one thread per process)
+    try:
+        from services.expiry_sweeper import start_expiry_sweeper
+        start_expiry_sweeper()
+    except Exception:
+        pass
+
     if not st.session_state.get("authenticated"):
         return
 
@@ -239,6 +246,7 @@ def render_sidebar():
             safe_page_link("pages/19_Admin_Institution_Payments.py", "🏛 Institution Payments")
             safe_page_link("pages/9_Admin_Revenue.py", "💰 Revenue Dashboard")
             safe_page_link("pages/13_Admin_Credit_Usage.py", "📊 Credit Usage")
+            safe_page_link("pages/38_Admin_AI_Metrics.py", "⏱ AI Call Metrics")
             safe_page_link("pages/15_Admin_Users.py", "👥 User Profiles")
             safe_page_link("pages/17_Admin_institution.py", "🏛 Institutions")
 
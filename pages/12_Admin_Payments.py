@@ -17,6 +17,7 @@ from datetime import datetime, timezone, timedelta
 
 from config.supabase_client import supabase_admin
 from components.sidebar import render_sidebar
+from services.entitlements import invalidate_entitlements
 
 # ==========================================================
 # AUTH GUARD
@@ -105,47 +106,99 @@ def _safe_list_auth_users(page: int = 1, per_page: int = 200):
 
     return []
 
-def find_auth_user_by_email(email: str, per_page: int = 200, max_pages: int = 50):
+# ----------------------------------------------------------
+# AUTH USER INDEX (per session)
+# - user_id → email and email → auth user, built once via paged listing
+# - rebuilt only on a miss once AUTH_INDEX_TTL_SECONDS has passed
+# - queue emails come from users_app in one .in_() batch first
+# ----------------------------------------------------------
+AUTH_INDEX_TTL_SECONDS = 300
+_AUTH_INDEX_KEY = "_auth_user_index"
+
+def _auth_index(force: bool = False, per_page: int = 200, max_pages: int = 50):
+    idx = st.session_state.get(_AUTH_INDEX_KEY)
+    now_ts = datetime.now().timestamp()
+
+    if idx and not force:
+        return idx
+    if idx and force and now_ts - idx["built_at"] < AUTH_INDEX_TTL_SECONDS:
+        return idx
+
+    by_id, by_email = {}, {}
+    for page in range(1, max_pages + 1):
+        users = _safe_list_auth_users(page=page, per_page=per_page)
+        if not users:
+            break
+        for u in users:
+            uid = str(getattr(u, "id", "") or "").strip()
+            em = (getattr(u, "email", "") or "").strip()
+            if uid:
+                by_id[uid] = em or "Unknown"
+            if em:
+                by_email[em.lower()] = u
+        if len(users) < per_page:
+            break
+
+    idx = {"by_id": by_id, "by_email": by_email, "built_at": now_ts}
+    st.session_state[_AUTH_INDEX_KEY] = idx
+    return idx
+
+def find_auth_user_by_email(email: str):
     """
-    Paginate through auth users to find a user by email (case-insensitive).
+    Auth user by email (case-insensitive), from the session index.
     """
     target = (email or "").strip().lower()
     if not target:
         return None
 
-    for page in range(1, max_pages + 1):
-        users = _safe_list_auth_users(page=page, per_page=per_page)
-        if not users:
-            break
+    hit = _auth_index()["by_email"].get(target)
+    if hit is None:
+        # new sign-up since the index was built
+        hit = _auth_index(force=True)["by_email"].get(target)
+    return hit
 
-        hit = next((u for u in users if (getattr(u, "email", "") or "").strip().lower() == target), None)
-        if hit:
-            return hit
+def resolve_payer_emails(user_ids):
+    """
+    dict[user_id] -> email for a whole page of payments.
+    users_app (id = auth.users.id) in one .in_() batch; auth index for the rest.
+    """
+    ids = list(dict.fromkeys(str(u).strip() for u in (user_ids or []) if u))
+    out = {}
 
-        if len(users) < per_page:
-            break
+    for i in range(0, len(ids), 200):
+        chunk = ids[i:i + 200]
+        try:
+            rows = (
+                supabase_admin.table("users_app")
+                .select("id,email")
+                .in_("id", chunk)
+                .execute()
+                .data
+                or []
+            )
+        except Exception:
+            rows = []
+        for r in rows:
+            if r.get("email"):
+                out[str(r["id"])] = r["email"]
 
-    return None
+    missing = [u for u in ids if u not in out]
+    if missing:
+        by_id = _auth_index()["by_id"]
+        if any(u not in by_id for u in missing):
+            by_id = _auth_index(force=True)["by_id"]
+        for u in missing:
+            out[u] = by_id.get(u, "Unknown")
+
+    return out
 
 def find_auth_email_by_user_id(user_id: str):
     """
-    Best-effort: find auth email by auth.users.id.
-    Uses pagination to locate user. Returns 'Unknown' if not found quickly.
+    Best-effort: find auth email by auth.users.id. Returns 'Unknown' if not found.
     """
     if not user_id:
         return "Unknown"
-
-    uid = str(user_id).strip()
-    for page in range(1, 51):
-        users = _safe_list_auth_users(page=page, per_page=200)
-        if not users:
-            break
-        hit = next((u for u in users if str(getattr(u, "id", "")).strip() == uid), None)
-        if hit:
-            return (getattr(hit, "email", None) or "Unknown")
-        if len(users) < 200:
-            break
-    return "Unknown"
+    return resolve_payer_emails([user_id]).get(str(user_id).strip(), "Unknown")
 
 def _get_subscription_by_user_id(user_id: str):
     rows = (
@@ -170,6 +223,7 @@ def _update_subscription_credits(user_id: str, new_credits: int, plan: str | Non
         payload["end_date"] = end_date_iso
         payload["subscription_status"] = "active"
     supabase_admin.table("subscriptions").update(payload).eq("user_id", user_id).execute()
+    invalidate_entitlements(user_id)
 
 def _insert_subscription(user_id: str, plan: str, credits: int, amount: int = 0, end_date_iso: str | None = None):
     now = _utcnow().isoformat()
@@ -185,6 +239,7 @@ def _insert_subscription(user_id: str, plan: str, credits: int, amount: int = 0,
     if end_date_iso:
         payload["end_date"] = end_date_iso
     supabase_admin.table("subscriptions").insert(payload).execute()
+    invalidate_entitlements(user_id)
 
 def _clamp_non_negative(x: int) -> int:
     return max(0, int(x))
@@ -265,6 +320,58 @@ def approve_payment_atomic(payment_id: str, admin_id: str):
     return before, after, plan, payment
 
 
+# ==========================================================
+# BULK PAYMENT APPROVAL (ONE RPC, SET-BASED — sql/approve_payments_bulk.sql)
+# ==========================================================
+def approve_payments_bulk(payment_ids, admin_id: str):
+    """
+    Approve many payments in one transaction.
+    Returns one dict per payment id:
+    {payment_id, result, user_id, plan, credits_before, credits_after, end_date}
+    result: approved | already_approved | not_pending | invalid_plan | busy | not_found | error
+    Safe to retry: already-approved rows are reported, never re-credited.
+    """
+    ids = [str(x) for x in dict.fromkeys(payment_ids or []) if x is not None]
+    if not ids:
+        return []
+
+    try:
+        rows = supabase_admin.rpc(
+            "approve_payments_bulk",
+            {"p_payment_ids": ids, "p_admin_id": admin_id},
+        ).execute().data or []
+    except Exception as e:
+        msg = str(e)
+        if "approve_payments_bulk" not in msg or not ("not exist" in msg or "404" in msg or "PGRST202" in msg):
+            raise
+        rows = _approve_payments_one_by_one(ids, admin_id)
+
+    for uid in {r.get("user_id") for r in rows if r.get("result") == "approved"}:
+        invalidate_entitlements(uid)
+
+    return rows
+
+def _approve_payments_one_by_one(ids, admin_id: str):
+    # DB not migrated yet → same per-row path as the single approval button
+    out = []
+    for pid in ids:
+        try:
+            before, after, plan, payment = approve_payment_atomic(pid, admin_id)
+            out.append({
+                "payment_id": pid, "result": "approved", "user_id": payment.get("user_id"),
+                "plan": plan, "credits_before": before, "credits_after": after, "end_date": None,
+            })
+        except Exception as e:
+            msg = str(e)
+            result = {
+                "Payment not found.": "not_found",
+                "Payment is not pending.": "not_pending",
+                "Invalid plan.": "invalid_plan",
+            }.get(msg, "error")
+            out.append({"payment_id": pid, "result": result, "error": None if result != "error" else msg})
+    return out
+
+
 # ==========================================================
 # ATOMIC PAYMENT DECLINE (NO CREDITS APPLIED)
 # NOTE:
@@ -333,17 +440,74 @@ if not payments:
     st.info("No payment records found.")
     st.stop()
 
+# ==========================================================
+# BULK APPROVAL UI
+# ==========================================================
+pending_rows = [p for p in payments if (p.get("status") or "").lower() == "pending"]
+
+if pending_rows or st.session_state.get("bulk_approval_results"):
+    st.subheader("⚡ Bulk Approve")
+
+    bulk_lock_key = "_lock_bulk_approve"
+    if bulk_lock_key not in st.session_state:
+        st.session_state[bulk_lock_key] = False
+
+    bulk_labels = {
+        f"{p['id']} | {p.get('plan')} | ₦{int(p.get('amount', 0) or 0):,} | {p.get('payment_reference', '')}": p["id"]
+        for p in pending_rows
+    }
+
+    select_all = st.checkbox(f"Select all pending ({len(bulk_labels)})", key="bulk_select_all")
+    picked = st.multiselect(
+        "Payments to approve",
+        list(bulk_labels.keys()),
+        default=list(bulk_labels.keys()) if select_all else [],
+        disabled=st.session_state[bulk_lock_key],
+    )
+
+    if st.button(
+        f"✅ Approve {len(picked)} selected",
+        key="bulk_approve_btn",
+        disabled=st.session_state[bulk_lock_key] or not picked,
+    ):
+        if not _debounce("_debounce_bulk_approve", seconds=2.5):
+            st.warning("Please wait… action already processing.")
+        else:
+            st.session_state[bulk_lock_key] = True
+            try:
+                with st.spinner(f"Approving {len(picked)} payments…"):
+                    results = approve_payments_bulk([bulk_labels[x] for x in picked], user["id"])
+                st.session_state["bulk_approval_results"] = results
+            except Exception as e:
+                st.error(f"Bulk approval failed (nothing applied): {e}")
+            finally:
+                st.session_state[bulk_lock_key] = False
+            st.rerun()
+
+    results = st.session_state.get("bulk_approval_results")
+    if results:
+        approved_n = sum(1 for r in results if r.get("result") == "approved")
+        st.success(f"Bulk approval: {approved_n} approved, {len(results) - approved_n} skipped.")
+        st.dataframe(results, use_container_width=True)
+        if st.button("Clear results", key="clear_bulk_results"):
+            st.session_state["bulk_approval_results"] = None
+            st.rerun()
+
+    st.write("---")
+
 # ==========================================================
 # DISPLAY + APPROVAL/DECLINE UI
 # ==========================================================
 st.subheader("🧾 Payments Queue")
 
+payer_emails = resolve_payer_emails([p.get("user_id") for p in payments])
+
 for p in payments:
     payment_id = p["id"]
     status = (p.get("status") or "").lower()
 
     # NEW: resolve email + transaction date for display
-    payer_email = find_auth_email_by_user_id(p.get("user_id"))
+    payer_email = payer_emails.get(str(p.get("user_id") or "").strip(), "Unknown")
     txn_date = _fmt_dt(p.get("paid_on") or p.get("created_at") or p.get("approved_at"))
 
     st.markdown(f"""
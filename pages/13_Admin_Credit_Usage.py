@@ -7,6 +7,13 @@ import streamlit as st
 import pandas as pd
 from config.supabase_client import supabase_admin
 from components.sidebar import render_sidebar
+from services.credit_ledger import (
+    ensure_recent_snapshot,
+    fetch_credit_usage_daily,
+    get_credit_balance,
+    run_credit_snapshot,
+)
+from services.admin_rollups import get_rollup_state, fetch_plan_totals
 
 # ----------------------------------------------------------
 # AUTH GUARD
@@ -45,36 +52,49 @@ st.caption("System-wide credit allocation and balance overview")
 st.write("---")
 
 # ----------------------------------------------------------
-# LOAD ACTIVE SUBSCRIPTIONS (SOURCE OF TRUTH)
+# ACTIVE CREDITS BY PLAN (ROLLUP — sql/admin_rollups.sql)
+# Falls back to grouping every active subscription if not installed.
 # ----------------------------------------------------------
-subs = (
-    supabase_admin
-    .table("subscriptions")
-    .select(
-        "user_id, plan, credits, subscription_status, start_date, end_date"
+rollup_state = get_rollup_state()
+
+if rollup_state:
+    plan_df = pd.DataFrame(
+        fetch_plan_totals(rollup_state, status="active"),
+        columns=["plan", "subscription_status", "subscriptions", "credits"],
     )
-    .eq("subscription_status", "active")
-    .execute()
-    .data
-    or []
-)
+else:
+    plan_df = pd.DataFrame(
+        supabase_admin
+        .table("subscriptions")
+        .select("user_id, plan, credits")
+        .eq("subscription_status", "active")
+        .execute()
+        .data
+        or [],
+        columns=["user_id", "plan", "credits"],
+    )
+    plan_df["subscriptions"] = 1
 
-if not subs:
+if plan_df.empty:
     st.info("No active subscriptions found.")
     st.stop()
 
-df = pd.DataFrame(subs)
-
 # ----------------------------------------------------------
 # CLEAN DATA
 # ----------------------------------------------------------
-df["credits"] = pd.to_numeric(df["credits"], errors="coerce").fillna(0)
+plan_df["credits"] = pd.to_numeric(plan_df["credits"], errors="coerce").fillna(0)
+
+plan_df = (
+    plan_df.groupby("plan", as_index=False)[["credits", "subscriptions"]]
+    .sum()
+    .sort_values("credits", ascending=False)
+)
 
 # ----------------------------------------------------------
 # SYSTEM METRICS
 # ----------------------------------------------------------
-total_credits = int(df["credits"].sum())
-active_users = df["user_id"].nunique()
+total_credits = int(plan_df["credits"].sum())
+active_users = int(plan_df["subscriptions"].sum())
 
 col1, col2 = st.columns(2)
 
@@ -91,14 +111,8 @@ st.write("---")
 # ----------------------------------------------------------
 st.subheader("📦 Credits by Subscription Plan")
 
-plan_df = (
-    df.groupby("plan", as_index=False)["credits"]
-    .sum()
-    .sort_values("credits", ascending=False)
-)
-
 st.dataframe(
-    plan_df.rename(columns={"credits": "Total Credits"}),
+    plan_df[["plan", "credits"]].rename(columns={"credits": "Total Credits"}),
     use_container_width=True
 )
 
@@ -115,13 +129,19 @@ st.write("---")
 st.subheader("🏆 Top Users by Remaining Credits")
 
 top_users = (
-    df.sort_values("credits", ascending=False)
-    .head(20)
-    .reset_index(drop=True)
+    supabase_admin
+    .table("subscriptions")
+    .select("user_id, plan, credits")
+    .eq("subscription_status", "active")
+    .order("credits", desc=True)
+    .limit(20)
+    .execute()
+    .data
+    or []
 )
 
 st.dataframe(
-    top_users[["user_id", "plan", "credits"]],
+    pd.DataFrame(top_users, columns=["user_id", "plan", "credits"]),
     use_container_width=True
 )
 
@@ -132,16 +152,125 @@ st.write("---")
 # ----------------------------------------------------------
 st.subheader("🔍 Subscription Credit Audit Table")
 
+AUDIT_PAGE_SIZE = 200
+audit_page = st.number_input("Audit page", min_value=1, value=1, step=1, key="credit_audit_page")
+audit_from = (int(audit_page) - 1) * AUDIT_PAGE_SIZE
+
+audit_rows = (
+    supabase_admin
+    .table("subscriptions")
+    .select("user_id, plan, credits, subscription_status, start_date, end_date")
+    .eq("subscription_status", "active")
+    .order("credits", desc=True)
+    .range(audit_from, audit_from + AUDIT_PAGE_SIZE - 1)
+    .execute()
+    .data
+    or []
+)
+
 st.dataframe(
-    df.sort_values("credits", ascending=False),
+    pd.DataFrame(audit_rows),
     use_container_width=True
 )
 
+# Ledger-verified balance (snapshot + tail) for one user
+verify_user_id = st.text_input("Verify a user's balance against the ledger (user_id)", key="credit_verify_user").strip()
+
+if verify_user_id:
+    stored = (
+        supabase_admin
+        .table("subscriptions")
+        .select("credits")
+        .eq("user_id", verify_user_id)
+        .limit(1)
+        .execute()
+        .data
+        or []
+    )
+    stored_credits = int((stored[0].get("credits") if stored else 0) or 0)
+    ledger_credits = get_credit_balance(verify_user_id)
+
+    v1, v2 = st.columns(2)
+    v1.metric("Subscription credits", f"{stored_credits:,}")
+
+    if ledger_credits is None:
+        v2.metric("Ledger balance", "—")
+        st.info("Ledger not available. Run sql/credit_ledger.sql.")
+    else:
+        v2.metric("Ledger balance", f"{ledger_credits:,}")
+        if ledger_credits != stored_credits:
+            st.warning("Subscription credits and ledger balance disagree.")
+
 st.caption(
     "Credits shown represent current balances only. "
     "Usage is deducted dynamically when AI tools are run."
 )
 
+st.write("---")
+
+# ----------------------------------------------------------
+# CREDIT USAGE (PRE-AGGREGATED LEDGER SNAPSHOTS)
+# ----------------------------------------------------------
+st.subheader("🧾 Credit Usage by Tool (Ledger)")
+
+if st.button("🔄 Refresh ledger snapshots"):
+    try:
+        n = run_credit_snapshot()
+        st.success(f"Snapshotted {n} balance(s).")
+    except Exception as e:
+        st.error(f"Snapshot failed: {e}")
+else:
+    ensure_recent_snapshot()
+
+usage_days = st.selectbox(
+    "Usage window",
+    [7, 30, 90],
+    index=1,
+    format_func=lambda d: f"Last {d} days",
+    key="credit_usage_days",
+)
+
+try:
+    usage = fetch_credit_usage_daily(days=usage_days)
+except Exception:
+    usage = []
+
+if not usage:
+    st.info("No ledger usage in this window yet (snapshots skip the last 5 minutes). Run sql/credit_ledger.sql if it is not applied.")
+else:
+    usage_df = pd.DataFrame(usage)
+    usage_df["credits_out"] = pd.to_numeric(usage_df["credits_out"], errors="coerce").fillna(0)
+    usage_df["credits_in"] = pd.to_numeric(usage_df["credits_in"], errors="coerce").fillna(0)
+    usage_df["tool"] = usage_df["tool"].replace("", "—")
+
+    # Net spend: charges + reservations, minus released holds
+    spend = usage_df[usage_df["kind"].isin(["charge", "reserve", "release"])].copy()
+    spend["net_spent"] = spend["credits_out"] - spend["credits_in"]
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.metric("🔥 Credits Spent", f"{int(spend['net_spent'].sum()):,}")
+
+    with col2:
+        granted = usage_df.loc[usage_df["kind"] == "grant", "credits_in"].sum()
+        st.metric("🎁 Credits Granted", f"{int(granted):,}")
+
+    tool_df = (
+        spend.groupby("tool", as_index=False)["net_spent"]
+        .sum()
+        .sort_values("net_spent", ascending=False)
+    )
+
+    st.dataframe(
+        tool_df.rename(columns={"net_spent": "Credits Spent"}),
+        use_container_width=True
+    )
+
+    daily_df = spend.groupby("day")["net_spent"].sum().sort_index()
+
+    st.line_chart(daily_df, use_container_width=True)
+
 # ======================================================
 # FOOTER
 # ======================================================
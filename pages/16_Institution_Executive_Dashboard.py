@@ -3,7 +3,7 @@
 # ============================================================
 import streamlit as st
 import sys, os
-from datetime import datetime, timezone, timedelta, date
+from datetime import datetime, timezone, date
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
@@ -15,7 +15,11 @@ st.set_page_config(page_title="Institution Dashboard", page_icon="🏛️", layo
 # Now safe to import/use anything that calls st.*
 from components.sidebar import render_sidebar
 from components.ui import hide_streamlit_sidebar
-from config.supabase_client import supabase, supabase_admin  # use admin only when needed (admin role)
+from config.supabase_client import supabase_admin  # use admin only when needed (admin role)
+from services.entitlements import get_entitlements, get_institution_licence, list_licences
+from services.intelligence_snapshot import current_reporting_year
+from services.institution_dashboard_loader import load_institution_dashboard
+from services.analytics_kernels import score_summary, score_band_counts, subscore_means, volume_trend
 
 
 # =========================
@@ -30,8 +34,7 @@ user_id = user.get("id")
 
 # --- INSTITUTION ACCESS GUARD (members or platform admin only) ---
 if (user.get("role") or "").lower() != "admin":
-    m = supabase.table("institution_members").select("id").eq("user_id", user_id).limit(1).execute().data or []
-    if not m:
+    if not get_entitlements(user_id).get("institution_roles"):
         st.error("Access denied. You are not assigned to any institution.")
         st.stop()
 
@@ -82,12 +85,6 @@ def _select_all_institutions(limit: int = 500):
     ).order("created_at", desc=True).limit(limit).execute()
     return r.data or []
 
-def _get_user_institution_memberships(user_app_id: str, limit: int = 500):
-    r = supabase_admin.table("institution_members").select(
-        "institution_id,member_role"
-    ).eq("user_id", user_app_id).limit(limit).execute()
-    return r.data or []
-
 def _get_institution_name_map(inst_rows):
     m = {}
     for r in inst_rows or []:
@@ -96,57 +93,6 @@ def _get_institution_name_map(inst_rows):
             m[iid] = {"name": r.get("name"), "row": r}
     return m
 
-def _list_job_posts(institution_id: str, limit: int = 500):
-    r = supabase_admin.table("institution_job_posts").select(
-        "id,institution_id,created_by,title,location,job_type,job_description,status,created_at"
-    ).eq("institution_id", institution_id).order("created_at", desc=True).limit(limit).execute()
-    return r.data or []
-
-def _list_applications_by_institution(institution_id: str, limit: int = 2000):
-    r = supabase_admin.table("institution_applications").select(
-        "id,job_post_id,candidate_user_id,resume_text,status,created_at,institution_id"
-    ).eq("institution_id", institution_id).order("created_at", desc=True).limit(limit).execute()
-    return r.data or []
-
-def _list_scores_by_app_ids(app_ids, limit: int = 2000):
-    if not app_ids:
-        return []
-    r = supabase_admin.table("institution_candidate_scores").select(
-        "id,application_id,overall_score,subscores,recommendations,created_at"
-    ).in_("application_id", list(app_ids)).order("created_at", desc=True).limit(limit).execute()
-    return r.data or []
-
-def _fetch_users_app_map(user_ids):
-    """
-    Returns dict[user_id] -> {full_name,email,...} for users_app IDs.
-    """
-    if not user_ids:
-        return {}
-    r = supabase_admin.table("users_app").select("id,full_name,email").in_("id", list(user_ids)).limit(1000).execute()
-    rows = r.data or []
-    out = {}
-    for u in rows:
-        out[u.get("id")] = u
-    return out
-
-def _score_band(score: float):
-    s = _safe_float(score, 0)
-    if s < 50: return "0–49"
-    if s < 60: return "50–59"
-    if s < 70: return "60–69"
-    if s < 80: return "70–79"
-    if s < 90: return "80–89"
-    return "90–100"
-
-def _week_start(dt: datetime):
-    # Monday-based weeks
-    d = dt.date()
-    monday = d - timedelta(days=d.weekday())
-    return monday
-
-def _day_only(dt: datetime):
-    return dt.date()
-
 # =========================
 # PAGE HEADER
 # =========================
@@ -182,23 +128,13 @@ if user_role == "admin":
 
 else:
     # Institution member: can only see THEIR institution(s)
-    memberships = _get_user_institution_memberships(user_id)
-    my_inst_ids = [m.get("institution_id") for m in (memberships or []) if m.get("institution_id")]
+    my_inst_ids = list(get_entitlements(user_id).get("institution_roles", {}).keys())
 
     if not my_inst_ids:
         st.error("Access denied. You are not assigned to any institution.")
         st.stop()
 
-    inst_rows = (
-        supabase_admin.table("institutions")
-        .select("id,name,institution_type,industry,website,created_at")
-        .in_("id", my_inst_ids)
-        .order("created_at", desc=True)
-        .limit(500)
-        .execute()
-        .data
-        or []
-    )
+    inst_rows = list_licences(user_id, "institutions")
 
     inst_map = _get_institution_name_map(inst_rows)
 
@@ -218,70 +154,11 @@ else:
 # AUTOMATED LICENSE ENFORCEMENT — INSTITUTION
 # =========================================================
 
-from datetime import datetime, timezone
-
-inst = (
-    supabase_admin
-    .table("institutions")
-    .select("license_status, subscription_expires_at")
-    .eq("id", selected_inst_id)
-    .limit(1)
-    .execute()
-    .data
-)
-
-inst = (inst or [{}])[0]
-
-license_status = (inst.get("license_status") or "trial").lower()
-expires_at = inst.get("subscription_expires_at")
-
-is_expired = False
-
-if expires_at:
-    try:
-        expiry_dt = datetime.fromisoformat(str(expires_at).replace("Z", "+00:00"))
-        if expiry_dt < datetime.now(timezone.utc):
-            is_expired = True
-    except Exception:
-        pass
-
-if is_expired:
-    supabase_admin.table("institutions").update(
-        {"license_status": "expired"}
-    ).eq("id", selected_inst_id).execute()
-
-    license_status = "expired"
-
-if license_status in ["expired", "suspended"]:
-    st.error("🚫 Institution subscription expired. Please renew to access analytics.")
-    st.button("💳 Manage Subscription", on_click=lambda: st.switch_page("pages/18_Institution_Subscription.py"))
-    st.stop()
-
-
-
-# ============================================================
-# AUTOMATED LICENSE ENFORCEMENT — INSTITUTION
-# ============================================================
-
-inst_row = inst_map.get(selected_inst_id, {})
-license_status = (inst_row.get("license_status") or "trial").lower()
-expires_at = inst_row.get("subscription_expires_at")
-
-is_expired = False
-
-if expires_at:
-    try:
-        expiry_dt = datetime.fromisoformat(str(expires_at).replace("Z", "+00:00"))
-        if expiry_dt < datetime.now(timezone.utc):
-            is_expired = True
-    except Exception:
-        pass
+# Cached per session (services/entitlements.py); effective status only —
+# the expiry sweeper persists it
+inst = get_institution_licence(user_id, selected_inst_id) or {}
+license_status = inst.get("effective_status") or "trial"
 
-# Override status if expired
-if is_expired:
-    license_status = "expired"
-
-# Enforcement logic
 if license_status in ["expired", "suspended"]:
     st.error("🚫 Institution license has expired. Please renew subscription to regain access.")
     st.button("💳 Renew Subscription", on_click=lambda: st.switch_page("pages/18_Institution_Subscription.py"))
@@ -296,33 +173,27 @@ if license_status == "trial":
 # =========================
 member_role = "admin" if user_role == "admin" else "viewer"
 if user_role != "admin":
-    mem_rows = _get_user_institution_memberships(user_id)
-    mem = next((x for x in (mem_rows or []) if x.get("institution_id") == selected_inst_id), None)
-    member_role = (mem.get("member_role") if mem else "viewer") or "viewer"
-    member_role = member_role.lower().strip()
+    member_role = get_entitlements(user_id).get("institution_roles", {}).get(selected_inst_id, "viewer")
 
 can_view_pii = (user_role == "admin") or (member_role in ("admin", "recruiter"))
 
 # =========================
-# LOAD DATA
+# LOAD DATA (concurrent — services/institution_dashboard_loader.py)
+# PATCH 2: VIEWER SCOPE (self-only) is applied inside the applications query
 # =========================
-jobs_rows = _list_job_posts(selected_inst_id)
-apps_rows = _list_applications_by_institution(selected_inst_id)
+CURRENT_YEAR = current_reporting_year()
 
-# =========================================================
-# FETCH INTELLIGENCE SNAPSHOT (Current Year)
-# =========================================================
-
-CURRENT_YEAR = 2026  # you can later make dynamic
+data = load_institution_dashboard(
+    selected_inst_id,
+    CURRENT_YEAR,
+    viewer_user_id=user_id if member_role == "viewer" else None,
+)
 
-snapshot_res = supabase_admin.table("institution_intelligence_snapshot") \
-    .select("*") \
-    .eq("institution_id", selected_inst_id) \
-    .eq("reporting_year", CURRENT_YEAR) \
-    .limit(1) \
-    .execute()
+jobs_rows = data.job_posts
+apps_rows = data.applications
 
-snapshot = (snapshot_res.data or [{}])[0]
+# Materialised by sql/institution_intelligence_snapshot.sql
+snapshot = data.snapshot
 
 # Extract safely
 national_rank = snapshot.get("national_rank")
@@ -337,14 +208,7 @@ snapshot_updated_at = snapshot.get("updated_at")
 if snapshot_updated_at:
     st.caption(f"📅 Intelligence Snapshot Last Updated: {snapshot_updated_at}")
 
-# =========================
-# PATCH 2: VIEWER SCOPE (self-only)
-# =========================
-if member_role == "viewer":
-    apps_rows = [a for a in (apps_rows or []) if a.get("candidate_user_id") == user_id]
-
-app_ids = {a.get("id") for a in (apps_rows or []) if a.get("id")}
-scores_rows = _list_scores_by_app_ids(app_ids)
+scores_rows = data.scores
 
 # Map application_id -> score row
 scores_by_app = {}
@@ -368,7 +232,7 @@ for a in apps_rows or []:
 
 # Candidate user map (names/emails)
 cand_ids = {a.get("candidate_user_id") for a in (apps_rows or []) if a.get("candidate_user_id")}
-users_map = _fetch_users_app_map(cand_ids)
+users_map = data.users_map
 
 # ---- PATCH: ensure logged-in user's name/email always shows (viewer-friendly) ----
 try:
@@ -396,49 +260,51 @@ except Exception:
 
 st.subheader("🎓 Student Employability Intelligence")
 
-student_scores = (
-    supabase_admin.table("candidate_scores")
-    .select("user_id, ers_score, trust_index, faculty")
-    .eq("institution_id", selected_inst_id)
-    .execute()
-)
+if snapshot.get("cv_analyses"):
+
+    col1, col2, col3, col4 = st.columns(4)
 
-student_rows = student_scores.data or []
+    col1.metric("Students Analyzed", _safe_int(snapshot.get("students_analyzed")))
+    col2.metric("CV Analyses", _safe_int(snapshot.get("cv_analyses")))
+    col3.metric("Average ERS", round(_safe_float(snapshot.get("avg_ers")), 1))
+    col4.metric("Trust Index", round(_safe_float(snapshot.get("avg_trust")), 1))
 
-if student_rows:
+else:
+    # Snapshot not materialised yet → live aggregate
+    student_rows = data.student_scores
 
-    import pandas as pd
+    if student_rows:
 
-    df_students = pd.DataFrame(student_rows)
+        import pandas as pd
 
-    total_students = df_students["user_id"].nunique()
-    analyzed = len(df_students)
+        df_students = pd.DataFrame(student_rows)
 
-    avg_ers = df_students["ers_score"].mean()
-    avg_trust = df_students["trust_index"].mean()
+        total_students = df_students["user_id"].nunique()
+        analyzed = len(df_students)
 
-    col1, col2, col3, col4 = st.columns(4)
+        avg_ers = df_students["ers_score"].mean()
+        avg_trust = df_students["trust_index"].mean()
 
-    col1.metric("Students Analyzed", total_students)
-    col2.metric("CV Analyses", analyzed)
-    col3.metric("Average ERS", round(avg_ers,1))
-    col4.metric("Trust Index", round(avg_trust,1))
+        col1, col2, col3, col4 = st.columns(4)
 
-else:
-    st.info("No student employability intelligence available yet.")
+        col1.metric("Students Analyzed", total_students)
+        col2.metric("CV Analyses", analyzed)
+        col3.metric("Average ERS", round(avg_ers,1))
+        col4.metric("Trust Index", round(avg_trust,1))
+
+    else:
+        st.info("No student employability intelligence available yet.")
 
 
 # =========================
 # KPI CARDS
 # =========================
 total_apps = len(apps_rows or [])
-scores_list = [ _safe_float(x.get("overall_score"), None) for x in (apps_with_scores or []) if x.get("overall_score") is not None ]
-scores_list = [s for s in scores_list if s is not None]
+app_scores = [a.get("overall_score") for a in apps_with_scores]
+_score_stats = score_summary(app_scores)
 
-avg_score = (sum(scores_list)/len(scores_list)) if scores_list else 0.0
-job_ready_rate = 0.0
-if scores_list:
-    job_ready_rate = sum(1 for s in scores_list if s >= 70) / len(scores_list)
+avg_score = _score_stats["avg"]
+job_ready_rate = _score_stats["job_ready_rate"]
 
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("Total Applications", f"{total_apps}")
@@ -454,69 +320,33 @@ st.write("---")
 st.subheader("📊 Analytics")
 
 # Score distribution
-band_counts = {}
-for a in apps_with_scores:
-    sc = a.get("overall_score")
-    if sc is None:
-        continue
-    b = _score_band(sc)
-    band_counts[b] = band_counts.get(b, 0) + 1
-
-bands_order = ["0–49","50–59","60–69","70–79","80–89","90–100"]
-dist_data = [{"score_band": b, "count": band_counts.get(b, 0)} for b in bands_order]
+band_counts = score_band_counts(app_scores)
 
 st.caption("Score distribution (count per band)")
-st.bar_chart(data={row["score_band"]: row["count"] for row in dist_data})
+st.bar_chart(data=band_counts.to_dict())
 
 # Subscore breakdown (average per dimension)
-subscore_totals = {}
-subscore_counts = {}
-for a in apps_with_scores:
-    subs = a.get("subscores") or {}
-    if not isinstance(subs, dict):
-        continue
-    for k,v in subs.items():
-        subscore_totals[k] = subscore_totals.get(k, 0.0) + _safe_float(v, 0.0)
-        subscore_counts[k] = subscore_counts.get(k, 0) + 1
-
-subscore_avg = {k: (subscore_totals[k]/subscore_counts[k]) for k in subscore_totals.keys()} if subscore_totals else {}
+subscore_avg = subscore_means(a.get("subscores") for a in apps_with_scores)
 st.caption("Average subscores (JSON breakdown)")
-if subscore_avg:
-    st.bar_chart(subscore_avg)
+if not subscore_avg.empty:
+    st.bar_chart(subscore_avg.to_dict())
 else:
     st.info("No subscores available yet.")
 
 # Volume trend (weekly + daily)
 st.caption("Application volume trend (weekly + daily)")
 
-weekly_counts = {}
-daily_counts = {}
-for a in apps_rows or []:
-    dt = a.get("created_at")
-    if isinstance(dt, str):
-        try:
-            dt = datetime.fromisoformat(dt.replace("Z","+00:00"))
-        except Exception:
-            dt = None
-    if not isinstance(dt, datetime):
-        continue
-
-    wk = _week_start(dt)
-    dy = _day_only(dt)
-    weekly_counts[wk] = weekly_counts.get(wk, 0) + 1
-    daily_counts[dy] = daily_counts.get(dy, 0) + 1
-
-# Present trends
-weekly_sorted = sorted(weekly_counts.items(), key=lambda x: x[0])
-daily_sorted = sorted(daily_counts.items(), key=lambda x: x[0])
-
-if weekly_sorted:
-    st.line_chart({str(k): v for k,v in weekly_sorted})
+_created = [a.get("created_at") for a in (apps_rows or [])]
+weekly_counts = volume_trend(_created, "W")
+daily_counts = volume_trend(_created, "D")
+
+if not weekly_counts.empty:
+    st.line_chart(weekly_counts.to_dict())
 else:
     st.info("No weekly volume data yet.")
 
-if daily_sorted:
-    st.line_chart({str(k): v for k,v in daily_sorted})
+if not daily_counts.empty:
+    st.line_chart(daily_counts.to_dict())
 else:
     st.info("No daily volume data yet.")
 
@@ -553,14 +383,7 @@ with st.expander("🏛 Government Intelligence", expanded=False):
         import pandas as pd
 
         # National average employability score (current year)
-        _nat_rows = (
-            supabase_admin.table("institution_intelligence_snapshot")
-            .select("employability_score")
-            .eq("reporting_year", CURRENT_YEAR)
-            .execute()
-            .data
-            or []
-        )
+        _nat_rows = data.national_scores
         _nat_vals = [_safe_float(r.get("employability_score"), None) for r in (_nat_rows or [])]
         _nat_vals = [v for v in _nat_vals if v is not None]
         _national_avg_score = (sum(_nat_vals) / len(_nat_vals)) if _nat_vals else 0.0
@@ -703,16 +526,7 @@ with st.expander("🌍 Public Intelligence", expanded=False):
         st.dataframe(df_pub.reset_index(), use_container_width=True, hide_index=True)
 
         # Multi-year trend (if available)
-        _trend_rows = (
-            supabase_admin.table("institution_intelligence_snapshot")
-            .select("reporting_year,employability_score,total_hires,national_rank,yoy_growth")
-            .eq("institution_id", selected_inst_id)
-            .order("reporting_year", desc=False)
-            .limit(15)
-            .execute()
-            .data
-            or []
-        )
+        _trend_rows = data.trend_rows
 
         if _trend_rows:
             df_trend = pd.DataFrame(_trend_rows)
@@ -807,12 +621,7 @@ st.dataframe(recent_table, use_container_width=True, hide_index=True)
 st.write("---")
 
 # National average for comparison
-national_avg_res = supabase_admin.table("institution_intelligence_snapshot") \
-    .select("employability_score") \
-    .eq("reporting_year", CURRENT_YEAR) \
-    .execute()
-
-rows = national_avg_res.data or []
+rows = data.national_scores
 
 if rows:
     national_avg_score = sum(r["employability_score"] for r in rows if r["employability_score"]) / len(rows)
@@ -12,6 +12,12 @@ st.set_page_config(page_title="Admin — Institutions", page_icon="🏛️", lay
 from components.sidebar import render_sidebar
 from components.ui import hide_streamlit_sidebar
 from config.supabase_client import supabase, supabase_admin
+from services.entitlements import invalidate_institution
+from services.intelligence_snapshot import (
+    current_reporting_year,
+    refresh_institution_snapshots,
+    rebuild_institution_snapshots,
+)
 
 
 # =========================================================
@@ -210,6 +216,7 @@ with tab1:
             if st.button("💾 Save license status"):
                 try:
                     supabase_admin.table("institutions").update({"license_status": new_status}).eq("id", inst_id).execute()
+                    invalidate_institution(inst_id)
                     st.success("✅ License status updated.")
                     st.rerun()
                 except Exception as e:
@@ -223,18 +230,25 @@ with tab1:
 st.divider()
 st.subheader("🧠 Intelligence Engine Control")
 
-CURRENT_YEAR = 2026
+CURRENT_YEAR = current_reporting_year()
 
-if st.button("🔄 Recalculate National Intelligence Snapshot"):
-    try:
-        supabase_admin.rpc(
-            "refresh_all_institution_intelligence",
-            {"p_year": CURRENT_YEAR}
-        ).execute()
-
-        st.success("Intelligence snapshot refreshed successfully.")
-    except Exception as e:
-        st.error(f"Refresh failed: {e}")
+snap_c1, snap_c2 = st.columns(2)
+
+with snap_c1:
+    if st.button("⚡ Refresh Changed Institutions"):
+        try:
+            n = refresh_institution_snapshots(CURRENT_YEAR)
+            st.success(f"Intelligence snapshot refreshed ({n} institutions changed).")
+        except Exception as e:
+            st.error(f"Refresh failed: {e}")
+
+with snap_c2:
+    if st.button("🔄 Recalculate National Intelligence Snapshot"):
+        try:
+            n = rebuild_institution_snapshots(CURRENT_YEAR)
+            st.success(f"Intelligence snapshot rebuilt ({n} institutions).")
+        except Exception as e:
+            st.error(f"Refresh failed: {e}")
 
 # =========================================================
 # TAB 2: MEMBERS
@@ -12,6 +12,7 @@ st.set_page_config(page_title="Admin — Institution Payments", page_icon="💳"
 from components.sidebar import render_sidebar
 from components.ui import hide_streamlit_sidebar
 from config.supabase_client import supabase, supabase_admin
+from services.entitlements import invalidate_institution
 
 
 # =========================================================
@@ -141,6 +142,7 @@ def _approve_request(request_row: dict, admin_user_id: str):
         "subscription_amount": request_row.get("amount"),
         "updated_at": now.isoformat(),
     }).eq("id", inst_id).execute()
+    invalidate_institution(inst_id)
 
     return start_at, expires_at
 
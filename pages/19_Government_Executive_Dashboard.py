@@ -16,6 +16,15 @@ st.set_page_config(
 from components.sidebar import render_sidebar
 from components.ui import hide_streamlit_sidebar
 from config.supabase_client import supabase_admin
+from services.national_rollups import (
+    RANKING_COLUMNS,
+    fetch_institution_ranking,
+    fetch_national_state,
+    fetch_region_rollups,
+    fetch_salary_leaders,
+    fetch_tier_distribution,
+    refresh_national_rollups,
+)
 
 
 # =========================================================
@@ -49,9 +58,32 @@ def fetch_rows(view_name):
     res = supabase_admin.table(view_name).select("*").execute()
     return res.data or []
 
-summary = fetch_single_row("national_summary_metrics")
-tier_distribution = fetch_rows("national_tier_distribution")
-top_10 = fetch_rows("national_top_10")
+if (user.get("role") or "").lower() == "admin":
+    if st.button("🔄 Refresh national rollups"):
+        try:
+            n = refresh_national_rollups()
+            st.success(f"Refreshed {n} institution(s).")
+        except Exception as e:
+            st.error(f"Refresh failed: {e}")
+
+# Precomputed rollups (sql/national_rollups.sql); legacy views until applied
+national_state = fetch_national_state()
+
+if national_state is not None:
+    summary = national_state.summary()
+    tier_distribution = fetch_tier_distribution()
+    top_10 = [
+        {k: r.get(k) for k in RANKING_COLUMNS}
+        for r in fetch_institution_ranking(limit=10)
+    ]
+    region_rows = fetch_region_rollups()
+    salary_rows = fetch_salary_leaders(limit=10)
+else:
+    summary = fetch_single_row("national_summary_metrics")
+    tier_distribution = fetch_rows("national_tier_distribution")
+    top_10 = fetch_rows("national_top_10")
+    region_rows = []
+    salary_rows = fetch_rows("institution_salary_intelligence")
 
 
 # =========================================================
@@ -117,15 +149,28 @@ else:
     st.info("No ranking data available.")
 
 
+# =========================================================
+# REGIONAL BREAKDOWN
+# =========================================================
+
+if region_rows:
+    import pandas as pd
+
+    st.subheader("🗺 Regional Breakdown")
+
+    st.dataframe(
+        pd.DataFrame(region_rows),
+        use_container_width=True,
+        hide_index=True
+    )
+
+
 # =========================================================
 # NATIONAL SALARY DISTRIBUTION
 # =========================================================
 
 st.subheader("💰 Salary Intelligence Overview")
 
-salary_res = supabase_admin.table("institution_salary_intelligence").select("*").execute()
-salary_rows = salary_res.data or []
-
 if salary_rows:
     import pandas as pd
     import plotly.express as px
@@ -19,7 +19,7 @@ st.set_page_config(
     layout="wide"
 )
 
-from config.supabase_client import supabase_admin
+from services.ranking_publisher import COLUMNS, SORTS, TIERS, load_published_ranking
 
 
 # =========================================================
@@ -46,12 +46,11 @@ st.divider()
 # FETCH RANKING DATA
 # =========================================================
 
-res = supabase_admin.table("institution_national_tiers") \
-    .select("*") \
-    .order("national_score", desc=True) \
-    .execute()
+# Served from the published snapshot (services/ranking_publisher.py);
+# visitors never query the database.
+ranking = load_published_ranking()
 
-ranking_rows = res.data or []
+ranking_rows = ranking.rows if ranking else []
 
 
 # =========================================================
@@ -63,23 +62,10 @@ if ranking_rows:
 
     import pandas as pd
 
-    df = pd.DataFrame(ranking_rows)
-
-    top_10 = df.head(10)
+    top_10 = pd.DataFrame(ranking.view("All", "National Score")[:10], columns=COLUMNS)
 
     st.dataframe(
-        top_10[
-            [
-                "institution_name",
-                "national_score",
-                "performance_tier",
-                "placement_rate",
-                "avg_ers",
-                "avg_hired_score",
-                "avg_salary",
-                "total_hires"
-            ]
-        ],
+        top_10,
         use_container_width=True,
         hide_index=True
     )
@@ -94,52 +80,25 @@ if ranking_rows:
 
     tier_filter = st.selectbox(
         "Filter by Tier",
-        options=["All", "Tier A", "Tier B", "Tier C", "Tier D"]
+        options=TIERS
     )
 
-    if tier_filter != "All":
-        df = df[df["performance_tier"] == tier_filter]
-
     sort_option = st.selectbox(
         "Sort By",
-        options=[
-            "National Score",
-            "Placement Rate",
-            "Average ERS",
-            "Average Hired Score",
-            "Average Salary",
-            "Total Hires"
-        ]
+        options=list(SORTS)
     )
 
-    sort_map = {
-        "National Score": "national_score",
-        "Placement Rate": "placement_rate",
-        "Average ERS": "avg_ers",
-        "Average Hired Score": "avg_hired_score",
-        "Average Salary": "avg_salary",
-        "Total Hires": "total_hires"
-    }
-
-    df = df.sort_values(sort_map[sort_option], ascending=False)
+    # every tier × sort combination is precomputed in the snapshot
+    df = pd.DataFrame(ranking.view(tier_filter, sort_option), columns=COLUMNS)
 
     st.dataframe(
-        df[
-            [
-                "institution_name",
-                "national_score",
-                "performance_tier",
-                "placement_rate",
-                "avg_ers",
-                "avg_hired_score",
-                "avg_salary",
-                "total_hires"
-            ]
-        ],
+        df,
         use_container_width=True,
         hide_index=True
     )
 
+    st.caption(f"Snapshot published {ranking.refreshed_at}")
+
 else:
     st.info("Ranking data not available yet.")
 
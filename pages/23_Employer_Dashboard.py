@@ -11,6 +11,8 @@ st.set_page_config(page_title="Employer Dashboard", page_icon="🏢", layout="wi
 from components.sidebar import render_sidebar
 from components.ui import hide_streamlit_sidebar
 from config.supabase_client import supabase, supabase_admin
+from services.utils import effective_license_status
+from services.entitlements import get_entitlements, list_licences, invalidate_entitlements
 
 
 # -------------------------
@@ -43,33 +45,6 @@ def _safe_float(x, default=0.0):
     except Exception:
         return default
 
-def _get_my_employer_memberships(uid: str):
-    rows = (
-        supabase_admin.table("employer_members")
-        .select("employer_id, member_role")
-        .eq("user_id", uid)
-        .limit(500)
-        .execute()
-        .data
-        or []
-    )
-    return rows
-
-def _get_employers_by_ids(ids):
-    if not ids:
-        return []
-    rows = (
-        supabase_admin.table("employers")
-        .select("id,name,industry,website,license_status,plan_code,subscription_expires_at,created_at")
-        .in_("id", list(ids))
-        .order("created_at", desc=True)
-        .limit(500)
-        .execute()
-        .data
-        or []
-    )
-    return rows
-
 def _get_all_employers():
     return (
         supabase_admin.table("employers")
@@ -84,27 +59,12 @@ def _get_all_employers():
 def _enforce_employer_license(employer_row: dict, allow_subscription_page: bool = False):
     """
     - Blocks dashboard features if expired/suspended (except subscription page).
-    - Also auto-marks expired when past expiry date.
+    - Treats past-expiry as expired (persisted by the expiry sweeper).
     """
     if not employer_row:
         return
 
-    status = (employer_row.get("license_status") or "trial").lower().strip()
-    expires_at = employer_row.get("subscription_expires_at")
-
-    is_expired = False
-    if expires_at:
-        try:
-            expiry_dt = datetime.fromisoformat(str(expires_at).replace("Z", "+00:00"))
-            if expiry_dt < _utcnow():
-                is_expired = True
-        except Exception:
-            pass
-
-    if is_expired and status != "expired":
-        # Update to expired
-        supabase_admin.table("employers").update({"license_status": "expired"}).eq("id", employer_row["id"]).execute()
-        status = "expired"
+    status = effective_license_status(employer_row)
 
     if status in ("expired", "suspended") and not allow_subscription_page:
         st.error("🚫 Employer subscription expired/suspended. Please renew to continue.")
@@ -134,10 +94,10 @@ if user_role == "admin":
         member_role = "admin"
 
 else:
-    memberships = _get_my_employer_memberships(user_id)
-    my_ids = [m.get("employer_id") for m in memberships if m.get("employer_id")]
+    roles = get_entitlements(user_id).get("employer_roles", {})
+    my_ids = list(roles.keys())
     if my_ids:
-        employers = _get_employers_by_ids(my_ids)
+        employers = list_licences(user_id, "employers")
         if len(employers) > 1:
             options = [f"{e.get('name','(no name)')} — {e.get('id')}" for e in employers if e.get("id")]
             pick = st.selectbox("Your employer workspaces", options, key="p19_member_employer_pick")
@@ -145,8 +105,7 @@ else:
         else:
             selected_employer_id = my_ids[0]
         selected_employer_row = next((e for e in employers if e.get("id") == selected_employer_id), None)
-        mem = next((m for m in memberships if m.get("employer_id") == selected_employer_id), None) or {}
-        member_role = (mem.get("member_role") or "viewer").lower().strip()
+        member_role = roles.get(selected_employer_id, "viewer")
     else:
         st.info("You do not have an employer workspace yet. Create one below.")
 
@@ -193,6 +152,7 @@ if not selected_employer_id:
         supabase_admin.table("employer_members").insert(
             {"employer_id": emp_id, "user_id": user_id, "member_role": "admin"}
         ).execute()
+        invalidate_entitlements(user_id)
 
         st.success("Employer workspace created.")
         st.switch_page("pages/23_Employer_Dashboard.py")
@@ -9,6 +9,8 @@ st.set_page_config(page_title="Post a Job", page_icon="📝", layout="wide")
 from components.sidebar import render_sidebar
 from components.ui import hide_streamlit_sidebar
 from config.supabase_client import supabase_admin
+from services.utils import effective_license_status
+from services.entitlements import get_entitlements, list_licences
 
 
 # -------------------------
@@ -42,11 +44,10 @@ def _pick_employer_for_user(uid: str):
         emp = next((e for e in employers if e["id"] == emp_id), None)
         return emp_id, emp, "admin"
 
-    mems = supabase_admin.table("employer_members").select("employer_id,member_role").eq("user_id", uid).limit(50).execute().data or []
-    emp_ids = [m["employer_id"] for m in mems if m.get("employer_id")]
-    if not emp_ids:
+    roles = get_entitlements(uid).get("employer_roles", {})
+    employers = list_licences(uid, "employers")
+    if not roles or not employers:
         return None, None, "viewer"
-    employers = supabase_admin.table("employers").select("id,name,license_status,plan_code,subscription_expires_at").in_("id", emp_ids).order("created_at", desc=True).limit(500).execute().data or []
     if len(employers) > 1:
         opts = [f"{e['name']} — {e['id']}" for e in employers]
         pick = st.selectbox("Select employer", opts, key="p20_member_employer_pick")
@@ -54,22 +55,10 @@ def _pick_employer_for_user(uid: str):
     else:
         emp_id = employers[0]["id"]
     emp = next((e for e in employers if e["id"] == emp_id), None)
-    mem = next((m for m in mems if m.get("employer_id") == emp_id), None) or {}
-    role = (mem.get("member_role") or "viewer").lower().strip()
-    return emp_id, emp, role
+    return emp_id, emp, roles.get(emp_id, "viewer")
 
 def _enforce_license(emp: dict):
-    status = (emp.get("license_status") or "trial").lower().strip()
-    expires_at = emp.get("subscription_expires_at")
-
-    if expires_at:
-        try:
-            exp = datetime.fromisoformat(str(expires_at).replace("Z", "+00:00"))
-            if exp < _utcnow() and status != "expired":
-                supabase_admin.table("employers").update({"license_status": "expired"}).eq("id", emp["id"]).execute()
-                status = "expired"
-        except Exception:
-            pass
+    status = effective_license_status(emp)
 
     if status in ("expired", "suspended"):
         st.error("🚫 Subscription expired/suspended. Renew to post jobs.")
@@ -9,6 +9,7 @@ st.set_page_config(page_title="Approve Employer Subscriptions", page_icon="✅",
 from components.sidebar import render_sidebar
 from components.ui import hide_streamlit_sidebar
 from config.supabase_client import supabase_admin
+from services.entitlements import invalidate_employer
 
 
 if not st.session_state.get("authenticated"):
@@ -131,6 +132,7 @@ with c1:
                 "subscription_expires_at": new_exp,
             }
         ).eq("id", emp["id"]).execute()
+        invalidate_employer(emp["id"])
 
         # Mark payment approved
         supabase_admin.table("employer_subscription_payments").update(
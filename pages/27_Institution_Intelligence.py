@@ -6,7 +6,7 @@ import plotly.express as px
 
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
-from services.skill_gap_engine import calculate_skill_gap
+from services.skill_gap_engine import calculate_skill_gap, top_skill_gaps
 
 from services.employability_ranking import (
     get_top_students,
@@ -124,8 +124,11 @@ gap_df = pd.DataFrame(skill_gap)
 
 st.dataframe(gap_df)
 
+# Heap selection over the cached counters (no full sort for the chart)
+top_gap_df = pd.DataFrame(top_skill_gaps(institution_id, k=15), columns=["skill", "gap"])
+
 fig = px.bar(
-    gap_df.head(15),
+    top_gap_df,
     x="skill",
     y="gap",
     title="Top Skill Gaps",
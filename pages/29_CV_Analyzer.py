@@ -9,7 +9,7 @@ from services.cv_evidence_detector import detect_evidence
 from services.cv_ats_checker import check_ats
 from services.cv_parser import parse_cv
 from services.cv_scoring_engine import compute_scores
-from services.credit_engine import validate_and_charge, deduct_credit
+from services.credit_engine import CreditReservation
 
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
@@ -28,19 +28,22 @@ supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # ✅ FIX APPLIED: Move function definition ABOVE first call
 def _get_latest_cv_score(user_id: str):
-    try:
-        r = (
-            supabase.table("candidate_scores")
-            .select("*")
-            .eq("user_id", user_id)
-            .order("created_at", desc=True)
-            .limit(1)
-            .execute()
-        )
-        rows = r.data or []
-        return rows[0] if rows else None
-    except Exception:
-        return None
+    # candidate_latest_scores: one row per user, kept by a trigger
+    for table in ("candidate_latest_scores", "candidate_scores"):
+        try:
+            r = (
+                supabase.table(table)
+                .select("*")
+                .eq("user_id", user_id)
+                .order("created_at", desc=True)
+                .limit(1)
+                .execute()
+            )
+            rows = r.data or []
+            return rows[0] if rows else None
+        except Exception:
+            continue
+    return None
 
 
 # ---------------------------------------
@@ -211,159 +214,161 @@ target_role = custom_role.strip() if custom_role.strip() else preset_role
 # ---------------------------------------
 if st.button("🚀 Analyze CV"):
 
-    # CREDIT VALIDATION
-    allowed, msg = validate_and_charge(user_id, "cv_intelligence_engine")
-    if not allowed:
-        st.error(msg)
-        st.stop()
-
     if uploaded_file is None:
         st.warning("Please upload your CV first.")
         st.stop()
 
-    with st.spinner("Analyzing your CV with TalentIQ Intelligence Engine..."):
-        try:
-            # ---------------------------------------
-            # STEP 1: EXTRACT + PARSE CV (FIXED)
-            # ---------------------------------------
-            cv_text = _extract_text_from_upload(uploaded_file)
-
-            if not cv_text or len(cv_text.strip()) < 50:
-                st.error(
-                    "We couldn't extract readable text from your CV file. "
-                    "Please upload a clearer PDF/DOCX (text-based, not scanned image)."
-                )
-                st.stop()
-
-            parsed = parse_cv(cv_text)
-
-            # ---------------------------------------
-            # STEP 2: EXTRACT SKILLS
-            # ---------------------------------------
-            skills = extract_skills(parsed)
-
-            # ---------------------------------------
-            # STEP 3: DETECT EVIDENCE
-            # ---------------------------------------
-            evidence = detect_evidence(parsed)
-
-            # ---------------------------------------
-            # STEP 4: ATS CHECK
-            # ---------------------------------------
-            ats_data = check_ats(parsed)
-
-            # ---------------------------------------
-            # STEP 5: GENERATE SCORES
-            # ---------------------------------------
-            scores = compute_scores(
-                skills,
-                evidence,
-                ats_data
-            )
+    # CREDIT RESERVATION (held now, committed after a successful save,
+    # released automatically on any failure or abandoned run)
+    with CreditReservation(user_id, "cv_intelligence_engine") as hold:
 
-            # ---------------------------------------
-            # STEP 6: SAVE TO DATABASE
-            # ---------------------------------------
-            now_iso = datetime.utcnow().isoformat()
-
-            payload = {
-                "user_id": user_id,
-                "target_role": target_role or None,
-                "cv_quality_score": scores.get("cv_quality_score", 0),
-                "cv_quality_band": scores.get("cv_quality_band", "Developing"),
-                "trust_index": scores.get("trust_index", 0),
-                "trust_badge": scores.get("trust_badge", "Developing"),
-                "completeness_score": scores.get("completeness_score", 0),
-                "role_alignment_score": scores.get("role_alignment_score", 0),
-                "evidence_score": scores.get("evidence_score", 0),
-                "specificity_score": scores.get("specificity_score", 0),
-                "ats_score": scores.get("ats_score", 0),
-                "professional_score": scores.get("professional_score", 0),
-                "ers_score": scores.get("ers_score", 0),
-                "created_at": now_iso,
-                "updated_at": now_iso
-            }
+        if not hold.ok:
+            st.error(hold.message)
+            st.stop()
 
+        with st.spinner("Analyzing your CV with TalentIQ Intelligence Engine..."):
             try:
-                supabase.table("candidate_scores").insert(payload).execute()
-            except Exception:
-                payload.pop("target_role", None)
-                supabase.table("candidate_scores").insert(payload).execute()
-
-            # ---------------------------------------
-            # STEP 7: DEDUCT CREDIT
-            # ---------------------------------------
-            success, balance = deduct_credit(user_id, "cv_intelligence_engine")
-
-            # ---------------------------------------
-            # STEP 8: DISPLAY RESULTS
-            # ---------------------------------------
-            st.success("CV analysis completed successfully!")
-
-            if success:
-                st.info(f"20 credits deducted. Remaining balance: {balance}")
-
-            st.subheader("📊 Your TalentIQ Employability Intelligence")
-
-            col1, col2, col3 = st.columns(3)
-
-            with col1:
-                st.metric("CV Quality Score", scores.get("cv_quality_score", 0))
-
-            with col2:
-                st.metric("Trust Index", scores.get("trust_index", 0))
-
-            with col3:
-                st.metric("Employability Readiness (ERS)", scores.get("ers_score", 0))
-
-            st.divider()
-
-            col4, col5 = st.columns(2)
-
-            with col4:
-                st.markdown("### 🎖 Trust Badge")
-                st.success(scores.get("trust_badge", "Developing"))
-
-            with col5:
-                st.markdown("### 📈 CV Quality Band")
-                st.info(scores.get("cv_quality_band", "Developing"))
-
-            st.divider()
-
-            st.subheader("🔍 Component Breakdown")
-
-            breakdown = {
-                "Completeness Score": scores.get("completeness_score", 0),
-                "Role Alignment": scores.get("role_alignment_score", 0),
-                "Evidence Strength": scores.get("evidence_score", 0),
-                "Specificity": scores.get("specificity_score", 0),
-                "ATS Compatibility": scores.get("ats_score", 0),
-                "Professional Quality": scores.get("professional_score", 0)
-            }
+                # ---------------------------------------
+                # STEP 1: EXTRACT + PARSE CV (FIXED)
+                # ---------------------------------------
+                cv_text = _extract_text_from_upload(uploaded_file)
+
+                if not cv_text or len(cv_text.strip()) < 50:
+                    st.error(
+                        "We couldn't extract readable text from your CV file. "
+                        "Please upload a clearer PDF/DOCX (text-based, not scanned image)."
+                    )
+                    st.stop()
+
+                parsed = parse_cv(cv_text)
+
+                # ---------------------------------------
+                # STEP 2: EXTRACT SKILLS
+                # ---------------------------------------
+                skills = extract_skills(parsed)
+
+                # ---------------------------------------
+                # STEP 3: DETECT EVIDENCE
+                # ---------------------------------------
+                evidence = detect_evidence(parsed)
+
+                # ---------------------------------------
+                # STEP 4: ATS CHECK
+                # ---------------------------------------
+                ats_data = check_ats(parsed)
+
+                # ---------------------------------------
+                # STEP 5: GENERATE SCORES
+                # ---------------------------------------
+                scores = compute_scores(
+                    skills,
+                    evidence,
+                    ats_data
+                )
 
-            breakdown_df = pd.DataFrame(
-                list(breakdown.items()),
-                columns=["Component", "Score"]
-            )
+                # ---------------------------------------
+                # STEP 6: SAVE TO DATABASE
+                # ---------------------------------------
+                now_iso = datetime.utcnow().isoformat()
+
+                payload = {
+                    "user_id": user_id,
+                    "target_role": target_role or None,
+                    "cv_quality_score": scores.get("cv_quality_score", 0),
+                    "cv_quality_band": scores.get("cv_quality_band", "Developing"),
+                    "trust_index": scores.get("trust_index", 0),
+                    "trust_badge": scores.get("trust_badge", "Developing"),
+                    "completeness_score": scores.get("completeness_score", 0),
+                    "role_alignment_score": scores.get("role_alignment_score", 0),
+                    "evidence_score": scores.get("evidence_score", 0),
+                    "specificity_score": scores.get("specificity_score", 0),
+                    "ats_score": scores.get("ats_score", 0),
+                    "professional_score": scores.get("professional_score", 0),
+                    "ers_score": scores.get("ers_score", 0),
+                    "created_at": now_iso,
+                    "updated_at": now_iso
+                }
+
+                try:
+                    supabase.table("candidate_scores").insert(payload).execute()
+                except Exception:
+                    payload.pop("target_role", None)
+                    supabase.table("candidate_scores").insert(payload).execute()
+
+                # ---------------------------------------
+                # STEP 7: COMMIT CREDIT RESERVATION
+                # ---------------------------------------
+                success, balance = hold.commit()
+
+                # ---------------------------------------
+                # STEP 8: DISPLAY RESULTS
+                # ---------------------------------------
+                st.success("CV analysis completed successfully!")
+
+                if success:
+                    st.info(f"20 credits deducted. Remaining balance: {balance}")
+
+                st.subheader("📊 Your TalentIQ Employability Intelligence")
+
+                col1, col2, col3 = st.columns(3)
+
+                with col1:
+                    st.metric("CV Quality Score", scores.get("cv_quality_score", 0))
+
+                with col2:
+                    st.metric("Trust Index", scores.get("trust_index", 0))
+
+                with col3:
+                    st.metric("Employability Readiness (ERS)", scores.get("ers_score", 0))
+
+                st.divider()
+
+                col4, col5 = st.columns(2)
+
+                with col4:
+                    st.markdown("### 🎖 Trust Badge")
+                    st.success(scores.get("trust_badge", "Developing"))
+
+                with col5:
+                    st.markdown("### 📈 CV Quality Band")
+                    st.info(scores.get("cv_quality_band", "Developing"))
+
+                st.divider()
+
+                st.subheader("🔍 Component Breakdown")
+
+                breakdown = {
+                    "Completeness Score": scores.get("completeness_score", 0),
+                    "Role Alignment": scores.get("role_alignment_score", 0),
+                    "Evidence Strength": scores.get("evidence_score", 0),
+                    "Specificity": scores.get("specificity_score", 0),
+                    "ATS Compatibility": scores.get("ats_score", 0),
+                    "Professional Quality": scores.get("professional_score", 0)
+                }
+
+                breakdown_df = pd.DataFrame(
+                    list(breakdown.items()),
+                    columns=["Component", "Score"]
+                )
 
-            st.table(breakdown_df)
+                st.table(breakdown_df)
 
-            st.divider()
+                st.divider()
 
-            # ---------------------------------------
-            # COACHING FEEDBACK
-            # ---------------------------------------
-            st.subheader("🛠 TalentIQ Improvement Coach")
+                # ---------------------------------------
+                # COACHING FEEDBACK
+                # ---------------------------------------
+                st.subheader("🛠 TalentIQ Improvement Coach")
 
-            ers = scores.get("ers_score", 0)
+                ers = scores.get("ers_score", 0)
 
-            if ers >= 85:
-                st.success("Excellent CV. You are strongly positioned for employers.")
-            elif ers >= 70:
-                st.info("Good CV. Some improvements can significantly boost your employability.")
-            else:
-                st.warning("Your CV needs improvement. Consider strengthening experience, skills and achievements.")
+                if ers >= 85:
+                    st.success("Excellent CV. You are strongly positioned for employers.")
+                elif ers >= 70:
+                    st.info("Good CV. Some improvements can significantly boost your employability.")
+                else:
+                    st.warning("Your CV needs improvement. Consider strengthening experience, skills and achievements.")
 
-        except Exception as e:
-            st.error("An error occurred during CV analysis.")
-            st.exception(e)
\ No newline at end of file
+            except Exception as e:
+                st.error("An error occurred during CV analysis.")
+                st.exception(e)
\ No newline at end of file
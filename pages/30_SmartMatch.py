@@ -3,7 +3,7 @@ import pandas as pd
 
 from services.smartmatch_engine import generate_matches
 from services.supabase_client import supabase
-from services.credit_engine import validate_and_charge, deduct_credit
+from services.credit_engine import reserve_credits, commit_reservation, release_reservation
 
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
@@ -80,20 +80,25 @@ institution_id = inst_options[selected_inst]
 
 if st.button("Generate Matches"):
 
-    # CREDIT CHECK
-    allowed, msg = validate_and_charge(user_id, "smartmatch_engine")
+    # CREDIT RESERVATION (released if matching fails)
+    allowed, reservation_id, _ = reserve_credits(user_id, "smartmatch_engine")
 
     if not allowed:
-        st.error(msg)
+        st.error(reservation_id)
         st.stop()
 
-    results = generate_matches(job_query, institution_id, job_id) or []
+    try:
+        results = generate_matches(job_query, institution_id, job_id) or []
+    except BaseException:
+        release_reservation(reservation_id)
+        raise
 
     st.subheader("Top Candidates")
 
     df = pd.DataFrame(results)
 
     if df.empty:
+        release_reservation(reservation_id)
         st.warning("No matches found for the selected job and institution.")
         st.stop()
 
@@ -173,7 +178,7 @@ if st.button("Generate Matches"):
 
     st.dataframe(df, use_container_width=True, hide_index=True)
 
-    # DEDUCT CREDIT (unchanged)
-    success, balance = deduct_credit(user_id, "smartmatch_engine")
+    # COMMIT CREDIT
+    success, balance = commit_reservation(reservation_id)
     if success:
         st.success(f"10 credits deducted. Remaining balance: {balance}")
\ No newline at end of file
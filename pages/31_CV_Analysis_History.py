@@ -7,7 +7,7 @@ import docx
 import pdfplumber
 
 from services.cv_pipeline import process_candidate_cv
-from services.credit_engine import validate_and_charge, deduct_credit
+from services.credit_engine import reserve_credits, commit_reservation, release_reservation
 
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
@@ -107,13 +107,6 @@ cv_text_input = st.text_area(
 
 if st.button("Analyze My CV"):
 
-    # CREDIT VALIDATION
-    allowed, msg = validate_and_charge(user_id, "cv_analysis_history")
-
-    if not allowed:
-        st.error(msg)
-        st.stop()
-
     cv_text = ""
 
     # -------------------------
@@ -147,18 +140,29 @@ if st.button("Analyze My CV"):
     # RUN CV ANALYSIS
     # =========================
 
-    with st.spinner("Analyzing your CV..."):
+    # Hold credits for the run; released if the analysis fails
+    allowed, reservation_id, _ = reserve_credits(user_id, "cv_analysis_history")
+
+    if not allowed:
+        st.error(reservation_id)
+        st.stop()
+
+    try:
+        with st.spinner("Analyzing your CV..."):
 
-        result = process_candidate_cv(
-            user_id=user_id,
-            cv_text=cv_text
-        )
+            result = process_candidate_cv(
+                user_id=user_id,
+                cv_text=cv_text
+            )
+    except BaseException:
+        release_reservation(reservation_id)
+        raise
 
     # =========================
-    # DEDUCT CREDIT
+    # COMMIT CREDIT
     # =========================
 
-    success, balance = deduct_credit(user_id, "cv_analysis_history")
+    success, balance = commit_reservation(reservation_id)
 
     # =========================
     # SUCCESS MESSAGE
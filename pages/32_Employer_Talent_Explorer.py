@@ -6,6 +6,7 @@ import os
 
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
+from services.query_batching import fetch_in
 
 st.set_page_config(page_title="Employer Talent Explorer", layout="wide")
 hide_streamlit_sidebar()
@@ -23,12 +24,12 @@ SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # =========================
-# FETCH CANDIDATE SCORES
+# FETCH CANDIDATE SCORES (latest per candidate)
 # =========================
 
 score_res = (
     supabase
-    .table("candidate_scores")
+    .table("candidate_latest_scores")
     .select("user_id, ers_score, trust_badge, cv_quality_score, trust_index")
     .order("ers_score", desc=True)
     .limit(500)
@@ -49,16 +50,14 @@ score_df = pd.DataFrame(scores)
 
 user_ids = score_df["user_id"].dropna().tolist()
 
-profile_res = (
-    supabase
-    .table("users_app")
-    .select("id, full_name, email, faculty, program, institution_id")
-    .in_("id", user_ids)
-    .execute()
+profiles = fetch_in(
+    supabase,
+    "users_app",
+    "id",
+    user_ids,
+    select="id, full_name, email, faculty, program, institution_id",
 )
 
-profiles = profile_res.data or []
-
 if profiles:
     profile_df = pd.DataFrame(profiles).rename(columns={"id": "user_id"})
 else:
@@ -79,15 +78,7 @@ institution_ids = df["institution_id"].dropna().unique().tolist()
 institution_map = {}
 
 if len(institution_ids) > 0:
-    institution_res = (
-        supabase
-        .table("institutions")
-        .select("id, name")
-        .in_("id", institution_ids)
-        .execute()
-    )
-
-    institutions = institution_res.data or []
+    institutions = fetch_in(supabase, "institutions", "id", institution_ids, select="id, name")
     institution_map = {row["id"]: row["name"] for row in institutions if row.get("id")}
 
 df["Institution"] = df["institution_id"].map(institution_map).fillna("Unknown")
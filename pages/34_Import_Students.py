@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd
 from config.supabase_client import supabase_admin
+from services.student_import import ImportFormatError, REQUIRED_COLUMNS, import_students, preview
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
 
@@ -20,30 +20,6 @@ user_id = user.get("id")
 user_role = (user.get("role") or "").lower()
 
 
-# =========================================================
-# BATCH INSERT STUDENTS
-# =========================================================
-
-def batch_insert_students(records, batch_size=1000):
-
-    total = len(records)
-    inserted = 0
-
-    for i in range(0, total, batch_size):
-
-        batch = records[i:i + batch_size]
-
-        try:
-            supabase_admin.table("users_app").insert(batch).execute()
-            inserted += len(batch)
-
-        except Exception as e:
-            st.error(f"Batch insert failed: {e}")
-            return inserted
-
-    return inserted
-
-
 # --------------------------------------------------
 # ADMIN OVERRIDE
 # --------------------------------------------------
@@ -87,87 +63,21 @@ uploaded_file = st.file_uploader("Upload CSV file", type=["csv"])
 if uploaded_file:
 
     try:
-
-        # --------------------------------------------------
-        # READ CSV
-        # --------------------------------------------------
-
-        df = pd.read_csv(uploaded_file)
-
-        # --------------------------------------------------
-        # CLEAN HEADER NAMES
-        # --------------------------------------------------
-
-        df.columns = df.columns.str.strip()
-
-        # --------------------------------------------------
-        # MAP HEADER VARIANTS (UPPER + LOWER CASE)
-        # --------------------------------------------------
-
-        column_map = {
-            "Matric_Number": "matric_number",
-            "matric_number": "matric_number",
-
-            "Full_Name": "full_name",
-            "full_name": "full_name",
-
-            "Faculty": "faculty",
-            "faculty": "faculty",
-
-            "Department": "department",
-            "department": "department",
-
-            "Program": "program",
-            "program": "program",
-
-            "Level": "level",
-            "level": "level",
-
-            "Email": "email",
-            "email": "email"
-        }
-
-        df = df.rename(columns=column_map)
-
-        # --------------------------------------------------
-        # REQUIRED COLUMNS
-        # --------------------------------------------------
-
-        required_columns = ["matric_number", "full_name", "faculty"]
-
-        missing = [c for c in required_columns if c not in df.columns]
-
-        if missing:
-            st.error(f"Missing required columns: {missing}")
-            st.stop()
-
-        # --------------------------------------------------
-        # CLEAN DATA
-        # --------------------------------------------------
-
-        df["matric_number"] = df["matric_number"].astype(str).str.strip()
-        df["full_name"] = df["full_name"].astype(str).str.strip()
-        df["faculty"] = df["faculty"].astype(str).str.strip()
-
-        if "email" in df.columns:
-            df["email"] = df["email"].astype(str).str.strip()
-
-        # Prevent Excel scientific notation corruption
-        df["matric_number"] = df["matric_number"].astype(str)
-
-        # Remove duplicates
-        df = df.drop_duplicates(subset=["matric_number"])
-
+        preview_df = preview(uploaded_file)
     except Exception:
         st.error("Failed to read CSV file.")
         st.stop()
 
-    st.write("Preview of uploaded file:")
-    st.dataframe(df.head())
+    missing = [c for c in REQUIRED_COLUMNS if c not in preview_df.columns]
 
-    total_rows = len(df)
+    if missing:
+        st.error(f"Missing required columns: {missing}")
+        st.stop()
+
+    st.write("Preview of uploaded file:")
+    st.dataframe(preview_df)
 
-    st.info(f"{total_rows} students ready for import.")
+    st.info("Rows are validated and imported in chunks; existing students (same matric number) are updated.")
 
     # --------------------------------------------------
     # IMPORT BUTTON
@@ -175,37 +85,56 @@ if uploaded_file:
 
     if st.button("Import Students"):
 
-        records = []
+        progress = st.empty()
 
-        for _, row in df.iterrows():
+        try:
+            result = import_students(
+                uploaded_file,
+                institution_id,
+                on_progress=lambda n: progress.caption(f"Processed {n} rows…"),
+            )
+        except ImportFormatError as e:
+            st.error(str(e))
+            st.stop()
 
-            records.append({
+        progress.empty()
+        st.session_state["student_import_result"] = (uploaded_file.name, result)
 
-                "full_name": row["full_name"],
-                "email": row.get("email"),
+    last = st.session_state.get("student_import_result")
 
-                "role": "student",
+    if last and last[0] == uploaded_file.name:
 
-                "faculty": row.get("faculty"),
-                "department": row.get("department"),
-                "program": row.get("program"),
-                "level": row.get("level"),
+        result = last[1]
 
-                "matric_number": row["matric_number"],
+        counts = result.counts
 
-                "institution_id": institution_id,
+        if result.aborted:
+            st.error(
+                f"Import stopped: {result.aborted}. "
+                "Rows that were not written are marked failed (not processed) in the report."
+            )
 
-                "status": "pending_activation",
-                "is_active": True,
+        c1, c2, c3, c4, c5 = st.columns(5)
+        c1.metric("Inserted", counts["inserted"])
+        c2.metric("Updated", counts["updated"])
+        c3.metric("Duplicates in file", counts["duplicate_in_file"])
+        c4.metric("Invalid", counts["invalid"])
+        c5.metric("Failed", counts["failed"])
 
-                "credit_balance": 0,
-                "subscription_plan": "FREEMIUM"
+        imported = counts["inserted"] + counts["updated"]
+        st.success(f"{imported} students imported successfully.")
 
-            })
+        not_imported = result.total - imported
+        if not_imported:
+            st.warning(f"{not_imported} rows not imported — see the report for the reason per row.")
 
-        inserted = batch_insert_students(records)
+        report_df = result.report_frame()
 
-        skipped = total_rows - inserted
+        st.dataframe(report_df[report_df["status"].isin(["invalid", "failed", "duplicate_in_file"])].head(200), use_container_width=True, hide_index=True)
 
-        st.success(f"{inserted} students imported successfully.")
-        st.warning(f"{skipped} rows skipped (duplicates or errors).")
\ No newline at end of file
+        st.download_button(
+            "⬇️ Download import report (CSV)",
+            data=report_df.to_csv(index=False).encode("utf-8"),
+            file_name="student_import_report.csv",
+            mime="text/csv",
+        )
@@ -5,6 +5,7 @@ import plotly.express as px
 from config.supabase_client import supabase_admin
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
+from services.scores_cache import load_scores
 
 st.set_page_config(page_title="Faculty Employability Analytics", layout="wide")
 hide_streamlit_sidebar()
@@ -43,24 +44,16 @@ if not admin_override:
 else:
     institution_id = None
 
-query = (
-    supabase_admin.table("candidate_scores")
-    .select("user_id, ers_score, trust_index, faculty, program")
+# Admin (institution_id None) reads the all-institutions cache
+df = load_scores(
+    institution_id,
+    columns=["user_id", "ers_score", "trust_index", "faculty", "program"],
 )
 
-if not admin_override:
-    query = query.eq("institution_id", institution_id)
-
-scores = query.execute()
-
-rows = scores.data or []
-
-if not rows:
+if df.empty:
     st.info("No student intelligence data yet.")
     st.stop()
 
-df = pd.DataFrame(rows)
-
 faculty_summary = (
     df.groupby("faculty")
     .agg(
@@ -0,0 +1,171 @@
+
+# ==========================================================
+# 38_Admin_AI_Metrics.py — AI Call Telemetry (latency / tokens per tool)
+# ==========================================================
+
+import streamlit as st
+import pandas as pd
+from components.sidebar import render_sidebar
+from services.ai_metrics import fetch_ai_call_metrics
+
+# ----------------------------------------------------------
+# AUTH GUARD
+# ----------------------------------------------------------
+if not st.session_state.get("authenticated"):
+    st.switch_page("app.py")
+    st.stop()
+
+user = st.session_state.get("user")
+if not user or user.get("role") != "admin":
+    st.error("Admin access required.")
+    st.stop()
+
+render_sidebar()
+
+st.markdown(
+    """
+    <style>
+        /* Hide Streamlit default page navigation */
+        [data-testid="stSidebarNav"] {
+            display: none;
+        }
+
+        /* Remove extra top spacing Streamlit adds */
+        section[data-testid="stSidebar"] > div:first-child {
+            padding-top: 0rem;
+        }
+    </style>
+    """,
+    unsafe_allow_html=True,
+)
+
+
+st.title("⏱ AI Call Metrics")
+st.caption("Latency, token spend and cache hits per AI tool")
+st.write("---")
+
+days = st.selectbox("Window", [1, 7, 30], index=1, format_func=lambda d: f"Last {d} day(s)")
+
+# ----------------------------------------------------------
+# LOAD METRICS
+# ----------------------------------------------------------
+try:
+    rows = fetch_ai_call_metrics(days=days)
+except Exception as e:
+    st.error(f"Could not load ai_call_metrics: {e}")
+    st.stop()
+
+if not rows:
+    st.info("No AI calls recorded in this window.")
+    st.stop()
+
+df = pd.DataFrame(rows)
+
+for col in ["prompt_tokens", "completion_tokens", "total_tokens", "latency_ms"]:
+    df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+
+df["cache_hit"] = df["cache_hit"].fillna(False).astype(bool)
+df["fallback_used"] = df["fallback_used"].fillna(False).astype(bool)
+
+# Latency percentiles only make sense for real (non-cached) calls
+calls = df[~df["cache_hit"]]
+
+# ----------------------------------------------------------
+# SYSTEM METRICS
+# ----------------------------------------------------------
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.metric("🔁 AI Calls", f"{len(calls):,}")
+
+with col2:
+    st.metric("🪙 Total Tokens", f"{int(df['total_tokens'].sum()):,}")
+
+with col3:
+    hit_rate = df["cache_hit"].mean() * 100 if len(df) else 0
+    st.metric("⚡ Cache Hit Rate", f"{hit_rate:.1f}%")
+
+with col4:
+    # truncated replies still returned text; they are reported per tool below
+    error_rate = (~calls["status"].isin(["ok", "truncated"])).mean() * 100 if len(calls) else 0
+    st.metric("⚠️ Error Rate", f"{error_rate:.1f}%")
+
+st.write("---")
+
+# ----------------------------------------------------------
+# PER-TOOL SUMMARY
+# ----------------------------------------------------------
+st.subheader("🧰 Per-Tool Summary")
+
+if calls.empty:
+    st.info("Only cache hits in this window.")
+    st.stop()
+
+summary = (
+    calls.assign(truncated=calls["status"] == "truncated")
+    .groupby("tool")
+    .agg(
+        calls=("latency_ms", "size"),
+        p50_latency_ms=("latency_ms", lambda s: s.quantile(0.50)),
+        p95_latency_ms=("latency_ms", lambda s: s.quantile(0.95)),
+        avg_prompt_tokens=("prompt_tokens", "mean"),
+        avg_completion_tokens=("completion_tokens", "mean"),
+        total_tokens=("total_tokens", "sum"),
+        fallbacks=("fallback_used", "sum"),
+        truncated=("truncated", "sum"),
+    )
+    .reset_index()
+)
+
+cache_hits = df[df["cache_hit"]].groupby("tool").size().rename("cache_hits")
+summary = summary.merge(cache_hits, on="tool", how="left").fillna({"cache_hits": 0})
+
+for col in ["p50_latency_ms", "p95_latency_ms", "avg_prompt_tokens", "avg_completion_tokens"]:
+    summary[col] = summary[col].round(0)
+
+summary = summary.sort_values("p95_latency_ms", ascending=False)
+
+st.dataframe(summary, use_container_width=True)
+
+st.write("---")
+
+# ----------------------------------------------------------
+# LATENCY PERCENTILES
+# ----------------------------------------------------------
+st.subheader("🐢 Latency per Tool (p50 / p95, ms)")
+
+st.bar_chart(
+    summary.set_index("tool")[["p50_latency_ms", "p95_latency_ms"]],
+    use_container_width=True
+)
+
+# ----------------------------------------------------------
+# TOKENS PER TOOL
+# ----------------------------------------------------------
+st.subheader("🪙 Average Tokens per Call")
+
+st.bar_chart(
+    summary.set_index("tool")[["avg_prompt_tokens", "avg_completion_tokens"]],
+    use_container_width=True
+)
+
+st.write("---")
+
+# ----------------------------------------------------------
+# MODEL MIX
+# ----------------------------------------------------------
+st.subheader("🤖 Calls by Model")
+
+model_df = (
+    calls.groupby(["tool", "model"])
+    .size()
+    .reset_index(name="calls")
+    .sort_values("calls", ascending=False)
+)
+
+st.dataframe(model_df, use_container_width=True)
+
+# ======================================================
+# FOOTER
+# ======================================================
+st.caption("Chumcred TalentIQ — Admin Analytics © 2025")
@@ -23,11 +23,10 @@ from components.ui import hide_streamlit_sidebar
 from config.supabase_client import supabase
 from services.job_api import search_jobs
 from services.utils import (
-    get_subscription,
-    auto_expire_subscription,
     deduct_credits,
     is_low_credit,
 )
+from services.entitlements import get_cached_subscription
 
 # ---------------------------------------------------------
 # AUTH GUARD
@@ -62,8 +61,7 @@ st.markdown(
 # ---------------------------------------------------------
 # SUBSCRIPTION CHECK
 # ---------------------------------------------------------
-auto_expire_subscription(user_id)
-subscription = get_subscription(user_id)
+subscription = get_cached_subscription(user_id)
 
 if not subscription or (subscription.get("subscription_status") or "").lower() != "active":
     st.error("❌ You need an active subscription to use Job Search.")
@@ -118,7 +116,7 @@ if st.button("🔎 Search Jobs"):
         st.error("❌ You do not have enough credits to run a job search.")
         st.stop()
 
-    ok, msg = deduct_credits(user_id, 3)
+    ok, msg = deduct_credits(user_id, 3, tool="job_search")
     if not ok:
         st.error(msg)
         st.stop()
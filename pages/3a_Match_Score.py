@@ -12,8 +12,8 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
 from services.resume_parser import extract_text_from_resume
-from services.ai_engine import ai_generate_match_score
-from services.utils import get_subscription, auto_expire_subscription, deduct_credits
+from services.ai_engine import ai_generate_match_score, ai_cv_jd_section, cv_jd_input_hash
+from services.utils import get_subscription, deduct_credits
 from config.supabase_client import supabase
 
 render_sidebar()
@@ -60,7 +60,6 @@ if not user_id:
     st.switch_page("app.py")
     st.stop()
 
-auto_expire_subscription(user_id)
 subscription = get_subscription(user_id)
 if not subscription or subscription.get("subscription_status") != "active":
     st.error("❌ You need an active subscription to use this tool.")
@@ -145,12 +144,16 @@ if st.button("Generate Match Score", key="ms_generate"):
             st.warning("Please provide your job description (upload or paste).")
         st.stop()
 
-    ok, msg = deduct_credits(user_id, CREDIT_COST)
+    ok, msg = deduct_credits(user_id, CREDIT_COST, tool=TOOL)
     if not ok:
         st.error(msg)
         st.stop()
 
-    output = ai_generate_match_score(resume_text=resume_text, job_description=job_description)
+    # One combined CV-vs-JD call (cached by input hash) also serves
+    # Eligibility, Skills and Tailor CV; fall back to the single prompt.
+    output = ai_cv_jd_section("match_score", resume_text, job_description)
+    if not output:
+        output = ai_generate_match_score(resume_text=resume_text, job_description=job_description)
 
     # safe cleanup
     output = (output or "").replace("\x00", "").strip()
@@ -159,7 +162,10 @@ if st.button("Generate Match Score", key="ms_generate"):
         {
             "user_id": user_id,
             "tool": TOOL,
-            "input": {"job_description": (job_description or "")[:500]},
+            "input": {
+                "job_description": (job_description or "")[:500],
+                "input_hash": cv_jd_input_hash(resume_text, job_description),
+            },
             "output": output,
             "credits_used": CREDIT_COST,
         }
@@ -11,8 +11,8 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
 from services.resume_parser import extract_text_from_resume
-from services.ai_engine import ai_extract_skills
-from services.utils import get_subscription, auto_expire_subscription, deduct_credits
+from services.ai_engine import ai_extract_skills, get_cached_cv_jd_analysis
+from services.utils import get_subscription, deduct_credits
 from config.supabase_client import supabase
 
 
@@ -66,7 +66,6 @@ if not user_id:
 # ======================================================
 # SUBSCRIPTION CHECK
 # ======================================================
-auto_expire_subscription(user_id)
 subscription = get_subscription(user_id)
 if not subscription or subscription.get("subscription_status") != "active":
     st.error("❌ You need an active subscription to use Skills Extraction.")
@@ -141,13 +140,18 @@ if st.button("Extract Skills", key="sk_generate"):
         st.warning("Please provide your resume (upload or paste).")
         st.stop()
 
-    ok, msg = deduct_credits(user_id, CREDIT_COST)
+    ok, msg = deduct_credits(user_id, CREDIT_COST, tool=TOOL)
     if not ok:
         st.error(msg)
         st.stop()
 
-    with st.spinner("Extracting skills…"):
-        output = ai_extract_skills(resume_text=resume_text)
+    # Reuse the skills slice of a combined CV-vs-JD analysis for this resume
+    cached = get_cached_cv_jd_analysis(resume_text) or {}
+    output = cached.get("skills", "")
+
+    if not output:
+        with st.spinner("Extracting skills…"):
+            output = ai_extract_skills(resume_text=resume_text)
 
     output = (output or "").replace("\x00", "").strip()
 
@@ -11,8 +11,8 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
 from services.resume_parser import extract_text_from_resume
-from services.ai_engine import ai_check_eligibility
-from services.utils import get_subscription, auto_expire_subscription, deduct_credits
+from services.ai_engine import ai_check_eligibility, ai_cv_jd_section, cv_jd_input_hash
+from services.utils import get_subscription, deduct_credits
 from config.supabase_client import supabase
 
 render_sidebar()
@@ -58,7 +58,6 @@ if not user_id:
     st.switch_page("app.py")
     st.stop()
 
-auto_expire_subscription(user_id)
 subscription = get_subscription(user_id)
 if not subscription or subscription.get("subscription_status") != "active":
     st.error("❌ You need an active subscription to use this tool.")
@@ -118,16 +117,25 @@ if st.button("Run Eligibility Check", key="el_generate"):
         st.warning("Please provide your job description (upload or paste).")
         st.stop()
 
-    ok, msg = deduct_credits(user_id, CREDIT_COST)
+    ok, msg = deduct_credits(user_id, CREDIT_COST, tool=TOOL)
     if not ok:
         st.error(msg)
         st.stop()
 
-    output = ai_check_eligibility(resume_text=resume_text, job_description=job_description)
+    # Reuse the combined CV-vs-JD analysis when the same inputs were already analysed
+    output = ai_cv_jd_section("eligibility", resume_text, job_description)
+    if not output:
+        output = ai_check_eligibility(resume_text=resume_text, job_description=job_description)
     output = (output or "").replace("\x00", "").strip()
 
     supabase.table("ai_outputs").insert(
-        {"user_id": user_id, "tool": TOOL, "input": {}, "output": output, "credits_used": CREDIT_COST}
+        {
+            "user_id": user_id,
+            "tool": TOOL,
+            "input": {"input_hash": cv_jd_input_hash(resume_text, job_description)},
+            "output": output,
+            "credits_used": CREDIT_COST,
+        }
     ).execute()
 
     st.success("✅ Eligibility result generated!")
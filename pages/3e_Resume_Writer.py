@@ -13,7 +13,7 @@ from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
 from services.resume_parser import extract_text_from_resume
 from services.ai_engine import ai_generate_resume_rewrite
-from services.utils import get_subscription, auto_expire_subscription, deduct_credits
+from services.utils import get_subscription, deduct_credits
 from config.supabase_client import supabase
 
 render_sidebar()
@@ -65,7 +65,6 @@ if not user_id:
 # ======================================================
 # SUBSCRIPTION CHECK
 # ======================================================
-auto_expire_subscription(user_id)
 subscription = get_subscription(user_id)
 if not subscription or subscription.get("subscription_status") != "active":
     st.error("❌ You need an active subscription to use this tool.")
@@ -142,7 +141,7 @@ if st.button("Rewrite My Resume", key="rw_generate"):
         st.warning("Please provide your resume (upload or paste).")
         st.stop()
 
-    ok, msg = deduct_credits(user_id, CREDIT_COST)
+    ok, msg = deduct_credits(user_id, CREDIT_COST, tool=TOOL)
     if not ok:
         st.error(msg)
         st.stop()
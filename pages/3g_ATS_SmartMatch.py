@@ -13,7 +13,8 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
 from services.resume_parser import extract_text_from_resume
-from services.utils import get_subscription, auto_expire_subscription, deduct_credits, is_low_credit
+from services.utils import deduct_credits, is_low_credit
+from services.entitlements import get_cached_subscription
 from config.supabase_client import supabase
 
 
@@ -77,8 +78,7 @@ if not user_id:
 # ======================================================
 # SUBSCRIPTION CHECK
 # ======================================================
-auto_expire_subscription(user_id)
-subscription = get_subscription(user_id)
+subscription = get_cached_subscription(user_id)
 
 if not subscription or str(subscription.get("subscription_status", "")).lower() != "active":
     st.error("❌ You need an active subscription to use ATS SmartMatch.")
@@ -379,7 +379,7 @@ if st.button("Run ATS SmartMatch", key="ats_run"):
         st.error("❌ Not enough credits. Please top up.")
         st.stop()
 
-    ok, msg = deduct_credits(user_id, CREDIT_COST)
+    ok, msg = deduct_credits(user_id, CREDIT_COST, tool=TOOL)
     if not ok:
         st.error(msg)
         st.stop()
@@ -10,7 +10,6 @@ from components.sidebar import render_sidebar
 from components.ui import hide_streamlit_sidebar
 from services.utils import (
     get_subscription,
-    auto_expire_subscription,
     deduct_credits,
     is_low_credit,
 )
@@ -62,7 +61,6 @@ user_id = user.get("id")
 # ---------------------------------------------------------
 # SUBSCRIPTION CHECK
 # ---------------------------------------------------------
-auto_expire_subscription(user_id)
 subscription = get_subscription(user_id)
 
 if not subscription or subscription.get("subscription_status") != "active":
@@ -116,7 +114,7 @@ for a {experience.lower()} candidate applying for the role of {role}.
 Return only the numbered questions.
 """
 
-        questions_text = ai_run(question_prompt)
+        questions_text = ai_run(question_prompt, tool="interview_questions")
 
         # Handle AI failures gracefully
         if questions_text == "__AI_QUOTA_EXCEEDED__":
@@ -138,7 +136,7 @@ Return only the numbered questions.
             st.stop()
 
         # Deduct credits ONLY after successful question generation
-        ok, msg = deduct_credits(user_id, 10)
+        ok, msg = deduct_credits(user_id, 10, tool="interview_iq")
         if not ok:
             st.error(msg)
             st.stop()
@@ -217,7 +215,7 @@ Provide a rewritten example answer.
 """
 
         with st.spinner("Evaluating interview responses…"):
-            result = ai_run(evaluation_prompt)
+            result = ai_run(evaluation_prompt, tool="interview_iq")
 
         # Handle AI failures gracefully (no crash)
         if result == "__AI_QUOTA_EXCEEDED__":
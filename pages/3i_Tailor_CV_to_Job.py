@@ -19,7 +19,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from components.ui import hide_streamlit_sidebar
 from components.sidebar import render_sidebar
 from services.resume_parser import extract_text_from_resume
-from services.utils import get_subscription, auto_expire_subscription, deduct_credits, is_low_credit
+from services.utils import get_subscription, deduct_credits, is_low_credit
 from config.supabase_client import supabase
 
 # Try to use your existing AI engine function if present
@@ -28,6 +28,13 @@ try:
 except Exception:
     ai_tailor_resume_to_job = None
 
+# Combined CV-vs-JD analysis (shared with Match Score / Eligibility / Skills)
+try:
+    from services.ai_engine import ai_cv_jd_section, cv_jd_input_hash
+except Exception:
+    ai_cv_jd_section = None
+    cv_jd_input_hash = None
+
 # Fallback: if your AI engine already has a generic LLM helper, we can use it.
 # (This is optional; if it doesn't exist, we will show a clear error.)
 try:
@@ -91,7 +98,6 @@ if not user_id:
 # ======================================================
 # SUBSCRIPTION CHECK
 # ======================================================
-auto_expire_subscription(user_id)
 subscription = get_subscription(user_id)
 
 if not subscription or str(subscription.get("subscription_status", "")).lower() != "active":
@@ -215,12 +221,18 @@ def run_ai_tailor(resume_text: str, jd_text: str) -> str:
     """
     Calls your AI engine if available.
     Priority:
-    1) ai_tailor_resume_to_job(resume_text, job_description)
-    2) ai_generate(prompt)
+    1) ai_cv_jd_section("tailored_cv", ...) — cached combined analysis
+    2) ai_tailor_resume_to_job(resume_text, job_description)
+    3) ai_generate(prompt)
     """
     r = clean_text(resume_text)
     j = clean_text(jd_text)
 
+    if callable(ai_cv_jd_section):
+        out = clean_text(ai_cv_jd_section("tailored_cv", r, j))
+        if out:
+            return out
+
     # Preferred dedicated function (if you add it to services/ai_engine.py)
     if callable(ai_tailor_resume_to_job):
         out = ai_tailor_resume_to_job(resume_text=r, job_description=j)
@@ -229,7 +241,7 @@ def run_ai_tailor(resume_text: str, jd_text: str) -> str:
     # Fallback generic generator
     if callable(ai_generate):
         prompt = build_prompt(r, j)
-        out = ai_generate(prompt=prompt)
+        out = ai_generate(prompt=prompt, tool="tailor_cv")
         return clean_text(out)
 
     # No AI backend available
@@ -337,7 +349,7 @@ if st.button("🚀 Generate Tailored CV", key="tcj_run"):
         st.error("❌ Not enough credits. Please top up.")
         st.stop()
 
-    ok, msg = deduct_credits(user_id, CREDIT_COST)
+    ok, msg = deduct_credits(user_id, CREDIT_COST, tool=TOOL)
     if not ok:
         st.error(msg)
         st.stop()
@@ -360,6 +372,10 @@ if st.button("🚀 Generate Tailored CV", key="tcj_run"):
                 "input": {
                     "resume_preview": clean_text(resume_text)[:250],
                     "jd_preview": clean_text(job_description)[:250],
+                    "input_hash": (
+                        cv_jd_input_hash(resume_text, job_description)
+                        if callable(cv_jd_input_hash) else None
+                    ),
                 },
                 "output": output,
                 "credits_used": CREDIT_COST,
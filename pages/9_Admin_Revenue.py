@@ -7,6 +7,12 @@ import pandas as pd
 from datetime import datetime
 from config.supabase_client import supabase_admin
 from components.sidebar import render_sidebar
+from services.admin_rollups import (
+    get_rollup_state,
+    fetch_revenue_summary,
+    fetch_plan_totals,
+    refresh_admin_rollups,
+)
 
 # ----------------------------------------------------------
 # AUTH GUARD
@@ -45,38 +51,45 @@ st.caption("Financial overview based on approved payments")
 st.write("---")
 
 # ----------------------------------------------------------
-# LOAD APPROVED PAYMENTS ONLY
+# LOAD DAILY REVENUE ROLLUP (sql/admin_rollups.sql)
+# Falls back to scanning approved payments if not installed.
 # ----------------------------------------------------------
-payments = (
-    supabase_admin
-    .table("subscription_payments")
-    .select("*")
-    .eq("status", "approved")
-    .order("approved_at", desc=True)
-    .execute()
-    .data
-    or []
-)
+rollup_state = get_rollup_state()
+
+if rollup_state:
+    summary = fetch_revenue_summary(rollup_state)
+    df = pd.DataFrame(summary["daily"], columns=["day", "plan", "revenue", "payments"])
+    df = df.rename(columns={"day": "date", "revenue": "amount"})
+    unique_users = summary["paying_users"]
+    total_payments = int(df["payments"].sum()) if not df.empty else 0
+else:
+    payments = (
+        supabase_admin
+        .table("subscription_payments")
+        .select("user_id, plan, amount, approved_at")
+        .eq("status", "approved")
+        .execute()
+        .data
+        or []
+    )
+    df = pd.DataFrame(payments, columns=["user_id", "plan", "amount", "approved_at"])
+    df["date"] = pd.to_datetime(df["approved_at"], errors="coerce").dt.date
+    unique_users = df["user_id"].nunique()
+    total_payments = len(df)
 
-if not payments:
+if df.empty:
     st.info("No approved payments found.")
     st.stop()
 
-df = pd.DataFrame(payments)
-
 # ----------------------------------------------------------
 # NORMALIZE / CLEAN
 # ----------------------------------------------------------
 df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0)
-df["approved_at"] = pd.to_datetime(df["approved_at"], errors="coerce")
-df["date"] = df["approved_at"].dt.date
 
 # ----------------------------------------------------------
 # METRICS
 # ----------------------------------------------------------
 total_revenue = int(df["amount"].sum())
-total_payments = len(df)
-unique_users = df["user_id"].nunique()
 
 col1, col2, col3 = st.columns(3)
 
@@ -137,21 +150,27 @@ st.write("---")
 # ----------------------------------------------------------
 st.subheader("🧩 Active Subscriptions Snapshot")
 
-subs = (
-    supabase_admin
-    .table("subscriptions")
-    .select("plan, credits, subscription_status")
-    .eq("subscription_status", "active")
-    .execute()
-    .data
-    or []
-)
-
-if subs:
-    subs_df = pd.DataFrame(subs)
+if rollup_state:
+    subs_df = pd.DataFrame(
+        fetch_plan_totals(rollup_state, status="active"),
+        columns=["plan", "subscription_status", "subscriptions", "credits"],
+    )
+else:
+    subs_df = pd.DataFrame(
+        supabase_admin
+        .table("subscriptions")
+        .select("plan, credits, subscription_status")
+        .eq("subscription_status", "active")
+        .execute()
+        .data
+        or [],
+        columns=["plan", "credits", "subscription_status"],
+    )
+    subs_df["subscriptions"] = 1
 
-    active_count = len(subs_df)
-    total_credits_issued = int(subs_df["credits"].sum())
+if not subs_df.empty:
+    active_count = int(subs_df["subscriptions"].sum())
+    total_credits_issued = int(pd.to_numeric(subs_df["credits"], errors="coerce").fillna(0).sum())
 
     c1, c2 = st.columns(2)
     with c1:
@@ -181,13 +200,35 @@ display_cols = [
     "payment_reference",
 ]
 
+recent = (
+    supabase_admin
+    .table("subscription_payments")
+    .select(", ".join(display_cols))
+    .eq("status", "approved")
+    .order("approved_at", desc=True)
+    .limit(20)
+    .execute()
+    .data
+    or []
+)
+
 st.dataframe(
-    df[display_cols].head(20),
+    pd.DataFrame(recent, columns=display_cols),
     use_container_width=True
 )
 
 st.caption("All figures reflect approved transactions only.")
 
+if rollup_state:
+    st.caption(f"Rollups folded up to {rollup_state.get('payments_watermark')}; newer payments are added live.")
+    if st.button("🔄 Refresh rollups now", key="refresh_admin_rollups_9"):
+        try:
+            refresh_admin_rollups()
+        except Exception as e:
+            st.error(f"Rollup refresh failed: {e}")
+        else:
+            st.rerun()
+
 # ======================================================
 # FOOTER
 # ======================================================
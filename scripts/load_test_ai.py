@@ -0,0 +1,105 @@
+"""
+Concurrent load / latency test for the AI tool engines.
+
+Run against the local stub (scripts/openai_stub_server.py) or a real key:
+
+    export OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+    python scripts/load_test_ai.py --requests 50 --concurrency 8
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import ai_engine  # noqa: E402
+
+
+SAMPLE_RESUME = """
+Jane Doe — Data Analyst
+Skills: Python, SQL, Excel, Tableau
+Experience: Analyst at Acme Ltd (2021–2024). Built weekly sales dashboards.
+Education: BSc Statistics, University of Lagos
+""".strip()
+
+SAMPLE_JD = """
+Junior Data Analyst — Lagos
+Requirements: SQL, Python, Power BI, stakeholder communication.
+""".strip()
+
+
+def _tools(variant: int):
+    # Vary the resume so cache hits don't hide real latency
+    resume = f"{SAMPLE_RESUME}\nRef: {variant}"
+    return {
+        "match_score": lambda: ai_engine.ai_generate_match_score(resume, SAMPLE_JD),
+        "skills_extraction": lambda: ai_engine.ai_extract_skills(resume),
+        "cover_letter": lambda: ai_engine.ai_generate_cover_letter(resume, SAMPLE_JD),
+        "eligibility_check": lambda: ai_engine.ai_check_eligibility(resume, SAMPLE_JD),
+        "resume_writer": lambda: ai_engine.ai_generate_resume_rewrite(resume),
+        "job_recommendations": lambda: ai_engine.ai_generate_job_recommendations(resume, "Data roles"),
+        "tailor_cv": lambda: ai_engine.ai_tailor_resume_to_job(resume, SAMPLE_JD),
+        "cv_jd_analysis": lambda: ai_engine.ai_analyze_cv_against_jd(resume, SAMPLE_JD),
+        "interview_questions": lambda: ai_engine.ai_run("Generate exactly 5 technical interview questions.", tool="interview_questions"),
+    }
+
+
+def _failed(result) -> bool:
+    # ai_run() returns sentinels and ai_analyze_cv_against_jd() returns {}
+    # instead of raising
+    if not result:
+        return True
+    return isinstance(result, str) and result.startswith("__AI_")
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    try:
+        ok = not _failed(fn())
+    except Exception:
+        ok = False
+    return (time.perf_counter() - started) * 1000, ok
+
+
+def _pct(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(q * (len(values) - 1))))
+    return values[idx]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Load test TalentIQ AI engines")
+    p.add_argument("--requests", type=int, default=20, help="calls per tool")
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--tools", default="", help="comma-separated subset of tools")
+    args = p.parse_args()
+
+    selected = [t.strip() for t in args.tools.split(",") if t.strip()]
+    tool_names = selected or list(_tools(0).keys())
+
+    print(f"Target: {os.environ.get('OPENAI_BASE_URL') or 'api.openai.com'}")
+    print(f"{'tool':<22}{'n':>5}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        for name in tool_names:
+            calls = [_tools(i)[name] for i in range(args.requests)]
+            results = list(pool.map(_timed, calls))
+
+            latencies = [ms for ms, ok in results if ok]
+            errors = sum(1 for _, ok in results if not ok)
+            mean = statistics.mean(latencies) if latencies else 0.0
+
+            print(
+                f"{name:<22}{len(results):>5}{errors:>8}"
+                f"{_pct(latencies, 0.50):>10.0f}{_pct(latencies, 0.95):>10.0f}{mean:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
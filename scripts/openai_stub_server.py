@@ -0,0 +1,352 @@
+"""
+Local OpenAI-compatible stub server (chat completions only).
+
+Lets every AI tool run offline for load / latency testing:
+
+    python scripts/openai_stub_server.py --port 8765 --latency lognormal:600:0.5 --rate-429 0.05
+    export OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+    streamlit run app.py
+
+services/ai_engine.py picks up OPENAI_BASE_URL automatically (no real key needed).
+
+Latency specs (milliseconds):
+    const:200            fixed delay
+    uniform:100:900      uniform between min and max
+    normal:500:150       mean, stddev (clamped at 0)
+    lognormal:600:0.5    median, sigma
+
+Every option can also be set via env: STUB_PORT, STUB_LATENCY, STUB_RATE_429,
+STUB_RATE_500, STUB_RATE_TIMEOUT, STUB_TIMEOUT_SECONDS, STUB_STREAM_CHUNK_MS, STUB_SEED.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+
+class StubConfig:
+    def __init__(self, args):
+        self.latency = parse_latency(args.latency)
+        self.rate_429 = float(args.rate_429)
+        self.rate_500 = float(args.rate_500)
+        self.rate_timeout = float(args.rate_timeout)
+        self.timeout_seconds = float(args.timeout_seconds)
+        self.stream_chunk_ms = float(args.stream_chunk_ms)
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+
+    def random(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+    def sample_latency_ms(self) -> float:
+        kind, params = self.latency
+        with self.lock:
+            if kind == "const":
+                value = params[0]
+            elif kind == "uniform":
+                value = self.rng.uniform(params[0], params[1])
+            elif kind == "normal":
+                value = self.rng.gauss(params[0], params[1])
+            else:  # lognormal: median, sigma
+                value = params[0] * self.rng.lognormvariate(0.0, params[1])
+        return max(0.0, value)
+
+
+def parse_latency(spec: str):
+    parts = (spec or "const:0").split(":")
+    kind = parts[0].strip().lower()
+    params = [float(p) for p in parts[1:]]
+
+    expected = {"const": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+    if kind not in expected or len(params) != expected[kind]:
+        raise ValueError(f"Invalid latency spec: {spec!r}")
+
+    return kind, params
+
+
+# =========================================================
+# CANNED OUTPUTS (deterministic per request)
+# =========================================================
+
+CV_JD_SECTIONS = ("match_score", "eligibility", "skills", "tailored_cv")
+
+
+def _digest(model: str, messages: list) -> str:
+    raw = json.dumps({"model": model, "messages": messages}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _match_score(digest: str) -> str:
+    score = 40 + int(digest[:2], 16) % 56
+    return (
+        f"Match Score: {score}%\n"
+        "Strengths:\n- Relevant experience\n- Strong core skills\n"
+        "Weaknesses:\n- Limited evidence of leadership\n"
+        "Recommendation:\nTailor the CV summary to the role before applying."
+    )
+
+
+def _eligibility(digest: str) -> str:
+    verdict = "Yes" if int(digest[2:4], 16) % 3 else "No"
+    return (
+        f"- Eligibility: {verdict}\n"
+        "- Supporting reasons: Experience and skills broadly align with the JD.\n"
+        "- Missing qualifications: Certification listed as preferred.\n"
+        f"- Final verdict: {'Eligible' if verdict == 'Yes' else 'Not yet eligible'}"
+    )
+
+
+def _skills(_digest_value: str) -> str:
+    return (
+        "Technical Skills:\n- Python\n- SQL\n- Excel\n"
+        "Soft Skills:\n- Communication\n- Teamwork\n"
+        "Industry Skills:\n- Reporting\n"
+        "Missing / Suggested Skills:\n- Power BI\n- Cloud fundamentals"
+    )
+
+
+def _tailored_cv(_digest_value: str) -> str:
+    return (
+        "1) TAILORED CV (ATS FORMAT)\nProfessional Summary\n[stub tailored summary]\n\n"
+        "2) KEYWORD MAP\n- Matched: python, sql\n- Recommended: stakeholder management\n\n"
+        "3) CHANGES SUMMARY\n- Rewrote summary to mirror the JD\n\n"
+        "4) MISSING SKILLS / GAPS\n- Power BI"
+    )
+
+
+def canned_content(model: str, messages: list, response_format: dict | None) -> str:
+    digest = _digest(model, messages)
+    prompt = " ".join(str(m.get("content") or "") for m in messages)
+    lowered = prompt.lower()
+
+    if (response_format or {}).get("type") == "json_object":
+        return json.dumps({
+            "match_score": _match_score(digest),
+            "eligibility": _eligibility(digest),
+            "skills": _skills(digest),
+            "tailored_cv": _tailored_cv(digest),
+        })
+
+    if "match score" in lowered:
+        return _match_score(digest)
+    if "eligibility" in lowered:
+        return _eligibility(digest)
+    if "extract all professional skills" in lowered:
+        return _skills(digest)
+    if "tailor" in lowered:
+        return _tailored_cv(digest)
+    if "interview questions" in lowered:
+        return "\n".join(f"{i}. Stub interview question {i} ({digest[i]})?" for i in range(1, 6))
+    if "cover letter" in lowered:
+        return "Dear Hiring Manager,\n\n[stub cover letter]\n\nSincerely,\nCandidate"
+
+    return f"[stub response {digest[:12]}]"
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text or "") // 4)
+
+
+# =========================================================
+# HTTP HANDLER
+# =========================================================
+
+class StubHandler(BaseHTTPRequestHandler):
+    config: StubConfig = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        if os.environ.get("STUB_QUIET") != "1":
+            super().log_message(fmt, *args)
+
+    # -------------------------
+    # helpers
+    # -------------------------
+    def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, err_type: str, message: str, headers: dict | None = None):
+        self._send_json(
+            status,
+            {"error": {"message": message, "type": err_type, "param": None, "code": err_type}},
+            headers,
+        )
+
+    # -------------------------
+    # routes
+    # -------------------------
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/v1/models", "/models"):
+            self._send_json(200, {
+                "object": "list",
+                "data": [{"id": "stub-model", "object": "model", "owned_by": "stub"}],
+            })
+            return
+        if self.path.rstrip("/") in ("", "/health"):
+            self._send_json(200, {"ok": True})
+            return
+        self._send_error(404, "not_found", f"Unknown path {self.path}")
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self._send_error(404, "not_found", f"Unknown path {self.path}")
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except Exception:
+            self._send_error(400, "invalid_request_error", "Body is not valid JSON.")
+            return
+
+        cfg = self.config
+
+        # ---- error injection ----
+        roll = cfg.random()
+        if roll < cfg.rate_timeout:
+            time.sleep(cfg.timeout_seconds)
+            self.close_connection = True
+            return
+        roll -= cfg.rate_timeout
+        if roll < cfg.rate_429:
+            self._send_error(429, "rate_limit_exceeded", "Stub rate limit.", {"Retry-After": "1"})
+            return
+        roll -= cfg.rate_429
+        if roll < cfg.rate_500:
+            self._send_error(500, "server_error", "Stub server error.")
+            return
+
+        time.sleep(cfg.sample_latency_ms() / 1000.0)
+
+        model = body.get("model") or "stub-model"
+        messages = body.get("messages") or []
+        content = canned_content(model, messages, body.get("response_format"))
+
+        finish_reason = "stop"
+        max_tokens = body.get("max_tokens")
+        if max_tokens and len(content) > int(max_tokens) * 4:
+            content = content[: int(max_tokens) * 4]
+            finish_reason = "length"
+
+        prompt_tokens = sum(_tokens(str(m.get("content") or "")) for m in messages)
+        completion_tokens = _tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+        completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            self._stream(completion_id, created, model, content, usage if include_usage else None, finish_reason)
+            return
+
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason,
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id: str, created: int, model: str, content: str, usage: dict | None, finish_reason: str = "stop"):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta: dict, finish_reason=None, chunk_usage=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+            }
+            if chunk_usage is not None:
+                payload["usage"] = chunk_usage
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        chunk({"role": "assistant", "content": ""})
+
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            chunk({"content": word if i == 0 else " " + word})
+            if self.config.stream_chunk_ms:
+                time.sleep(self.config.stream_chunk_ms / 1000.0)
+
+        chunk({}, finish_reason=finish_reason)
+        if usage is not None:
+            chunk(None, chunk_usage=usage)
+
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+# =========================================================
+# ENTRYPOINT
+# =========================================================
+
+def build_server(args) -> ThreadingHTTPServer:
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": StubConfig(args)})
+    return ThreadingHTTPServer((args.host, int(args.port)), handler)
+
+
+def parse_args(argv=None):
+    env = os.environ.get
+    p = argparse.ArgumentParser(description="OpenAI-compatible chat completions stub")
+    p.add_argument("--host", default=env("STUB_HOST", "127.0.0.1"))
+    p.add_argument("--port", type=int, default=int(env("STUB_PORT", "8765")))
+    p.add_argument("--latency", default=env("STUB_LATENCY", "const:0"))
+    p.add_argument("--rate-429", type=float, default=float(env("STUB_RATE_429", "0")))
+    p.add_argument("--rate-500", type=float, default=float(env("STUB_RATE_500", "0")))
+    p.add_argument("--rate-timeout", type=float, default=float(env("STUB_RATE_TIMEOUT", "0")))
+    p.add_argument("--timeout-seconds", type=float, default=float(env("STUB_TIMEOUT_SECONDS", "120")))
+    p.add_argument("--stream-chunk-ms", type=float, default=float(env("STUB_STREAM_CHUNK_MS", "0")))
+    p.add_argument("--seed", type=int, default=int(env("STUB_SEED", "42")))
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = build_server(args)
+    print(f"OpenAI stub listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,194 @@
 import json
+import os
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime, timezone
 
+# ------------------------------------------------------------
+# Buffered security event logger
+# - log_event() only enqueues (no network on the request path)
+# - background flusher bulk-inserts on batch size or interval
+# - DB down → batch spilled to a local JSONL file, replayed later
+# - rolling per-minute counters by event_type / severity for the monitor
+# ------------------------------------------------------------
+
+QUEUE_MAX = int(os.getenv("SECURITY_LOG_QUEUE_MAX", "10000") or 10000)
+BATCH_SIZE = int(os.getenv("SECURITY_LOG_BATCH_SIZE", "200") or 200)
+FLUSH_INTERVAL_SECONDS = float(os.getenv("SECURITY_LOG_FLUSH_SECONDS", "2") or 2)
+SPILL_PATH = os.getenv("SECURITY_LOG_SPILL_PATH", "").strip() or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "security_events_spill.jsonl"
+)
+COUNTER_WINDOW_MINUTES = 24 * 60
+RECENT_EVENTS_MAX = 500
+
+
+class SecurityEventBuffer:
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=QUEUE_MAX)
+        self._client = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+
+        # minute -> {(event_type, severity): count}
+        self._counter_lock = threading.Lock()
+        self._counters = {}
+        self._recent = deque(maxlen=RECENT_EVENTS_MAX)
+        self.dropped = 0
+
+    # -------------------------
+    # producer side (request path)
+    # -------------------------
+    def put(self, client, payload: dict) -> None:
+        if client is not None:
+            self._client = client
+
+        self._count(payload)
+
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            # bounded: never block a user action on logging
+            self.dropped += 1
+
+        self._ensure_started()
+
+    def _count(self, payload: dict) -> None:
+        minute = int(time.time() // 60)
+        key = (payload.get("event_type"), payload.get("severity"))
+        with self._counter_lock:
+            bucket = self._counters.setdefault(minute, {})
+            bucket[key] = bucket.get(key, 0) + 1
+            self._recent.appendleft(payload)
+
+            if len(self._counters) > COUNTER_WINDOW_MINUTES:
+                cutoff = minute - COUNTER_WINDOW_MINUTES
+                for m in [m for m in self._counters if m <= cutoff]:
+                    del self._counters[m]
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="talentiq-security-log", daemon=True
+                )
+                self._thread.start()
+
+    # -------------------------
+    # consumer side (background)
+    # -------------------------
+    def _drain(self, first=None) -> list:
+        batch = [] if first is None else [first]
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, rows: list) -> bool:
+        if not rows or self._client is None:
+            return False
+        try:
+            self._client.table("security_events").insert(rows).execute()
+            return True
+        except Exception:
+            return False
+
+    def _spill(self, rows: list) -> None:
+        try:
+            os.makedirs(os.path.dirname(SPILL_PATH) or ".", exist_ok=True)
+            with self._spill_lock, open(SPILL_PATH, "a", encoding="utf-8") as f:
+                for r in rows:
+                    f.write(json.dumps(r, default=str) + "\n")
+        except Exception:
+            # logging must never break the app
+            pass
+
+    def _replay_spill(self) -> None:
+        if not os.path.exists(SPILL_PATH):
+            return
+        try:
+            with self._spill_lock:
+                tmp = SPILL_PATH + ".replay"
+                os.replace(SPILL_PATH, tmp)
+            with open(tmp, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            os.remove(tmp)
+        except Exception:
+            return
+
+        for i in range(0, len(rows), BATCH_SIZE):
+            chunk = rows[i:i + BATCH_SIZE]
+            if not self._insert(chunk):
+                self._spill(rows[i:])
+                return
+
+    def flush(self) -> int:
+        """Flush everything queued right now. Returns rows written to the DB."""
+        written = 0
+        while True:
+            batch = self._drain()
+            if not batch:
+                return written
+            if self._insert(batch):
+                written += len(batch)
+            else:
+                self._spill(batch)
+
+    def _loop(self) -> None:
+        last_replay = 0.0
+        while True:
+            try:
+                first = self._queue.get(timeout=FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                first = None
+
+            if first is not None:
+                # give a burst a moment to fill the batch
+                if self._queue.qsize() < BATCH_SIZE:
+                    time.sleep(min(0.25, FLUSH_INTERVAL_SECONDS))
+                batch = self._drain(first)
+                if self._insert(batch):
+                    if time.time() - last_replay > 60:
+                        last_replay = time.time()
+                        self._replay_spill()
+                else:
+                    self._spill(batch)
+
+    # -------------------------
+    # monitor reads (no DB)
+    # -------------------------
+    def summary(self, hours: int = 24) -> list:
+        """[{event_type, severity, count}] over the last `hours`, largest first."""
+        cutoff = int(time.time() // 60) - int(hours) * 60
+        totals = {}
+        with self._counter_lock:
+            for minute, bucket in self._counters.items():
+                if minute <= cutoff:
+                    continue
+                for key, n in bucket.items():
+                    totals[key] = totals.get(key, 0) + n
+
+        out = [
+            {"event_type": k[0], "severity": k[1], "count": n}
+            for k, n in totals.items()
+        ]
+        return sorted(out, key=lambda r: r["count"], reverse=True)
+
+    def recent(self, limit: int = 100) -> list:
+        with self._counter_lock:
+            return list(self._recent)[: int(limit)]
+
+
+_buffer = SecurityEventBuffer()
+
+
 def log_event(supabase_admin, user: dict | None, event_type: str, severity: str = "info", **metadata):
     try:
         payload = {
@@ -9,8 +197,21 @@ def log_event(supabase_admin, user: dict | None, event_type: str, severity: str
             "event_type": event_type,
             "severity": severity,
             "metadata": metadata or {},
+            "created_at": datetime.now(timezone.utc).isoformat(),
         }
-        supabase_admin.table("security_events").insert(payload).execute()
+        _buffer.put(supabase_admin, payload)
     except Exception:
         # logging must never break the app
-        pass
\ No newline at end of file
+        pass
+
+
+def flush_events() -> int:
+    return _buffer.flush()
+
+
+def event_summary(hours: int = 24) -> list:
+    return _buffer.summary(hours)
+
+
+def recent_events(limit: int = 100) -> list:
+    return _buffer.recent(limit)
@@ -1,27 +1,202 @@
-from datetime import datetime, timezone, timedelta
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+# ------------------------------------------------------------
+# Sliding-window-counter rate limiter
+# - O(1) in-process check (two fixed windows, weighted)
+# - optional shared SQLite tier for several replicas on one host:
+#     RATE_LIMIT_SQLITE_PATH=/var/lib/talentiq/ratelimit.db
+# - counts flushed to security_rate_limits in the background (aggregated)
+# ------------------------------------------------------------
+
+FLUSH_INTERVAL_SECONDS = int(os.getenv("RATE_LIMIT_FLUSH_SECONDS", "30") or 30)
+SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "").strip()
+
+
+class SlidingWindowLimiter:
+    """
+    Approximate sliding window: estimate = prev * (1 - elapsed/window) + curr.
+    Memory is two counters per active key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (key, window_seconds) -> [window_index, curr_count, prev_count]
+        self._buckets = {}
+
+    def hit(self, key: str, limit: int, window_seconds: int, now: float | None = None) -> bool:
+        """Count one attempt. Returns True if the key is over the limit (attempt not counted)."""
+        now = time.time() if now is None else now
+        idx = int(now // window_seconds)
+        weight = 1.0 - (now - idx * window_seconds) / window_seconds
+
+        with self._lock:
+            bucket = self._buckets.get((key, window_seconds))
+
+            if bucket is None:
+                bucket = [idx, 0, 0]
+                self._buckets[(key, window_seconds)] = bucket
+            elif bucket[0] != idx:
+                # roll forward; anything older than one window drops out
+                bucket[2] = bucket[1] if bucket[0] == idx - 1 else 0
+                bucket[1] = 0
+                bucket[0] = idx
+
+            if bucket[2] * weight + bucket[1] >= limit:
+                return True
+
+            bucket[1] += 1
+            return False
+
+    def prune(self, now: float | None = None) -> None:
+        """Drop keys with no hits in the last two windows."""
+        now = time.time() if now is None else now
+        with self._lock:
+            stale = [
+                k for k, (idx, _, _) in self._buckets.items()
+                if idx < int(now // k[1]) - 1
+            ]
+            for k in stale:
+                del self._buckets[k]
+
+
+class SQLiteWindowLimiter:
+    """Same algorithm, state shared through one SQLite file (WAL)."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_windows ("
+            " key TEXT NOT NULL, window_seconds INTEGER NOT NULL,"
+            " window_index INTEGER NOT NULL, count INTEGER NOT NULL,"
+            " PRIMARY KEY (key, window_seconds, window_index))"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, limit: int, window_seconds: int, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        idx = int(now // window_seconds)
+        weight = 1.0 - (now - idx * window_seconds) / window_seconds
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = dict(conn.execute(
+                "SELECT window_index, count FROM rate_windows"
+                " WHERE key = ? AND window_seconds = ? AND window_index IN (?, ?)",
+                (key, window_seconds, idx, idx - 1),
+            ).fetchall())
+
+            if rows.get(idx - 1, 0) * weight + rows.get(idx, 0) >= limit:
+                conn.execute("COMMIT")
+                return True
+
+            conn.execute(
+                "INSERT INTO rate_windows (key, window_seconds, window_index, count) VALUES (?, ?, ?, 1)"
+                " ON CONFLICT (key, window_seconds, window_index) DO UPDATE SET count = count + 1",
+                (key, window_seconds, idx),
+            )
+            conn.execute("COMMIT")
+            return False
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def prune(self, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        conn = self._conn()
+        conn.execute(
+            "DELETE FROM rate_windows WHERE window_index < CAST(? / window_seconds AS INTEGER) - 1",
+            (now,),
+        )
+
+
+# ------------------------------------------------------------
+# Async flush of aggregated counts to security_rate_limits
+# ------------------------------------------------------------
+
+class _RateLimitFlusher:
+
+    def __init__(self, interval_seconds: int):
+        self._interval = max(1, int(interval_seconds))
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)
+        self._client = None
+        self._thread = None
+
+    def add(self, client, key: str) -> None:
+        with self._lock:
+            self._pending[key] += 1
+            if client is not None:
+                self._client = client
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="talentiq-rate-limit-flush", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            client = self._client
+
+        if not pending or client is None:
+            return 0
+
+        rows = [{"key": k, "count": n} for k, n in pending.items()]
+        try:
+            client.table("security_rate_limits").insert(rows).execute()
+        except Exception:
+            # audit trail only; the limiter itself never depends on the DB
+            pass
+        return len(rows)
+
+    def _loop(self) -> None:
+        while True:
+            time.sleep(self._interval)
+            self.flush()
+            try:
+                _limiter.prune()
+            except Exception:
+                pass
+
+
+def _build_limiter():
+    if SQLITE_PATH:
+        try:
+            return SQLiteWindowLimiter(SQLITE_PATH)
+        except Exception:
+            pass
+    return SlidingWindowLimiter()
+
+
+_limiter = _build_limiter()
+_flusher = _RateLimitFlusher(FLUSH_INTERVAL_SECONDS)
+
 
 def rate_limited(supabase_admin, key: str, limit: int = 8, window_minutes: int = 15) -> bool:
     """
     Returns True if the key exceeded limit within the window.
+    supabase_admin is only used for the background audit flush.
     """
     try:
-        window_start = (datetime.now(timezone.utc) - timedelta(minutes=window_minutes)).isoformat()
-
-        recent = (
-            supabase_admin.table("security_rate_limits")
-            .select("id,count,created_at")
-            .eq("key", key)
-            .gte("created_at", window_start)
-            .execute()
-            .data
-            or []
-        )
-        total = sum(int(r.get("count") or 0) for r in recent)
-        if total >= limit:
-            return True
-
-        supabase_admin.table("security_rate_limits").insert({"key": key, "count": 1}).execute()
-        return False
+        limited = _limiter.hit(key, int(limit), int(window_minutes) * 60)
+        if not limited:
+            _flusher.add(supabase_admin, key)
+        return limited
     except Exception:
-        # fail-open to avoid blocking legit users if DB hiccups
-        return False
\ No newline at end of file
+        # fail-open to avoid blocking legit users if the limiter store hiccups
+        return False
@@ -1,9 +1,31 @@
 from datetime import datetime, timezone, timedelta
 
+import streamlit as st
+
+from config.supabase_client import supabase_admin
+from security import event_summary, recent_events
+
+# Rolling counters kept by the in-process logger (no DB round-trip)
+summary = event_summary(hours=24)
+if summary:
+    st.dataframe(summary, use_container_width=True)
+
+
+def _event_key(e: dict):
+    """Buffered events have no DB id yet: match them on timestamp + type + actor."""
+    try:
+        ts = datetime.fromisoformat(str(e.get("created_at")).replace("Z", "+00:00"))
+    except ValueError:
+        ts = e.get("created_at")
+    return ts, e.get("event_type"), e.get("actor_email")
+
+
+# Persisted history from every process, plus this process's events the
+# background flusher has not written yet
 since = (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat()
-events = (
+stored = (
     supabase_admin.table("security_events")
-    .select("created_at,event_type,severity,actor_email,metadata")
+    .select("id,created_at,event_type,severity,actor_email,metadata")
     .gte("created_at", since)
     .order("created_at", desc=True)
     .limit(500)
@@ -12,4 +34,9 @@ events = (
     or []
 )
 
-st.dataframe(events, use_container_width=True)
\ No newline at end of file
+events = list({e.get("id"): e for e in stored}.values())
+seen = {_event_key(e) for e in events}
+events += [e for e in recent_events(limit=100) if _event_key(e) not in seen]
+events.sort(key=lambda e: str(e.get("created_at") or ""), reverse=True)
+
+st.dataframe(events, use_container_width=True)
@@ -0,0 +1,175 @@
+# ==========================================================
+# services/admin_rollups.py — Revenue + credit rollups for admin pages
+# Tables / RPC: sql/admin_rollups.sql
+#
+# Reads = small rollup tables + the rows changed since the last
+# refresh (the watermark tail), merged here. Cost tracks the number of
+# days / plans and the tail, not total payment history.
+# ==========================================================
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from config.supabase_client import supabase_admin
+from services.query_batching import fetch_in
+
+
+def _rows(res):
+    data = getattr(res, "data", None)
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return [data]
+    return []
+
+
+def _day(value) -> str | None:
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc).date().isoformat()
+    except Exception:
+        return str(value)[:10]
+
+
+# ==========================================================
+# REFRESH (pg_cron normally; pages expose a manual button)
+# ==========================================================
+def refresh_admin_rollups() -> dict:
+    rows = _rows(supabase_admin.rpc("refresh_admin_rollups", {}).execute())
+    return rows[0] if rows else {}
+
+
+def get_rollup_state() -> dict | None:
+    """Watermarks, or None if sql/admin_rollups.sql is not applied."""
+    try:
+        rows = _rows(
+            supabase_admin.table("admin_rollup_state")
+            .select("payments_watermark, subscriptions_watermark, updated_at")
+            .eq("id", 1)
+            .limit(1)
+            .execute()
+        )
+        return rows[0] if rows else None
+    except Exception:
+        return None
+
+
+# ==========================================================
+# REVENUE
+# ==========================================================
+def fetch_revenue_summary(state: dict) -> dict:
+    """
+    {
+      "daily": [{day, plan, revenue, payments}],   rollup + tail
+      "paying_users": int,
+    }
+    """
+    daily = _rows(
+        supabase_admin.table("revenue_daily")
+        .select("day, plan, revenue, payments")
+        .order("day", desc=False)
+        .execute()
+    )
+
+    tail = _rows(
+        supabase_admin.table("subscription_payments")
+        .select("user_id, plan, amount, approved_at")
+        .eq("status", "approved")
+        .gt("approved_at", state.get("payments_watermark"))
+        .execute()
+    )
+
+    merged = defaultdict(lambda: {"revenue": 0, "payments": 0})
+    for r in daily:
+        m = merged[(str(r.get("day")), r.get("plan") or "")]
+        m["revenue"] += int(r.get("revenue") or 0)
+        m["payments"] += int(r.get("payments") or 0)
+
+    for p in tail:
+        m = merged[(_day(p.get("approved_at")), p.get("plan") or "")]
+        m["revenue"] += int(float(p.get("amount") or 0))
+        m["payments"] += 1
+
+    payers = (
+        supabase_admin.table("revenue_payers")
+        .select("user_id", count="exact")
+        .limit(1)
+        .execute()
+    )
+    paying_users = int(getattr(payers, "count", None) or 0)
+
+    tail_users = list({p.get("user_id") for p in tail if p.get("user_id")})
+    if tail_users:
+        known = fetch_in(supabase_admin, "revenue_payers", "user_id", tail_users, select="user_id")
+        paying_users += len(set(tail_users) - {k.get("user_id") for k in known})
+
+    return {
+        "daily": [
+            {"day": day, "plan": plan, **v}
+            for (day, plan), v in sorted(merged.items())
+        ],
+        "paying_users": paying_users,
+    }
+
+
+# ==========================================================
+# SUBSCRIPTIONS / CREDITS BY PLAN
+# ==========================================================
+def fetch_plan_totals(state: dict, status: str | None = "active") -> list[dict]:
+    """
+    [{plan, subscription_status, subscriptions, credits}] — rollup with
+    subscriptions changed since the watermark applied as old → new deltas.
+    """
+    totals = defaultdict(lambda: {"subscriptions": 0, "credits": 0})
+
+    for r in _rows(
+        supabase_admin.table("subscription_plan_totals")
+        .select("plan, subscription_status, subscriptions, credits")
+        .execute()
+    ):
+        t = totals[(r.get("plan") or "", r.get("subscription_status") or "")]
+        t["subscriptions"] += int(r.get("subscriptions") or 0)
+        t["credits"] += int(r.get("credits") or 0)
+
+    changed = _rows(
+        supabase_admin.table("subscriptions")
+        .select("user_id, plan, subscription_status, credits")
+        .gt("updated_at", state.get("subscriptions_watermark"))
+        .execute()
+    )
+
+    if changed:
+        ids = [c.get("user_id") for c in changed if c.get("user_id")]
+        previous = fetch_in(
+            supabase_admin,
+            "subscription_rollup_rows",
+            "user_id",
+            ids,
+            select="user_id, plan, subscription_status, credits",
+        )
+
+        for old in previous:
+            t = totals[(old.get("plan") or "", old.get("subscription_status") or "")]
+            t["subscriptions"] -= 1
+            t["credits"] -= int(old.get("credits") or 0)
+
+        for new in changed:
+            t = totals[(new.get("plan") or "", (new.get("subscription_status") or "").lower())]
+            t["subscriptions"] += 1
+            t["credits"] += int(new.get("credits") or 0)
+
+    out = [
+        {"plan": plan, "subscription_status": st_, **v}
+        for (plan, st_), v in totals.items()
+        if v["subscriptions"] or v["credits"]
+    ]
+    if status:
+        out = [r for r in out if r["subscription_status"] == status]
+
+    return sorted(out, key=lambda r: r["credits"], reverse=True)
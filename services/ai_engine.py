@@ -3,46 +3,206 @@
 # ==============================================================
 
 import os
+import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from typing import List, Dict, Any
 
 from openai import OpenAI
 from openai import RateLimitError, APIError, APITimeoutError
 
+from services.ai_metrics import record_ai_call
+
 
 # --------------------------------------------------------------
 # OpenAI Client (single instance)
 # --------------------------------------------------------------
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OPENAI_BASE_URL points the client at any OpenAI-compatible server
+# (e.g. scripts/openai_stub_server.py for offline load tests).
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "").strip() or None
+
+client = OpenAI(
+    api_key=os.getenv("OPENAI_API_KEY") or ("stub-key" if OPENAI_BASE_URL else None),
+    base_url=OPENAI_BASE_URL,
+)
 
 DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini").strip() or "gpt-4o-mini"
 
+# Fastest model for small prompts (defaults to DEFAULT_MODEL if unset)
+FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "").strip() or DEFAULT_MODEL
+
+# Used once when the primary model is rate-limited (unset = no fallback)
+FALLBACK_MODEL = os.getenv("OPENAI_FALLBACK_MODEL", "").strip()
+
+# Prompts below this many (estimated) tokens may use FAST_MODEL
+SMALL_PROMPT_TOKENS = int(os.getenv("AI_SMALL_PROMPT_TOKENS", "1500") or 1500)
+
+
+# --------------------------------------------------------------
+# Model Router (per-tool model / max_tokens / temperature)
+# --------------------------------------------------------------
+# allow_fast: short tasks may drop to FAST_MODEL when the prompt is small.
+# Long rewrites keep the primary model regardless of prompt size.
+# Per-tool env override: AI_ROUTE_<TOOL>_MODEL / _MAX_TOKENS / _TEMPERATURE
+# (e.g. AI_ROUTE_TAILOR_CV_MODEL=gpt-4o).
+AI_ROUTES: Dict[str, Dict[str, Any]] = {
+    "default":             {"model": DEFAULT_MODEL, "max_tokens": 1800, "temperature": 0.2, "allow_fast": False},
+    "generic":             {"model": DEFAULT_MODEL, "max_tokens": 1800, "temperature": 0.4, "allow_fast": False},
+    "match_score":         {"model": DEFAULT_MODEL, "max_tokens": 700,  "temperature": 0.2, "allow_fast": True},
+    "skills_extraction":   {"model": DEFAULT_MODEL, "max_tokens": 800,  "temperature": 0.2, "allow_fast": True},
+    "eligibility_check":   {"model": DEFAULT_MODEL, "max_tokens": 700,  "temperature": 0.2, "allow_fast": True},
+    "job_recommendations": {"model": DEFAULT_MODEL, "max_tokens": 900,  "temperature": 0.3, "allow_fast": True},
+    "interview_questions": {"model": DEFAULT_MODEL, "max_tokens": 500,  "temperature": 0.4, "allow_fast": True},
+    "interview_iq":        {"model": DEFAULT_MODEL, "max_tokens": 1500, "temperature": 0.4, "allow_fast": False},
+    "cover_letter":        {"model": DEFAULT_MODEL, "max_tokens": 1200, "temperature": 0.4, "allow_fast": False},
+    "resume_writer":       {"model": DEFAULT_MODEL, "max_tokens": 2500, "temperature": 0.2, "allow_fast": False},
+    "tailor_cv":           {"model": DEFAULT_MODEL, "max_tokens": 3000, "temperature": 0.2, "allow_fast": False},
+    "cv_jd_analysis":      {"model": DEFAULT_MODEL, "max_tokens": 2000, "temperature": 0.2, "allow_fast": False},
+}
+
+
+def _estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    # ~4 chars per token is close enough for routing decisions
+    return sum(len(m.get("content") or "") for m in messages) // 4
+
+
+def _env_route_override(tool: str) -> Dict[str, Any]:
+    prefix = f"AI_ROUTE_{tool.upper()}_"
+    out: Dict[str, Any] = {}
+
+    model = os.getenv(prefix + "MODEL", "").strip()
+    if model:
+        out["model"] = model
+
+    try:
+        max_tokens = os.getenv(prefix + "MAX_TOKENS", "").strip()
+        if max_tokens:
+            out["max_tokens"] = int(max_tokens)
+    except ValueError:
+        pass
+
+    try:
+        temperature = os.getenv(prefix + "TEMPERATURE", "").strip()
+        if temperature:
+            out["temperature"] = float(temperature)
+    except ValueError:
+        pass
+
+    return out
+
+
+def resolve_route(tool: str | None, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Pick model / max_tokens / temperature for a tool.
+    Env overrides win; otherwise small prompts on short tasks use FAST_MODEL.
+    """
+    name = (tool or "default").strip().lower() or "default"
+    route = dict(AI_ROUTES.get(name) or AI_ROUTES["default"])
+
+    override = _env_route_override(name)
+
+    if "model" not in override and route.get("allow_fast"):
+        if _estimate_tokens(messages) <= SMALL_PROMPT_TOKENS:
+            route["model"] = FAST_MODEL
+
+    route.update(override)
+    route["tool"] = name
+    return route
+
 
 # --------------------------------------------------------------
 # Core LLM Caller (shared)
 # --------------------------------------------------------------
-def _call_llm(
+def _call_llm_result(
     messages: List[Dict[str, str]],
-    temperature: float = 0.2,
-    max_tokens: int = 1800,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
     model: str | None = None,
-) -> str:
+    response_format: Dict[str, str] | None = None,
+    tool: str | None = None,
+) -> tuple:
     """
-    Unified LLM call.
+    Unified LLM call. Returns (text, finish_reason); finish_reason is
+    "length" when the reply hit max_tokens.
+    Settings come from the tool's route; explicit arguments win.
+    Retries once on FALLBACK_MODEL if the primary model is rate-limited.
+    Tokens, latency and model are recorded to ai_call_metrics.
     Raises exceptions to be handled by wrapper functions.
     """
-    use_model = (model or DEFAULT_MODEL).strip() or DEFAULT_MODEL
+    route = resolve_route(tool, messages)
+
+    use_model = (model or route["model"] or DEFAULT_MODEL).strip() or DEFAULT_MODEL
+
+    kwargs: Dict[str, Any] = {
+        "messages": messages,
+        "temperature": route["temperature"] if temperature is None else temperature,
+        "max_tokens": route["max_tokens"] if max_tokens is None else max_tokens,
+    }
+    if response_format:
+        kwargs["response_format"] = response_format
+
+    started = time.perf_counter()
+    fallback_used = False
+
+    try:
+        try:
+            resp = client.chat.completions.create(model=use_model, **kwargs)
+        except RateLimitError:
+            if not FALLBACK_MODEL or FALLBACK_MODEL == use_model:
+                raise
+            fallback_used = True
+            use_model = FALLBACK_MODEL
+            resp = client.chat.completions.create(model=use_model, **kwargs)
+    except Exception as e:
+        record_ai_call(
+            tool=route["tool"],
+            model=use_model,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            fallback_used=fallback_used,
+            status=type(e).__name__,
+        )
+        raise
+
+    choice = resp.choices[0]
+    finish_reason = getattr(choice, "finish_reason", None)
+
+    # "truncated" rows on the AI metrics page flag routes whose
+    # max_tokens is too low for real outputs
+    record_ai_call(
+        tool=route["tool"],
+        model=getattr(resp, "model", None) or use_model,
+        latency_ms=(time.perf_counter() - started) * 1000,
+        usage=getattr(resp, "usage", None),
+        fallback_used=fallback_used,
+        status="truncated" if finish_reason == "length" else "ok",
+    )
+
+    return (choice.message.content or "").strip(), finish_reason
 
-    resp = client.chat.completions.create(
-        model=use_model,
-        messages=messages,
+
+def _call_llm(
+    messages: List[Dict[str, str]],
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    model: str | None = None,
+    response_format: Dict[str, str] | None = None,
+    tool: str | None = None,
+) -> str:
+    """Text-only wrapper around _call_llm_result()."""
+    text, _ = _call_llm_result(
+        messages,
         temperature=temperature,
         max_tokens=max_tokens,
+        model=model,
+        response_format=response_format,
+        tool=tool,
     )
-
-    return (resp.choices[0].message.content or "").strip()
+    return text
 
 
-def run_ai(prompt: str) -> str:
+def run_ai(prompt: str, tool: str | None = None) -> str:
     """
     Simple text AI request used by older tools (kept for backward compatibility).
     NOTE: This version will raise if OpenAI fails. Use ai_run() for safe sentinel behavior.
@@ -53,8 +213,7 @@ def run_ai(prompt: str) -> str:
 
     return _call_llm(
         messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-        max_tokens=1800,
+        tool=tool,
     )
 
 
@@ -62,7 +221,7 @@ def run_ai(prompt: str) -> str:
 # INTERVIEWIQ — SAFE GENERIC AI RUNNER (returns sentinels on error)
 # ==============================================================
 
-def ai_run(prompt: str) -> str:
+def ai_run(prompt: str, tool: str = "generic") -> str:
     """
     Generic AI execution function for non-task-specific prompts
     (e.g. InterviewIQ, Career Coaching, Q&A).
@@ -82,8 +241,7 @@ def ai_run(prompt: str) -> str:
                 {"role": "system", "content": "You are a professional career intelligence AI."},
                 {"role": "user", "content": prompt},
             ],
-            temperature=0.4,
-            max_tokens=1800,
+            tool=tool,
         )
 
     except RateLimitError:
@@ -128,7 +286,7 @@ Weaknesses:
 Recommendation:
 ...
 """
-    return run_ai(prompt)
+    return run_ai(prompt, tool="match_score")
 
 
 # ==============================================================
@@ -147,7 +305,7 @@ Extract all professional skills from the resume and group them under:
 RESUME:
 {resume_text}
 """
-    return run_ai(prompt)
+    return run_ai(prompt, tool="skills_extraction")
 
 
 # ==============================================================
@@ -167,7 +325,7 @@ JOB DESCRIPTION:
 FORMAT:
 A highly professional paragraph-style cover letter.
 """
-    return run_ai(prompt)
+    return run_ai(prompt, tool="cover_letter")
 
 
 # ==============================================================
@@ -191,7 +349,7 @@ RESUME:
 JOB DESCRIPTION:
 {job_description}
 """
-    return run_ai(prompt)
+    return run_ai(prompt, tool="eligibility_check")
 
 
 # ==============================================================
@@ -212,7 +370,7 @@ RESUME:
 FORMAT:
 Return the fully rewritten resume.
 """
-    return run_ai(prompt)
+    return run_ai(prompt, tool="resume_writer")
 
 
 # ==============================================================
@@ -234,19 +392,19 @@ FORMAT:
 - Why they fit
 - Additional skills to acquire
 """
-    return run_ai(prompt)
+    return run_ai(prompt, tool="job_recommendations")
 
 
 # ==========================================================
 # GENERIC AI GENERATOR + Tailor CV to Job (kept)
 # ==========================================================
 
-def ai_generate(prompt: str) -> str:
+def ai_generate(prompt: str, tool: str = "generic") -> str:
     """
     Generic text generator used by tools that supply a full prompt.
     Uses safe ai_run so quota errors don't crash pages.
     """
-    return ai_run(prompt)
+    return ai_run(prompt, tool=tool)
 
 
 def ai_tailor_resume_to_job(resume_text: str, job_description: str) -> str:
@@ -301,4 +459,182 @@ CANDIDATE CV:
 \"\"\"{resume_text}\"\"\"
 """.strip()
 
-    return ai_run(prompt)
\ No newline at end of file
+    out = ai_run(prompt, tool="tailor_cv")
+
+    # Tailor CV page reads this back via ai_cv_jd_section("tailored_cv")
+    if out and not out.startswith("__AI_"):
+        _store_cv_jd_analysis(resume_text, job_description, {"tailored_cv": _clean(out)})
+
+    return out
+
+
+# ==============================================================
+# 7️⃣ COMBINED CV vs JD ANALYSIS (one call, cached per input hash)
+# ==============================================================
+# Match Score, Eligibility, Skills Extraction and Tailor CV all send
+# the same resume + JD. One structured call returns the short sections
+# and the pages read their slice from the cache below. The tailored CV
+# is long enough to truncate that JSON, so it comes from its own
+# tailor_cv call and is cached next to them.
+
+CV_JD_SECTIONS = ("match_score", "eligibility", "skills", "tailored_cv")
+CV_JD_COMBINED_SECTIONS = ("match_score", "eligibility", "skills")
+
+_CV_JD_CACHE_MAX = 128
+_cv_jd_cache: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+_cv_jd_by_resume: Dict[str, str] = {}
+_cv_jd_lock = threading.Lock()
+
+
+def _clean(text: str) -> str:
+    return (text or "").replace("\x00", "").strip()
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(_clean(text).encode("utf-8")).hexdigest()
+
+
+def cv_jd_input_hash(resume_text: str, job_description: str) -> str:
+    """Stable hash of the (resume, JD) pair used as the cache key."""
+    return hashlib.sha256(
+        f"{_sha(resume_text)}:{_sha(job_description)}".encode("utf-8")
+    ).hexdigest()
+
+
+def get_cached_cv_jd_analysis(resume_text: str, job_description: str | None = None) -> Dict[str, str] | None:
+    """
+    Return a cached combined analysis, or None.
+    When job_description is None, the latest analysis for this resume is
+    returned (used by Skills Extraction, which has no JD input).
+    """
+    with _cv_jd_lock:
+        if job_description is None:
+            key = _cv_jd_by_resume.get(_sha(resume_text))
+        else:
+            key = cv_jd_input_hash(resume_text, job_description)
+
+        if not key or key not in _cv_jd_cache:
+            return None
+
+        _cv_jd_cache.move_to_end(key)
+        return dict(_cv_jd_cache[key])
+
+
+def _store_cv_jd_analysis(resume_text: str, job_description: str, analysis: Dict[str, str]) -> None:
+    key = cv_jd_input_hash(resume_text, job_description)
+    with _cv_jd_lock:
+        _cv_jd_cache[key] = {**_cv_jd_cache.get(key, {}), **analysis}
+        _cv_jd_cache.move_to_end(key)
+        _cv_jd_by_resume[_sha(resume_text)] = key
+
+        while len(_cv_jd_cache) > _CV_JD_CACHE_MAX:
+            old_key, _ = _cv_jd_cache.popitem(last=False)
+            for r_hash, k in list(_cv_jd_by_resume.items()):
+                if k == old_key:
+                    del _cv_jd_by_resume[r_hash]
+
+
+def ai_analyze_cv_against_jd(resume_text: str, job_description: str) -> Dict[str, str]:
+    """
+    Single structured call covering Match Score, Eligibility and Skills.
+    Returns the cached sections for this pair (CV_JD_SECTIONS keys,
+    markdown values); sections that failed to parse are missing, and
+    {} on failure, so callers can fall back to the per-tool engines.
+    """
+    resume_text = _clean(resume_text)
+    job_description = _clean(job_description)
+
+    if not resume_text or not job_description:
+        return {}
+
+    cached = get_cached_cv_jd_analysis(resume_text, job_description) or {}
+    if all(s in cached for s in CV_JD_COMBINED_SECTIONS):
+        record_ai_call(tool="cv_jd_analysis", model=None, latency_ms=0, cache_hit=True)
+        return cached
+
+    prompt = f"""
+You are an expert recruiter, eligibility assessor and ATS optimization specialist.
+
+Compare the candidate's CV to the Job Description and return ONE JSON object
+with exactly these string keys (each value is Markdown):
+
+"match_score":
+Match Score: XX%
+Strengths:
+- ...
+Weaknesses:
+- ...
+Recommendation:
+...
+
+"eligibility":
+- Eligibility: Yes or No
+- Supporting reasons
+- Missing qualifications
+- Final verdict
+
+"skills":
+Professional skills from the CV grouped under
+- Technical Skills
+- Soft Skills
+- Industry Skills
+- Missing / Suggested Skills
+
+STRICT RULES:
+- DO NOT invent employers, degrees, certificates, dates, titles, or achievements.
+- Keep each section concise.
+
+JOB DESCRIPTION:
+\"\"\"{job_description}\"\"\"
+
+CANDIDATE CV:
+\"\"\"{resume_text}\"\"\"
+""".strip()
+
+    try:
+        raw, _ = _call_llm_result(
+            messages=[
+                {"role": "system", "content": "You are a professional career intelligence AI. Reply with JSON only."},
+                {"role": "user", "content": prompt},
+            ],
+            response_format={"type": "json_object"},
+            tool="cv_jd_analysis",
+        )
+        data = json.loads(raw or "{}")
+    except Exception:
+        # includes JSON cut off at max_tokens (finish_reason == "length")
+        return cached
+
+    if not isinstance(data, dict):
+        return cached
+
+    analysis = {}
+    for section in CV_JD_COMBINED_SECTIONS:
+        value = data.get(section)
+        if isinstance(value, str) and value.strip():
+            analysis[section] = _clean(value)
+
+    # Partial results are cached too; pages fall back per missing section
+    if analysis:
+        _store_cv_jd_analysis(resume_text, job_description, analysis)
+
+    return get_cached_cv_jd_analysis(resume_text, job_description) or {}
+
+
+def ai_cv_jd_section(section: str, resume_text: str, job_description: str) -> str:
+    """
+    Return one section for this (resume, JD) pair, or "" so the caller
+    falls back to its per-tool engine. Short sections come from the
+    combined call; "tailored_cv" is only ever served from the cache
+    (filled by ai_tailor_resume_to_job()).
+    """
+    if section not in CV_JD_SECTIONS:
+        raise ValueError(f"Unknown CV/JD section: {section}")
+
+    if section not in CV_JD_COMBINED_SECTIONS:
+        cached = get_cached_cv_jd_analysis(_clean(resume_text), _clean(job_description)) or {}
+        if section in cached:
+            record_ai_call(tool="tailor_cv", model=None, latency_ms=0, cache_hit=True)
+        return cached.get(section, "")
+
+    return ai_analyze_cv_against_jd(resume_text, job_description).get(section, "")
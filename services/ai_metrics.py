@@ -0,0 +1,132 @@
+# ==============================================================
+# services/ai_metrics.py — Per-call LLM telemetry
+# Tokens, latency, model and cache hits for every AI call
+# (table DDL: sql/ai_call_metrics.sql)
+# ==============================================================
+
+import os
+import queue
+import threading
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List
+
+# One background writer drains a bounded queue in batches (same shape
+# as the security event buffer); a full queue drops rows, never blocks.
+METRICS_QUEUE_MAX = int(os.getenv("AI_METRICS_QUEUE_MAX", "5000") or 5000)
+METRICS_BATCH_SIZE = 100
+METRICS_FLUSH_SECONDS = 2.0
+
+_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=METRICS_QUEUE_MAX)
+_worker = None
+_worker_lock = threading.Lock()
+dropped = 0
+
+
+def _insert(rows: List[Dict[str, Any]]) -> None:
+    try:
+        from config.supabase_client import supabase_admin
+
+        supabase_admin.table("ai_call_metrics").insert(rows).execute()
+    except Exception:
+        # telemetry must never break the app
+        pass
+
+
+def _loop() -> None:
+    while True:
+        try:
+            batch = [_queue.get(timeout=METRICS_FLUSH_SECONDS)]
+        except queue.Empty:
+            continue
+        while len(batch) < METRICS_BATCH_SIZE:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        _insert(batch)
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_loop, name="talentiq-ai-metrics", daemon=True)
+            _worker.start()
+
+
+def _enqueue(row: Dict[str, Any]) -> None:
+    global dropped
+    try:
+        _queue.put_nowait(row)
+    except queue.Full:
+        dropped += 1
+    _ensure_worker()
+
+
+def _usage_value(usage: Any, name: str) -> int:
+    if usage is None:
+        return 0
+    try:
+        if isinstance(usage, dict):
+            return int(usage.get(name) or 0)
+        return int(getattr(usage, name, 0) or 0)
+    except Exception:
+        return 0
+
+
+def record_ai_call(
+    tool: str,
+    model: str | None,
+    latency_ms: float,
+    usage: Any = None,
+    cache_hit: bool = False,
+    fallback_used: bool = False,
+    status: str = "ok",
+) -> Dict[str, Any]:
+    """
+    Persist one AI call to ai_call_metrics in the background.
+    `usage` is the OpenAI response usage object (or a dict).
+    Returns the row that was queued.
+    """
+    prompt_tokens = _usage_value(usage, "prompt_tokens")
+    completion_tokens = _usage_value(usage, "completion_tokens")
+
+    row = {
+        "tool": tool or "default",
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": _usage_value(usage, "total_tokens") or (prompt_tokens + completion_tokens),
+        "latency_ms": int(round(latency_ms or 0)),
+        "cache_hit": bool(cache_hit),
+        "fallback_used": bool(fallback_used),
+        "status": status,
+    }
+
+    # Off the request path: the user is already waiting on the LLM
+    _enqueue(row)
+    return row
+
+
+def fetch_ai_call_metrics(days: int = 7, limit: int = 20000) -> List[Dict[str, Any]]:
+    """Recent ai_call_metrics rows (newest first) for the admin dashboard."""
+    from config.supabase_client import supabase_admin
+
+    since = (datetime.now(timezone.utc) - timedelta(days=int(days))).isoformat()
+
+    res = (
+        supabase_admin
+        .table("ai_call_metrics")
+        .select(
+            "created_at, tool, model, prompt_tokens, completion_tokens, "
+            "total_tokens, latency_ms, cache_hit, fallback_used, status"
+        )
+        .gte("created_at", since)
+        .order("created_at", desc=True)
+        .limit(int(limit))
+        .execute()
+    )
+
+    return res.data or []
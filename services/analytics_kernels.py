@@ -0,0 +1,122 @@
+# ==========================================================
+# services/analytics_kernels.py — vectorised dashboard aggregations
+#
+# Column-wise pandas versions of the per-row loops the dashboards used
+# (score bands, subscore averages, volume trends, skill counts). Each
+# kernel parses / converts a column once instead of once per row.
+# ==========================================================
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+SCORE_BANDS = ["0–49", "50–59", "60–69", "70–79", "80–89", "90–100"]
+_BAND_EDGES = [-np.inf, 50, 60, 70, 80, 90, np.inf]
+
+JOB_READY_THRESHOLD = 70
+
+
+def numeric(values) -> pd.Series:
+    """Floats with unparsable entries dropped."""
+    return pd.to_numeric(pd.Series(list(values), dtype="object"), errors="coerce").dropna()
+
+
+# ==========================================================
+# SCORES
+# ==========================================================
+def score_summary(scores) -> dict:
+    """{count, avg, job_ready_rate (0–1)} over non-null scores."""
+    s = numeric(scores)
+    if s.empty:
+        return {"count": 0, "avg": 0.0, "job_ready_rate": 0.0}
+    return {
+        "count": int(s.size),
+        "avg": float(s.mean()),
+        "job_ready_rate": float((s >= JOB_READY_THRESHOLD).mean()),
+    }
+
+
+def score_band_counts(scores) -> pd.Series:
+    """
+    Count per SCORE_BANDS band (all bands present, zero-filled). Missing
+    scores are skipped; unparsable ones count as 0, like the per-row code.
+    """
+    raw = pd.Series(list(scores), dtype="object")
+    s = pd.to_numeric(raw[raw.notna()], errors="coerce").fillna(0.0)
+    bands = pd.cut(s, bins=_BAND_EDGES, labels=SCORE_BANDS, right=False)
+    return bands.value_counts(sort=False).reindex(SCORE_BANDS, fill_value=0)
+
+
+def subscore_means(subscores) -> pd.Series:
+    """
+    Mean per subscore key across JSON breakdowns. Non-dict rows are
+    skipped; a present but non-numeric value counts as 0.
+    """
+    dicts = [d for d in subscores if isinstance(d, dict) and d]
+    if not dicts:
+        return pd.Series(dtype="float64")
+
+    df = pd.json_normalize(dicts, max_level=0)
+    present = df.notna()
+    values = df.apply(pd.to_numeric, errors="coerce").fillna(0.0).where(present)
+    return values.mean()
+
+
+# ==========================================================
+# TRENDS
+# ==========================================================
+def volume_trend(timestamps, freq: str = "D") -> pd.Series:
+    """
+    Event counts per period, indexed by period start date (ISO string).
+    freq: "D" daily, "W" Monday-based weeks, "MS" months. Empty
+    periods between the first and last event are zero-filled.
+    """
+    # ISO8601: PostgREST trims fractional seconds, so precision varies per row
+    ts = pd.to_datetime(
+        pd.Series(list(timestamps), dtype="object"), format="ISO8601", errors="coerce", utc=True
+    ).dropna()
+    if ts.empty:
+        return pd.Series(dtype="int64")
+
+    rule = "W-MON" if freq == "W" else freq
+    extra = {"label": "left", "closed": "left"} if freq == "W" else {}
+    counts = pd.Series(1, index=pd.DatetimeIndex(ts)).resample(rule, **extra).sum()
+    counts.index = counts.index.strftime("%Y-%m-%d")
+    return counts
+
+
+# ==========================================================
+# SKILLS
+# ==========================================================
+def skill_counts(rows, group_col: str = "faculty", skills_col: str = "skills") -> pd.DataFrame:
+    """
+    [group_col, skill, supply_count] from rows whose skills are a list or
+    comma-separated text. Skills are stripped and lower-cased.
+    """
+    df = pd.DataFrame(rows or [], columns=[group_col, skills_col])
+    if df.empty:
+        return pd.DataFrame(columns=[group_col, "skill", "supply_count"])
+
+    df[group_col] = df[group_col].fillna("Unknown").replace("", "Unknown")
+
+    skills = df[skills_col]
+    is_text = skills.map(lambda v: isinstance(v, str))
+    if is_text.any():
+        skills = skills.where(~is_text, skills[is_text].str.split(","))
+
+    exploded = df.assign(skill=skills).explode("skill")
+    exploded = exploded[exploded["skill"].notna()]
+    exploded["skill"] = exploded["skill"].astype(str).str.strip().str.lower()
+    exploded = exploded[exploded["skill"] != ""]
+
+    if exploded.empty:
+        return pd.DataFrame(columns=[group_col, "skill", "supply_count"])
+
+    return (
+        exploded[[group_col, "skill"]]
+        .value_counts(sort=False)
+        .rename("supply_count")
+        .reset_index()
+        .sort_values([group_col, "skill"], ignore_index=True)
+    )
@@ -98,41 +98,225 @@ def check_credit_available(subscription, tool_name):
 
 
 # =========================================================
-# DEDUCT CREDIT AFTER TOOL RUN
+# CREDIT RESERVATIONS (HOLD / COMMIT / RELEASE)
+# Backed by RPCs + append-only credit_ledger
+# (sql/credit_reservations.sql)
 # =========================================================
 
-def deduct_credit(user_id, tool_name):
+RESERVATION_TTL_SECONDS = 600
+
+RESERVE_MESSAGES = {
+    "no_subscription": "Subscription not found.",
+    "expired": "Subscription expired.",
+    "inactive": "Subscription inactive.",
+    "insufficient": "Insufficient credits.",
+    "invalid_amount": "Invalid credit amount.",
+}
+
+
+def _invalidate_entitlements(user_id=None):
+
+    try:
+        from services.entitlements import invalidate_entitlements
+        invalidate_entitlements(user_id)
+    except Exception:
+        pass
+
+
+def _rpc_row(res):
+
+    data = getattr(res, "data", None)
+
+    if isinstance(data, list):
+        return data[0] if data else {}
+
+    if isinstance(data, dict):
+        return data
+
+    return {}
+
+
+def reserve_credits(user_id, tool_name, ttl_seconds=RESERVATION_TTL_SECONDS):
+    """
+    Atomically hold the tool's cost before running it.
+    Holds not committed within ttl_seconds are released automatically.
+    Returns (True, reservation_id, new_balance) or (False, message, None).
+    """
 
     cost = TOOL_COSTS.get(tool_name, 0)
 
     if cost == 0:
-        return True, None
+        return True, None, None
 
-    subscription = get_user_subscription(user_id)
+    try:
 
-    if not subscription:
-        return False, "Subscription not found."
+        row = _rpc_row(
+            supabase_admin.rpc("reserve_credits", {
+                "p_user_id": user_id,
+                "p_tool": tool_name,
+                "p_amount": cost,
+                "p_ttl_seconds": int(ttl_seconds),
+            }).execute()
+        )
 
-    current_credits = subscription.get("credits", 0)
+    except Exception as e:
+
+        return False, str(e), None
+
+    result = row.get("result")
+
+    if result != "ok":
+        return False, RESERVE_MESSAGES.get(result, f"Credit reservation failed: {result}"), None
+
+    _invalidate_entitlements(user_id)
 
-    new_balance = current_credits - cost
+    return True, row.get("reservation_id"), row.get("new_credits")
 
-    if new_balance < 0:
-        return False, "Insufficient credits."
+
+def commit_reservation(reservation_id):
+    """
+    Finalise a hold after the tool succeeded (idempotent).
+    Returns (ok, new_balance_or_message).
+    """
+
+    if not reservation_id:
+        return True, None
 
     try:
 
-        supabase_admin.table("subscriptions").update({
-            "credits": new_balance,
-            "updated_at": datetime.utcnow().isoformat()
-        }).eq("user_id", user_id).execute()
+        row = _rpc_row(
+            supabase_admin.rpc("commit_credit_reservation", {
+                "p_reservation_id": reservation_id,
+            }).execute()
+        )
+
+    except Exception as e:
+
+        return False, str(e)
+
+    if row.get("result") != "ok":
+        return False, f"Credit reservation {row.get('result') or 'failed'}."
+
+    return True, row.get("new_credits")
+
+
+def release_reservation(reservation_id):
+    """
+    Return held credits (tool failed or was abandoned).
+    Returns (ok, new_balance_or_message).
+    """
+
+    if not reservation_id:
+        return True, None
+
+    try:
 
-        return True, new_balance
+        row = _rpc_row(
+            supabase_admin.rpc("release_credit_reservation", {
+                "p_reservation_id": reservation_id,
+            }).execute()
+        )
 
     except Exception as e:
 
         return False, str(e)
 
+    if row.get("result") != "ok":
+        return False, f"Credit reservation {row.get('result') or 'failed'}."
+
+    # balance went back up; caller's session re-reads it
+    _invalidate_entitlements()
+
+    return True, row.get("new_credits")
+
+
+class CreditReservation:
+    """
+    Context manager around reserve / commit / release.
+
+        with CreditReservation(user_id, "cv_intelligence_engine") as hold:
+            if not hold.ok:
+                st.error(hold.message); st.stop()
+            ... run the tool ...
+            hold.commit()
+
+    Anything that leaves the block without commit() (errors, st.stop())
+    releases the hold.
+    """
+
+    def __init__(self, user_id, tool_name, ttl_seconds=RESERVATION_TTL_SECONDS):
+
+        self.user_id = user_id
+        self.tool_name = tool_name
+        self.ttl_seconds = ttl_seconds
+
+        self.ok = False
+        self.message = None
+        self.reservation_id = None
+        self.balance = None
+        self.committed = False
+
+    def __enter__(self):
+
+        self.ok, value, self.balance = reserve_credits(
+            self.user_id, self.tool_name, self.ttl_seconds
+        )
+
+        if self.ok:
+            self.reservation_id = value
+        else:
+            self.message = value
+
+        return self
+
+    def commit(self):
+
+        ok, value = commit_reservation(self.reservation_id)
+
+        if ok:
+            self.committed = True
+            if value is not None:
+                self.balance = value
+        else:
+            self.message = value
+
+        return ok, self.balance if ok else value
+
+    def __exit__(self, exc_type, exc, tb):
+
+        if self.ok and not self.committed:
+            release_reservation(self.reservation_id)
+
+        return False
+
+
+# =========================================================
+# DEDUCT CREDIT AFTER TOOL RUN
+# =========================================================
+
+def deduct_credit(user_id, tool_name):
+    """
+    One-shot atomic charge (reserve + commit).
+    Returns (True, new_balance) or (False, message).
+    """
+
+    cost = TOOL_COSTS.get(tool_name, 0)
+
+    if cost == 0:
+        return True, None
+
+    ok, value, balance = reserve_credits(user_id, tool_name)
+
+    if not ok:
+        return False, value
+
+    committed, new_balance = commit_reservation(value)
+
+    if not committed:
+        return False, new_balance
+
+    return True, new_balance if new_balance is not None else balance
+
 
 # =========================================================
 # MASTER FUNCTION (USED BY AI TOOLS)
@@ -0,0 +1,113 @@
+# ==========================================================
+# services/credit_ledger.py — Credit ledger reads (balances + usage)
+# Tables / RPCs: sql/credit_ledger.sql
+# ==========================================================
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from config.supabase_client import supabase_admin
+
+# Matches the pg_cron schedule in sql/credit_ledger.sql
+SNAPSHOT_MAX_AGE_SECONDS = 900
+
+
+def _rows(res):
+    data = getattr(res, "data", None)
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return [data]
+    return []
+
+
+# ==========================================================
+# BALANCES (latest snapshot + bounded ledger tail)
+# ==========================================================
+def get_credit_balance(user_id: str) -> int | None:
+    """
+    Ledger balance for one user. Returns None if the RPC is unavailable
+    (callers should then fall back to subscriptions.credits).
+    """
+    try:
+        rows = _rows(supabase_admin.rpc("credit_balance", {"p_user_id": user_id}).execute())
+        if not rows:
+            return 0
+        return int(rows[0].get("balance") or 0)
+    except Exception:
+        return None
+
+
+# ==========================================================
+# USAGE REPORTS (pre-aggregated daily snapshots)
+# ==========================================================
+def fetch_credit_usage_daily(days: int = 30, start: date | None = None) -> list[dict]:
+    """
+    Rows from credit_usage_daily since `start` (default: last `days` days).
+    Cost depends on the window, not on total ledger history.
+    """
+    if start is None:
+        start = (datetime.now(timezone.utc) - timedelta(days=int(days))).date()
+
+    res = (
+        supabase_admin.table("credit_usage_daily")
+        .select("day, user_id, tool, kind, credits_in, credits_out, events")
+        .gte("day", start.isoformat())
+        .order("day", desc=False)
+        .execute()
+    )
+    return _rows(res)
+
+
+# ==========================================================
+# SNAPSHOT JOB
+# ==========================================================
+def run_credit_snapshot() -> int:
+    """
+    Fold new ledger rows into balance / daily usage snapshots.
+    Returns the number of user balance snapshots written.
+    """
+    data = getattr(supabase_admin.rpc("snapshot_credit_ledger", {}).execute(), "data", None)
+
+    # Scalar RPCs come back as the bare value
+    if isinstance(data, list):
+        data = data[0] if data else 0
+    if isinstance(data, dict):
+        data = next(iter(data.values()), 0)
+
+    try:
+        return int(data or 0)
+    except Exception:
+        return 0
+
+
+def ensure_recent_snapshot(max_age_seconds: int = SNAPSHOT_MAX_AGE_SECONDS) -> bool:
+    """
+    Run the snapshot job if the last one is older than max_age_seconds
+    (covers deployments without pg_cron). Returns True if it ran.
+    """
+    try:
+        rows = _rows(
+            supabase_admin.table("credit_snapshot_state")
+            .select("updated_at")
+            .eq("id", 1)
+            .limit(1)
+            .execute()
+        )
+    except Exception:
+        return False
+
+    updated_at = (rows[0].get("updated_at") if rows else None) or ""
+    try:
+        last = datetime.fromisoformat(str(updated_at).replace("Z", "+00:00"))
+        if (datetime.now(timezone.utc) - last).total_seconds() < max_age_seconds:
+            return False
+    except ValueError:
+        pass
+
+    try:
+        run_credit_snapshot()
+        return True
+    except Exception:
+        return False
@@ -5,6 +5,8 @@ import os
 from supabase import create_client
 import pandas as pd
 
+from services.scores_cache import load_scores
+
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
 
@@ -17,17 +19,17 @@ supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def get_top_students(institution_id, limit=20):
 
-    result = (
-        supabase
-        .table("candidate_scores")
-        .select("user_id, ers_score, trust_badge, cv_quality_score, faculty")
-        .eq("institution_id", institution_id)
-        .order("ers_score", desc=True)
-        .limit(limit)
-        .execute()
+    df = load_scores(
+        institution_id,
+        columns=["user_id", "ers_score", "trust_badge", "cv_quality_score", "faculty"],
     )
 
-    return result.data
+    if df.empty:
+        return []
+
+    top = df.sort_values("ers_score", ascending=False, na_position="last").head(limit)
+
+    return top.astype(object).where(top.notna(), None).to_dict("records")
 
 
 # ---------------------------------------------
@@ -36,42 +38,25 @@ def get_top_students(institution_id, limit=20):
 
 def get_faculty_employability(institution_id):
 
-    result = (
-        supabase
-        .table("candidate_scores")
-        .select("faculty, ers_score")
-        .eq("institution_id", institution_id)
-        .execute()
-    )
-
-    data = result.data
-
-    faculty_scores = {}
-
-    for row in data:
-
-        faculty = row.get("faculty") or "Unknown"
-        ers = row.get("ers_score") or 0
+    df = load_scores(institution_id, columns=["faculty", "ers_score"])
 
-        if faculty not in faculty_scores:
-            faculty_scores[faculty] = []
+    if df.empty:
+        return []
 
-        faculty_scores[faculty].append(ers)
+    faculty = df["faculty"].fillna("Unknown").replace("", "Unknown")
+    ers = pd.to_numeric(df["ers_score"], errors="coerce").fillna(0)
 
-    ranking = []
-
-    for faculty, scores in faculty_scores.items():
-
-        avg_score = sum(scores) / len(scores)
-
-        ranking.append({
-            "faculty": faculty,
-            "employability_index": round(avg_score, 2)
-        })
-
-    ranking.sort(key=lambda x: x["employability_index"], reverse=True)
+    ranking = (
+        ers.groupby(faculty)
+        .mean()
+        .round(2)
+        .sort_values(ascending=False)
+    )
 
-    return ranking
+    return [
+        {"faculty": f, "employability_index": float(v)}
+        for f, v in ranking.items()
+    ]
 
 
 # ---------------------------------------------
@@ -80,22 +65,15 @@ def get_faculty_employability(institution_id):
 
 def get_graduate_readiness(institution_id):
 
-    result = (
-        supabase
-        .table("candidate_scores")
-        .select("ers_score")
-        .eq("institution_id", institution_id)
-        .execute()
-    )
-
-    data = result.data
+    df = load_scores(institution_id, columns=["ers_score"])
 
-    if not data:
+    if df.empty:
         return 0
 
-    scores = [row["ers_score"] for row in data if row.get("ers_score")]
+    scores = pd.to_numeric(df["ers_score"], errors="coerce")
+    scores = scores[scores.notna() & (scores != 0)]
 
-    if not scores:
+    if scores.empty:
         return 0
 
-    return round(sum(scores) / len(scores), 2)
\ No newline at end of file
+    return round(float(scores.mean()), 2)
\ No newline at end of file
@@ -22,19 +22,46 @@ def get_supabase():
 
     return create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def get_candidate_score(user_id):
+def get_candidate_score(user_id, history=False):
+    """
+    Latest score row (candidate_latest_scores projection).
+    history=True returns every analysis, newest first.
+    """
+
+    if history:
+        result = (
+            supabase
+            .table("candidate_scores")
+            .select("*")
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+            .execute()
+        )
+        return result.data or []
 
-    result = (
-        supabase
-        .table("candidate_scores")
-        .select("*")
-        .eq("user_id", user_id)
-        .execute()
-    )
+    try:
+        result = (
+            supabase
+            .table("candidate_latest_scores")
+            .select("*")
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        )
+    except Exception:
+        # projection not applied yet — newest history row via the index
+        result = (
+            supabase
+            .table("candidate_scores")
+            .select("*")
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+            .limit(1)
+            .execute()
+        )
 
     if not result.data:
         return None
 
-    # return latest score
-    return sorted(result.data, key=lambda x: x["created_at"], reverse=True)[0]
+    return result.data[0]
 
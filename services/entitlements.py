@@ -0,0 +1,201 @@
+# ==========================================================
+# services/entitlements.py — PER-SESSION ENTITLEMENT CACHE
+# One batched load of everything pages gate on:
+#   - subscriptions row (effective expiry applied)
+#   - institution_members + institutions licence fields
+#   - employer_members + employers licence fields
+# Cached in st.session_state for ENTITLEMENT_TTL_SECONDS.
+# Writers (charge, payment approval, renewal) call invalidate_*()
+# so the next read in ANY session reloads.
+# ==========================================================
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from config.supabase_client import supabase_admin
+from services.utils import get_subscription, effective_license_status
+
+ENTITLEMENT_TTL_SECONDS = int(os.getenv("ENTITLEMENT_TTL_SECONDS", "60") or 60)
+
+_SESSION_KEY = "_entitlements"
+_LICENCE_COLUMNS = {
+    "institutions": "id,name,institution_type,industry,website,license_status,"
+                    "subscription_tier,subscription_expires_at,created_at",
+    "employers": "id,name,industry,website,license_status,plan_code,"
+                 "subscription_expires_at,created_at",
+}
+
+# ("user" | "institution" | "employer", id) -> time of last invalidation.
+# Process-wide, so an admin approving a payment invalidates the payer's session.
+_stale_lock = threading.Lock()
+_stale_after = {}
+
+
+# ==========================================================
+# INVALIDATION
+# ==========================================================
+def _mark_stale(kind: str, key: str | None) -> None:
+    if not key:
+        return
+    with _stale_lock:
+        _stale_after[(kind, str(key))] = time.time()
+
+
+def invalidate_entitlements(user_id: str | None = None) -> None:
+    """Drop cached entitlements for a user (credits charged, plan applied)."""
+    _mark_stale("user", user_id)
+    try:
+        cached = st.session_state.get(_SESSION_KEY)
+        if cached and (user_id is None or cached.get("user_id") == user_id):
+            st.session_state.pop(_SESSION_KEY, None)
+    except Exception:
+        # no Streamlit session (scripts / background threads)
+        pass
+
+
+def invalidate_institution(institution_id: str | None) -> None:
+    """Institution licence changed (approval, renewal, suspension)."""
+    _mark_stale("institution", institution_id)
+
+
+def invalidate_employer(employer_id: str | None) -> None:
+    """Employer licence changed (approval, renewal, suspension)."""
+    _mark_stale("employer", employer_id)
+
+
+def _is_stale(ent: dict) -> bool:
+    loaded_at = ent.get("loaded_at") or 0
+    if time.time() - loaded_at > ENTITLEMENT_TTL_SECONDS:
+        return True
+
+    keys = [("user", str(ent.get("user_id")))]
+    keys += [("institution", str(i)) for i in ent.get("institutions", {})]
+    keys += [("employer", str(e)) for e in ent.get("employers", {})]
+
+    with _stale_lock:
+        return any(_stale_after.get(k, 0) >= loaded_at for k in keys)
+
+
+# ==========================================================
+# BATCHED LOAD
+# ==========================================================
+def _memberships(table: str, id_column: str, user_id: str):
+    try:
+        return (
+            supabase_admin.table(table)
+            .select(f"{id_column},member_role")
+            .eq("user_id", user_id)
+            .limit(500)
+            .execute()
+            .data
+            or []
+        )
+    except Exception:
+        return []
+
+
+def _licences(table: str, ids: list):
+    if not ids:
+        return {}
+    try:
+        rows = (
+            supabase_admin.table(table)
+            .select(_LICENCE_COLUMNS[table])
+            .in_("id", ids)
+            .limit(500)
+            .execute()
+            .data
+            or []
+        )
+    except Exception:
+        return {}
+
+    out = {}
+    for r in rows:
+        r["effective_status"] = effective_license_status(r)
+        out[r.get("id")] = r
+    return out
+
+
+def load_entitlements(user_id: str) -> dict:
+    """
+    Two parallel rounds: (subscription, institution_members, employer_members)
+    then (institutions, employers) for the ids found.
+    """
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        f_sub = pool.submit(get_subscription, user_id)
+        f_inst_mem = pool.submit(_memberships, "institution_members", "institution_id", user_id)
+        f_emp_mem = pool.submit(_memberships, "employer_members", "employer_id", user_id)
+
+        inst_members = f_inst_mem.result()
+        emp_members = f_emp_mem.result()
+
+        inst_ids = [m["institution_id"] for m in inst_members if m.get("institution_id")]
+        emp_ids = [m["employer_id"] for m in emp_members if m.get("employer_id")]
+
+        f_inst = pool.submit(_licences, "institutions", inst_ids)
+        f_emp = pool.submit(_licences, "employers", emp_ids)
+
+        return {
+            "user_id": user_id,
+            "loaded_at": time.time(),
+            "subscription": f_sub.result(),
+            "institution_roles": {m["institution_id"]: (m.get("member_role") or "viewer").lower().strip()
+                                  for m in inst_members if m.get("institution_id")},
+            "employer_roles": {m["employer_id"]: (m.get("member_role") or "viewer").lower().strip()
+                               for m in emp_members if m.get("employer_id")},
+            "institutions": f_inst.result(),
+            "employers": f_emp.result(),
+        }
+
+
+def get_entitlements(user_id: str, force: bool = False) -> dict:
+    cached = st.session_state.get(_SESSION_KEY)
+    if (
+        not force
+        and cached
+        and cached.get("user_id") == user_id
+        and not _is_stale(cached)
+    ):
+        return cached
+
+    ent = load_entitlements(user_id)
+    st.session_state[_SESSION_KEY] = ent
+    return ent
+
+
+# ==========================================================
+# READ HELPERS
+# ==========================================================
+def get_cached_subscription(user_id: str):
+    """Drop-in for get_subscription() on read-only page gates."""
+    return get_entitlements(user_id).get("subscription")
+
+
+def _licence(user_id: str, bucket: str, table: str, row_id: str):
+    ent = get_entitlements(user_id)
+    rows = ent.setdefault(bucket, {})
+    if row_id and row_id not in rows:
+        # platform admins can open organisations they are not members of
+        rows.update(_licences(table, [row_id]))
+    return rows.get(row_id)
+
+
+def list_licences(user_id: str, bucket: str) -> list:
+    """Member organisations ("institutions" | "employers"), newest first."""
+    rows = list(get_entitlements(user_id).get(bucket, {}).values())
+    return sorted(rows, key=lambda r: str(r.get("created_at") or ""), reverse=True)
+
+
+def get_institution_licence(user_id: str, institution_id: str):
+    return _licence(user_id, "institutions", "institutions", institution_id)
+
+
+def get_employer_licence(user_id: str, employer_id: str):
+    return _licence(user_id, "employers", "employers", employer_id)
@@ -0,0 +1,164 @@
+# ==========================================================
+# services/expiry_sweeper.py — Scheduled expiry of subscriptions + licences
+#
+# Replaces expire-on-read UPDATEs in get_subscription() and the
+# institution / employer dashboards. One set-based UPDATE per table per
+# tick; read paths only compute the effective status in memory
+# (see services.utils.effective_license_status).
+#
+# Runs in-process on a daemon thread (start_expiry_sweeper()), or once
+# from cron:  python -m services.expiry_sweeper --once
+# ==========================================================
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+SWEEP_INTERVAL_SECONDS = int(os.getenv("EXPIRY_SWEEP_INTERVAL_SECONDS", "300") or 300)
+
+_sweeper_lock = threading.Lock()
+_sweeper_thread: threading.Thread | None = None
+_last_result: dict = {}
+
+
+# NULL license_status means "trial" in the dashboards, so include it
+_NOT_ALREADY_EXPIRED = "license_status.is.null,license_status.not.in.(expired,suspended)"
+
+
+def _utcnow_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _count(res) -> int:
+    data = getattr(res, "data", None)
+    return len(data) if isinstance(data, list) else 0
+
+
+# ==========================================================
+# SWEEP (set-based)
+# ==========================================================
+def expire_subscriptions(client, now_iso: str) -> int:
+    """Active subscriptions past end_date → expired, credits=0."""
+    res = (
+        client.table("subscriptions")
+        .update({"subscription_status": "expired", "credits": 0})
+        .eq("subscription_status", "active")
+        .lte("end_date", now_iso)
+        .execute()
+    )
+    return _count(res)
+
+
+def expire_institution_licences(client, now_iso: str) -> int:
+    """Institutions past subscription_expires_at → license_status=expired."""
+    res = (
+        client.table("institutions")
+        .update({"license_status": "expired"})
+        .or_(_NOT_ALREADY_EXPIRED)
+        .lt("subscription_expires_at", now_iso)
+        .execute()
+    )
+    return _count(res)
+
+
+def expire_employer_licences(client, now_iso: str) -> int:
+    """Employers past subscription_expires_at → license_status=expired."""
+    res = (
+        client.table("employers")
+        .update({"license_status": "expired"})
+        .or_(_NOT_ALREADY_EXPIRED)
+        .lt("subscription_expires_at", now_iso)
+        .execute()
+    )
+    return _count(res)
+
+
+def run_expiry_sweep(client=None) -> dict:
+    """
+    One sweep over all three tables. Each step is independent so one
+    failing table never blocks the others.
+    Returns {"subscriptions": n, "institutions": n, "employers": n, "errors": {...}}.
+    """
+    global _last_result
+
+    if client is None:
+        from config.supabase_client import supabase_admin as client
+
+    now_iso = _utcnow_iso()
+    result = {"ran_at": now_iso, "errors": {}}
+
+    for name, fn in (
+        ("subscriptions", expire_subscriptions),
+        ("institutions", expire_institution_licences),
+        ("employers", expire_employer_licences),
+    ):
+        try:
+            result[name] = fn(client, now_iso)
+        except Exception as e:
+            result[name] = 0
+            result["errors"][name] = str(e)
+
+    _last_result = result
+    return result
+
+
+def last_sweep_result() -> dict:
+    return dict(_last_result)
+
+
+# ==========================================================
+# LOCAL SCHEDULER (one daemon thread per process)
+# ==========================================================
+def _loop(interval_seconds: int) -> None:
+    while True:
+        try:
+            run_expiry_sweep()
+        except Exception:
+            # the sweeper must never crash the app
+            pass
+        time.sleep(max(30, int(interval_seconds)))
+
+
+def start_expiry_sweeper(interval_seconds: int = SWEEP_INTERVAL_SECONDS) -> bool:
+    """
+    Start the background sweeper once per process (safe to call on every
+    page render). Set EXPIRY_SWEEP_INTERVAL_SECONDS=0 to disable (e.g. when
+    cron runs `python -m services.expiry_sweeper --once` instead).
+    Returns True if the sweeper is running.
+    """
+    global _sweeper_thread
+
+    if int(interval_seconds) <= 0:
+        return False
+
+    with _sweeper_lock:
+        if _sweeper_thread is not None and _sweeper_thread.is_alive():
+            return True
+
+        _sweeper_thread = threading.Thread(
+            target=_loop,
+            args=(interval_seconds,),
+            name="talentiq-expiry-sweeper",
+            daemon=True,
+        )
+        _sweeper_thread.start()
+        return True
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    p = argparse.ArgumentParser(description="Expire subscriptions and licences")
+    p.add_argument("--once", action="store_true", help="run one sweep and exit")
+    args = p.parse_args()
+
+    if args.once:
+        print(run_expiry_sweep())
+    else:
+        _loop(SWEEP_INTERVAL_SECONDS)
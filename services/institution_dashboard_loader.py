@@ -0,0 +1,214 @@
+# ==========================================================
+# services/institution_dashboard_loader.py
+# Concurrent data loader for 16_Institution_Executive_Dashboard
+#
+# Queries are declared as a small dependency graph; every query whose
+# inputs are ready runs on a thread pool, so page latency is the
+# critical path (applications → scores / users) instead of the sum of
+# all round-trips.
+# ==========================================================
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+
+from config.supabase_client import supabase_admin
+from services.query_batching import fetch_in, fetch_in_map
+from services.scores_cache import load_scores
+
+MAX_WORKERS = 8
+
+
+# ==========================================================
+# GENERIC GRAPH RUNNER
+# ==========================================================
+def run_query_graph(nodes: dict, max_workers: int = MAX_WORKERS):
+    """
+    nodes: {name: (fn, [dependency names])}
+    fn is called with the dependency results as keyword arguments.
+
+    Returns (results, errors). A failed node yields None and its
+    dependants still run (they receive None for it).
+    """
+    results, errors = {}, {}
+    pending = dict(nodes)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            ready = [
+                name for name, (_, deps) in pending.items()
+                if all(d in results for d in deps)
+            ]
+            for name in ready:
+                fn, deps = pending.pop(name)
+                running[pool.submit(fn, **{d: results[d] for d in deps})] = name
+
+            if not running:
+                missing = {n: [d for d in deps if d not in nodes] for n, (_, deps) in pending.items()}
+                raise ValueError(f"Unresolvable query graph: {missing}")
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    results[name] = fut.result()
+                except Exception as e:
+                    errors[name] = e
+                    results[name] = None
+
+    return results, errors
+
+
+# ==========================================================
+# TYPED BUNDLE
+# ==========================================================
+@dataclass
+class InstitutionDashboardData:
+    job_posts: list = field(default_factory=list)
+    applications: list = field(default_factory=list)
+    snapshot: dict = field(default_factory=dict)
+    scores: list = field(default_factory=list)
+    users_map: dict = field(default_factory=dict)
+    student_scores: list = field(default_factory=list)
+    national_scores: list = field(default_factory=list)
+    trend_rows: list = field(default_factory=list)
+    errors: dict = field(default_factory=dict)
+
+
+# ==========================================================
+# QUERIES
+# ==========================================================
+def _job_posts(institution_id: str, limit: int = 500):
+    return supabase_admin.table("institution_job_posts").select(
+        "id,institution_id,created_by,title,location,job_type,job_description,status,created_at"
+    ).eq("institution_id", institution_id).order("created_at", desc=True).limit(limit).execute().data or []
+
+
+def _applications(institution_id: str, viewer_user_id: str | None = None, limit: int = 2000):
+    q = supabase_admin.table("institution_applications").select(
+        "id,job_post_id,candidate_user_id,resume_text,status,created_at,institution_id"
+    ).eq("institution_id", institution_id)
+
+    # viewer scope (self-only) pushed into the query
+    if viewer_user_id:
+        q = q.eq("candidate_user_id", viewer_user_id)
+
+    return q.order("created_at", desc=True).limit(limit).execute().data or []
+
+
+def _scores_by_app_ids(app_ids, limit: int = 2000):
+    rows = fetch_in(
+        supabase_admin,
+        "institution_candidate_scores",
+        "application_id",
+        app_ids,
+        select="id,application_id,overall_score,subscores,recommendations,created_at",
+    )
+    rows.sort(key=lambda r: str(r.get("created_at") or ""), reverse=True)
+    return rows[:limit]
+
+
+def _users_app_map(user_ids):
+    return fetch_in_map(supabase_admin, "users_app", "id", user_ids, select="id,full_name,email")
+
+
+def _snapshot(institution_id: str, year: int):
+    rows = (
+        supabase_admin.table("institution_intelligence_snapshot")
+        .select("*")
+        .eq("institution_id", institution_id)
+        .eq("reporting_year", year)
+        .limit(1)
+        .execute()
+        .data
+        or []
+    )
+    return rows[0] if rows else {}
+
+
+def _student_scores(institution_id: str, snapshot: dict | None):
+    # Only needed while the snapshot row is not materialised
+    if (snapshot or {}).get("cv_analyses"):
+        return []
+    df = load_scores(institution_id, columns=["user_id", "ers_score", "trust_index", "faculty"])
+    return df.to_dict("records")
+
+
+def _national_scores(year: int):
+    return (
+        supabase_admin.table("institution_intelligence_snapshot")
+        .select("employability_score")
+        .eq("reporting_year", year)
+        .execute()
+        .data
+        or []
+    )
+
+
+def _trend_rows(institution_id: str):
+    return (
+        supabase_admin.table("institution_intelligence_snapshot")
+        .select("reporting_year,employability_score,total_hires,national_rank,yoy_growth")
+        .eq("institution_id", institution_id)
+        .order("reporting_year", desc=False)
+        .limit(15)
+        .execute()
+        .data
+        or []
+    )
+
+
+# ==========================================================
+# LOADER
+# ==========================================================
+def load_institution_dashboard(
+    institution_id: str,
+    year: int,
+    viewer_user_id: str | None = None,
+) -> InstitutionDashboardData:
+    """
+    Graph:
+        job_posts, applications, snapshot, national_scores, trend_rows  (roots)
+        scores, users_map   ← applications
+        student_scores      ← snapshot
+    viewer_user_id limits applications to the viewer's own (PATCH 2 scope).
+    """
+    nodes = {
+        "job_posts": (lambda: _job_posts(institution_id), []),
+        "applications": (lambda: _applications(institution_id, viewer_user_id), []),
+        "snapshot": (lambda: _snapshot(institution_id, year), []),
+        "national_scores": (lambda: _national_scores(year), []),
+        "trend_rows": (lambda: _trend_rows(institution_id), []),
+        "scores": (
+            lambda applications: _scores_by_app_ids(
+                {a.get("id") for a in (applications or []) if a.get("id")}
+            ),
+            ["applications"],
+        ),
+        "users_map": (
+            lambda applications: _users_app_map(
+                {a.get("candidate_user_id") for a in (applications or []) if a.get("candidate_user_id")}
+            ),
+            ["applications"],
+        ),
+        "student_scores": (
+            lambda snapshot: _student_scores(institution_id, snapshot),
+            ["snapshot"],
+        ),
+    }
+
+    results, errors = run_query_graph(nodes)
+
+    return InstitutionDashboardData(
+        job_posts=results.get("job_posts") or [],
+        applications=results.get("applications") or [],
+        snapshot=results.get("snapshot") or {},
+        scores=results.get("scores") or [],
+        users_map=results.get("users_map") or {},
+        student_scores=results.get("student_scores") or [],
+        national_scores=results.get("national_scores") or [],
+        trend_rows=results.get("trend_rows") or [],
+        errors=errors,
+    )
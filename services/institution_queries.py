@@ -6,6 +6,13 @@ import os
 from supabase import create_client
 import pandas as pd
 
+from services.analytics_kernels import skill_counts
+from services.scores_cache import load_scores
+from services.sparse_heatmap import cached_heatmap
+
+# faculty label for skills employers ask for that no student lists
+UNMET_DEMAND_FACULTY = "No supply"
+
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
 
@@ -32,20 +39,14 @@ def fetch_institution_scores(
 ):
     """
     Fetch candidate scoring data for ONE institution
+    (local columnar cache, delta-synced — services/scores_cache.py)
     """
-    data = (
-        supabase
-        .table("candidate_scores")
-        .select("*")
-        .eq("institution_id", institution_id)
-        .limit(limit)
-        .execute()
-    ).data
+    df = load_scores(institution_id)
 
-    if not data:
+    if df.empty:
         return pd.DataFrame()
 
-    return pd.DataFrame(data)
+    return df.head(limit)
 
 # =========================
 # KPI COMPUTATION
@@ -167,33 +168,8 @@ def fetch_skill_supply(institution_id: str):
     if not data:
         return pd.DataFrame()
 
-    rows = []
-
-    for r in data:
-        skills = r.get("skills") or []
-        faculty = r.get("faculty") or "Unknown"
-
-        # handle comma text or list
-        if isinstance(skills, str):
-            skills = [s.strip().lower() for s in skills.split(",")]
-
-        for skill in skills:
-            rows.append({
-                "faculty": faculty,
-                "skill": skill.lower(),
-                "supply_count": 1,
-            })
-
-    df = pd.DataFrame(rows)
-
-    if df.empty:
-        return df
-
-    return (
-        df.groupby(["faculty", "skill"])["supply_count"]
-        .sum()
-        .reset_index()
-    )
+    # skills: list or comma text → one (faculty, skill) count each
+    return skill_counts(data, group_col="faculty", skills_col="skills")
 
 
 def fetch_skill_demand(institution_id: str):
@@ -231,31 +207,48 @@ def compute_skill_gap_matrix(supply_df, demand_df):
     if supply_df.empty or demand_df.empty:
         return pd.DataFrame()
 
-    merged = supply_df.merge(
-        demand_df,
-        on="skill",
-        how="outer"
-    ).fillna(0)
+    demand = demand_df.set_index("skill")["demand_count"]
+
+    # demand looked up per (faculty, skill) row — no outer merge
+    merged = supply_df.assign(
+        demand_count=supply_df["skill"].map(demand).fillna(0)
+    )
+
+    unmet = demand[~demand.index.isin(supply_df["skill"])]
+
+    if not unmet.empty:
+        merged = pd.concat(
+            [
+                merged,
+                pd.DataFrame({
+                    "faculty": UNMET_DEMAND_FACULTY,
+                    "skill": unmet.index,
+                    "supply_count": 0,
+                    "demand_count": unmet.to_numpy(),
+                }),
+            ],
+            ignore_index=True,
+        )
 
     merged["gap"] = merged["demand_count"] - merged["supply_count"]
 
     return merged
 
 
-def build_faculty_heatmap(gap_df: pd.DataFrame):
+def build_faculty_heatmap(
+    gap_df: pd.DataFrame,
+    top_k: int = 10,
+    max_skills: int = 40,
+):
     """
-    Pivot for heatmap
+    Faculty × skill gap grid for the heatmap.
+
+    Built sparse from the (faculty, skill, gap) rows; only each
+    faculty's top_k skills by |gap| (at most max_skills overall) are
+    densified. Cached by the input data, so unchanged reruns are free.
     """
 
     if gap_df.empty:
         return pd.DataFrame()
 
-    pivot = gap_df.pivot_table(
-        index="faculty",
-        columns="skill",
-        values="gap",
-        aggfunc="sum",
-        fill_value=0,
-    )
-
-    return pivot
\ No newline at end of file
+    return cached_heatmap(gap_df, "faculty", "skill", "gap", top_k, max_skills)
\ No newline at end of file
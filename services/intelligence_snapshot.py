@@ -0,0 +1,70 @@
+# ==========================================================
+# services/intelligence_snapshot.py — institution KPI snapshot
+# Table / RPCs: sql/institution_intelligence_snapshot.sql
+# ==========================================================
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from config.supabase_client import supabase_admin
+
+
+def current_reporting_year() -> int:
+    return datetime.now(timezone.utc).year
+
+
+def _scalar(res) -> int:
+    data = getattr(res, "data", None)
+
+    # Scalar RPCs come back as the bare value
+    if isinstance(data, list):
+        data = data[0] if data else 0
+    if isinstance(data, dict):
+        data = next(iter(data.values()), 0)
+
+    try:
+        return int(data or 0)
+    except Exception:
+        return 0
+
+
+def refresh_institution_snapshots(year: int | None = None) -> int:
+    """
+    Recompute institutions whose source rows changed, in every dirty
+    year (or only `year`). Returns rows upserted.
+    """
+    return _scalar(
+        supabase_admin.rpc(
+            "refresh_institution_intelligence",
+            {"p_year": int(year) if year else None},
+        ).execute()
+    )
+
+
+def rebuild_institution_snapshots(year: int | None = None) -> int:
+    """Recompute every institution for the year."""
+    return _scalar(
+        supabase_admin.rpc(
+            "refresh_all_institution_intelligence",
+            {"p_year": int(year or current_reporting_year())},
+        ).execute()
+    )
+
+
+def fetch_institution_snapshot(institution_id: str, year: int | None = None) -> dict:
+    """One precomputed row ({} if not materialised yet)."""
+    try:
+        rows = (
+            supabase_admin.table("institution_intelligence_snapshot")
+            .select("*")
+            .eq("institution_id", institution_id)
+            .eq("reporting_year", int(year or current_reporting_year()))
+            .limit(1)
+            .execute()
+            .data
+            or []
+        )
+    except Exception:
+        return {}
+    return rows[0] if rows else {}
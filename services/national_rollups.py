@@ -0,0 +1,219 @@
+# ==========================================================
+# services/national_rollups.py — institution → region → national KPIs
+# Tables / RPCs: sql/national_rollups.sql
+#
+# Every level is the same mergeable partial state (counts, sums, sums
+# of squares). Rates, means and spreads derive from it, and any set of
+# institutions or regions combines by addition.
+# ==========================================================
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, fields
+
+from config.supabase_client import supabase_admin
+
+RANKING_COLUMNS = [
+    "institution_name",
+    "national_score",
+    "performance_tier",
+    "placement_rate",
+    "avg_ers",
+    "avg_hired_score",
+    "avg_salary",
+    "total_hires",
+]
+
+
+@dataclass
+class RollupState:
+    institutions: int = 0
+    students: int = 0
+    ers_sum: float = 0.0
+    ers_sumsq: float = 0.0
+    applications: int = 0
+    hires: int = 0
+    hired_score_n: int = 0
+    hired_score_sum: float = 0.0
+    salary_n: int = 0
+    salary_sum: float = 0.0
+    salary_sumsq: float = 0.0
+
+    @classmethod
+    def from_row(cls, row: dict | None) -> "RollupState":
+        row = row or {}
+        state = cls()
+        for f in fields(cls):
+            raw = row.get(f.name)
+            if raw is None:
+                continue
+            setattr(state, f.name, int(float(raw)) if f.type == "int" else float(raw))
+        return state
+
+    def merge(self, other: "RollupState") -> "RollupState":
+        return RollupState(**{
+            f.name: getattr(self, f.name) + getattr(other, f.name)
+            for f in fields(self)
+        })
+
+    __add__ = merge
+
+    # ---- derived ----
+    @staticmethod
+    def _mean(total, n):
+        return total / n if n else 0.0
+
+    @staticmethod
+    def _stddev(total, sumsq, n):
+        if n < 2:
+            return 0.0
+        var = (sumsq - total * total / n) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+    @property
+    def placement_rate(self) -> float:
+        return 100.0 * self.hires / self.applications if self.applications else 0.0
+
+    @property
+    def avg_ers(self) -> float:
+        return self._mean(self.ers_sum, self.students)
+
+    @property
+    def ers_stddev(self) -> float:
+        return self._stddev(self.ers_sum, self.ers_sumsq, self.students)
+
+    @property
+    def avg_hired_score(self) -> float:
+        return self._mean(self.hired_score_sum, self.hired_score_n)
+
+    @property
+    def avg_salary(self) -> float:
+        return self._mean(self.salary_sum, self.salary_n)
+
+    @property
+    def salary_stddev(self) -> float:
+        return self._stddev(self.salary_sum, self.salary_sumsq, self.salary_n)
+
+    def summary(self) -> dict:
+        """Keys match the national_summary_metrics view it replaces."""
+        return {
+            "total_institutions": int(self.institutions),
+            "total_graduates_assessed": int(self.students),
+            "total_hires": int(self.hires),
+            "national_placement_rate_percent": round(self.placement_rate, 2),
+            "national_avg_ers_score": round(self.avg_ers, 2),
+            "national_ers_stddev": round(self.ers_stddev, 2),
+            "national_avg_salary": round(self.avg_salary, 0),
+            "national_salary_stddev": round(self.salary_stddev, 0),
+        }
+
+
+def _institution_row(row: dict) -> dict:
+    s = RollupState.from_row(row)
+    return {
+        "institution_id": row.get("institution_id"),
+        "institution_name": row.get("institution_name"),
+        "region": row.get("region"),
+        "national_score": float(row["national_score"]) if row.get("national_score") is not None else None,
+        "national_rank": row.get("national_rank"),
+        "performance_tier": row.get("performance_tier"),
+        "placement_rate": round(s.placement_rate, 2),
+        "avg_ers": round(s.avg_ers, 2),
+        "avg_hired_score": round(s.avg_hired_score, 2),
+        "avg_salary": round(s.avg_salary, 0),
+        "total_hires": int(s.hires),
+        "graduates_assessed": int(s.students),
+    }
+
+
+# ==========================================================
+# REFRESH (pg_cron normally; pages expose a manual button)
+# ==========================================================
+def _scalar(res) -> int:
+    data = getattr(res, "data", None)
+    if isinstance(data, list):
+        data = data[0] if data else 0
+    if isinstance(data, dict):
+        data = next(iter(data.values()), 0)
+    try:
+        return int(data or 0)
+    except Exception:
+        return 0
+
+
+def refresh_national_rollups() -> int:
+    """Fold dirty institutions into region / national totals. Returns institutions refreshed."""
+    return _scalar(supabase_admin.rpc("refresh_national_rollups", {}).execute())
+
+
+def rebuild_national_rollups() -> int:
+    """Reset every level and recompute all institutions."""
+    return _scalar(supabase_admin.rpc("rebuild_national_rollups", {}).execute())
+
+
+# ==========================================================
+# READS
+# ==========================================================
+def fetch_national_state() -> RollupState | None:
+    """National partial state, or None if sql/national_rollups.sql is not applied."""
+    try:
+        rows = supabase_admin.table("national_rollup").select("*").eq("id", 1).limit(1).execute().data or []
+    except Exception:
+        return None
+    return RollupState.from_row(rows[0]) if rows else None
+
+
+def fetch_region_rollups() -> list[dict]:
+    rows = supabase_admin.table("region_rollups").select("*").execute().data or []
+    out = []
+    for r in rows:
+        s = RollupState.from_row(r)
+        out.append({
+            "region": r.get("region"),
+            "institutions": int(s.institutions),
+            "graduates_assessed": int(s.students),
+            "total_hires": int(s.hires),
+            "placement_rate": round(s.placement_rate, 2),
+            "avg_ers": round(s.avg_ers, 2),
+            "ers_stddev": round(s.ers_stddev, 2),
+            "avg_salary": round(s.avg_salary, 0),
+        })
+    return sorted(out, key=lambda r: r["avg_ers"], reverse=True)
+
+
+def fetch_tier_distribution() -> list[dict]:
+    rows = supabase_admin.table("national_rollup_tiers").select("performance_tier, institution_count").execute().data or []
+    return sorted(rows, key=lambda r: r.get("performance_tier") or "")
+
+
+def fetch_institution_ranking(limit: int | None = None) -> list[dict]:
+    """Institutions by national_score, with derived KPI columns."""
+    q = (
+        supabase_admin.table("institution_rollup_partials")
+        .select("*")
+        .not_.is_("national_score", "null")
+        .order("national_score", desc=True)
+    )
+    if limit:
+        q = q.limit(limit)
+    return [_institution_row(r) for r in (q.execute().data or [])]
+
+
+def fetch_salary_leaders(limit: int = 10) -> list[dict]:
+    rows = (
+        supabase_admin.table("institution_rollup_partials")
+        .select("institution_name, salary_n, salary_sum")
+        .gt("salary_n", 0)
+        .execute()
+        .data
+        or []
+    )
+    out = [
+        {
+            "institution_name": r.get("institution_name"),
+            "avg_salary": round(float(r.get("salary_sum") or 0) / int(r.get("salary_n") or 1), 0),
+        }
+        for r in rows
+    ]
+    return sorted(out, key=lambda r: r["avg_salary"], reverse=True)[:limit]
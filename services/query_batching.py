@@ -0,0 +1,89 @@
+# ==========================================================
+# services/query_batching.py — chunked, concurrent .in_() reads
+#
+# PostgREST encodes .in_() filters in the GET URL; a few thousand
+# UUIDs overflow proxy / server URL limits and return one huge
+# response. These helpers split id lists into URL-safe chunks, fetch
+# them on a small bounded pool, and merge the rows. Each chunk is paged
+# with .range() so one-to-many matches are not cut at PostgREST's
+# max-rows.
+# ==========================================================
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+# ~40 URL chars per quoted UUID → ~6 KB per request
+IN_CHUNK_SIZE = 150
+IN_MAX_WORKERS = 4
+PAGE_SIZE = 1000
+
+
+def chunked(values, size: int = IN_CHUNK_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _unique_ids(ids) -> list:
+    return [i for i in dict.fromkeys(ids or []) if i is not None and i != ""]
+
+
+def fetch_in(
+    client,
+    table: str,
+    column: str,
+    ids,
+    select: str = "*",
+    modify=None,
+    chunk_size: int = IN_CHUNK_SIZE,
+    max_workers: int = IN_MAX_WORKERS,
+) -> list:
+    """
+    Rows of `table` where `column` is in `ids`, fetched chunk by chunk.
+    `modify(query) -> query` adds extra filters per chunk; any ordering
+    it adds comes after `column` (use it as a tie-breaker for paging).
+    Row order across chunks is not guaranteed; sort afterwards if needed.
+    """
+    ids = _unique_ids(ids)
+    if not ids:
+        return []
+
+    def _one(chunk):
+        rows, start = [], 0
+        while True:
+            q = client.table(table).select(select).in_(column, chunk).order(column)
+            if modify is not None:
+                q = modify(q)
+            batch = q.range(start, start + PAGE_SIZE - 1).execute().data or []
+            rows.extend(batch)
+            if len(batch) < PAGE_SIZE:
+                return rows
+            start += PAGE_SIZE
+
+    chunks = list(chunked(ids, chunk_size))
+    if len(chunks) == 1:
+        return _one(chunks[0])
+
+    rows = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        for part in pool.map(_one, chunks):
+            rows.extend(part)
+    return rows
+
+
+def fetch_in_map(
+    client,
+    table: str,
+    column: str,
+    ids,
+    select: str = "*",
+    key: str | None = None,
+    **kwargs,
+) -> dict:
+    """dict[key] -> row (key defaults to `column`; first row wins)."""
+    key = key or column
+    out = {}
+    for row in fetch_in(client, table, column, ids, select=select, **kwargs):
+        out.setdefault(row.get(key), row)
+    return out
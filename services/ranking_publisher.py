@@ -0,0 +1,268 @@
+# ==========================================================
+# services/ranking_publisher.py — static snapshot of the public ranking
+#
+# publish_ranking() renders the national ranking once into a versioned
+# artifact:
+#     <dir>/ranking-<version>.json   rows + every tier × sort view
+#     <dir>/ranking-<version>.parquet (when pyarrow is installed)
+#     <dir>/current.json             pointer to the live version
+# Version = content hash, so an unchanged ranking re-publishes nothing.
+#
+# load_published_ranking() serves visitors from the local artifact,
+# reloading only when the pointer's ETag (version) changes. When the
+# artifact is older than RANKING_PUBLISH_SECONDS one background thread
+# republishes (stale-while-revalidate); visitors never wait on, or hit,
+# the database except for the very first publish. A failed publish
+# backs off for RANKING_RETRY_SECONDS before anyone tries again.
+#
+# Cron alternative: python -m services.ranking_publisher
+# ==========================================================
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    import pandas as pd
+    _PARQUET = importlib.util.find_spec("pyarrow") is not None
+except Exception:
+    _PARQUET = False
+
+RANKING_SNAPSHOT_DIR = os.getenv("RANKING_SNAPSHOT_DIR", os.path.join(".cache", "public_ranking"))
+RANKING_PUBLISH_SECONDS = int(os.getenv("RANKING_PUBLISH_SECONDS", "600") or 600)
+RANKING_RETRY_SECONDS = int(os.getenv("RANKING_RETRY_SECONDS", "60") or 60)
+KEEP_VERSIONS = 3
+
+TIERS = ["All", "Tier A", "Tier B", "Tier C", "Tier D"]
+SORTS = {
+    "National Score": "national_score",
+    "Placement Rate": "placement_rate",
+    "Average ERS": "avg_ers",
+    "Average Hired Score": "avg_hired_score",
+    "Average Salary": "avg_salary",
+    "Total Hires": "total_hires",
+}
+COLUMNS = [
+    "institution_name",
+    "national_score",
+    "performance_tier",
+    "placement_rate",
+    "avg_ers",
+    "avg_hired_score",
+    "avg_salary",
+    "total_hires",
+]
+
+_POINTER = "current.json"
+
+_publish_lock = threading.Lock()
+_publishing = threading.Event()
+_publishing_guard = threading.Lock()
+_retry = {"next_attempt": 0.0}
+_loaded = {"etag": None, "artifact": None}
+_load_lock = threading.Lock()
+
+
+# ==========================================================
+# PUBLISH
+# ==========================================================
+def _fetch_rows() -> list:
+    from services.national_rollups import fetch_institution_ranking
+
+    try:
+        rows = fetch_institution_ranking()
+    except Exception:
+        # rollups not applied yet — legacy view
+        from config.supabase_client import supabase_admin
+
+        rows = (
+            supabase_admin.table("institution_national_tiers")
+            .select("*")
+            .order("national_score", desc=True)
+            .execute()
+            .data
+            or []
+        )
+    return [{c: r.get(c) for c in COLUMNS} for r in rows]
+
+
+def _num(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float("-inf")
+
+
+def _views(rows: list) -> dict:
+    """{tier: {sort label: [row index, ...]}} for every filter / sort pair."""
+    by_sort = {
+        label: sorted(range(len(rows)), key=lambda i, col=col: _num(rows[i].get(col)), reverse=True)
+        for label, col in SORTS.items()
+    }
+    views = {}
+    for tier in TIERS:
+        views[tier] = {
+            label: [i for i in order if tier == "All" or rows[i].get("performance_tier") == tier]
+            for label, order in by_sort.items()
+        }
+    return views
+
+
+def _write_atomic(path: str, text: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _prune(keep_version: str):
+    versions = sorted(
+        (
+            os.path.join(RANKING_SNAPSHOT_DIR, n)
+            for n in os.listdir(RANKING_SNAPSHOT_DIR)
+            if n.startswith("ranking-") and n.endswith(".json")
+        ),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for path in versions[KEEP_VERSIONS:]:
+        if keep_version in path:
+            continue
+        for p in (path, path[:-5] + ".parquet"):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+
+
+def publish_ranking() -> str:
+    """Render and publish the ranking; returns the live version."""
+    with _publish_lock:
+        rows = _fetch_rows()
+        body = json.dumps(rows, sort_keys=True, default=str)
+        version = hashlib.sha256(body.encode("utf-8")).hexdigest()[:16]
+        now = datetime.now(timezone.utc).isoformat()
+
+        os.makedirs(RANKING_SNAPSHOT_DIR, exist_ok=True)
+        data_path = os.path.join(RANKING_SNAPSHOT_DIR, f"ranking-{version}.json")
+
+        if not os.path.exists(data_path):
+            artifact = {
+                "version": version,
+                "published_at": now,
+                "columns": COLUMNS,
+                "rows": rows,
+                "views": _views(rows),
+            }
+            _write_atomic(data_path, json.dumps(artifact, default=str))
+
+            if _PARQUET:
+                try:
+                    pd.DataFrame(rows, columns=COLUMNS).to_parquet(data_path[:-5] + ".parquet", index=False)
+                except Exception:
+                    pass
+
+        # pointer is rewritten every time so its age tracks freshness
+        _write_atomic(
+            os.path.join(RANKING_SNAPSHOT_DIR, _POINTER),
+            json.dumps({"version": version, "published_at": now, "path": os.path.basename(data_path)}),
+        )
+        _prune(version)
+        return version
+
+
+def _republish_in_background():
+    with _publishing_guard:
+        if _publishing.is_set() or time.time() < _retry["next_attempt"]:
+            return
+        _publishing.set()
+
+    def _run():
+        try:
+            publish_ranking()
+        except Exception:
+            # keep serving the last artifact
+            _retry["next_attempt"] = time.time() + RANKING_RETRY_SECONDS
+        finally:
+            _publishing.clear()
+
+    threading.Thread(target=_run, name="talentiq-ranking-publisher", daemon=True).start()
+
+
+# ==========================================================
+# SERVE
+# ==========================================================
+class PublishedRanking:
+
+    def __init__(self, artifact: dict):
+        self.version = artifact.get("version")
+        self.published_at = artifact.get("published_at")
+        # last publish run (pointer), even if it found the ranking unchanged
+        self.refreshed_at = self.published_at
+        self.rows = artifact.get("rows") or []
+        self._views = artifact.get("views") or {}
+
+    def view(self, tier: str = "All", sort: str = "National Score") -> list:
+        order = (self._views.get(tier) or {}).get(sort)
+        if order is None:
+            order = range(len(self.rows))
+        return [self.rows[i] for i in order]
+
+
+def _read_pointer() -> dict | None:
+    try:
+        with open(os.path.join(RANKING_SNAPSHOT_DIR, _POINTER), encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def load_published_ranking() -> PublishedRanking | None:
+    """
+    The current artifact, reloaded only when its version (ETag) changes.
+    Publishes synchronously only if nothing has ever been published.
+    """
+    pointer = _read_pointer()
+
+    if pointer is None:
+        if time.time() < _retry["next_attempt"]:
+            return None
+        try:
+            publish_ranking()
+        except Exception:
+            _retry["next_attempt"] = time.time() + RANKING_RETRY_SECONDS
+            return None
+        pointer = _read_pointer()
+        if pointer is None:
+            return None
+    else:
+        try:
+            age = time.time() - os.path.getmtime(os.path.join(RANKING_SNAPSHOT_DIR, _POINTER))
+        except OSError:
+            age = 0
+        if age > RANKING_PUBLISH_SECONDS:
+            _republish_in_background()
+
+    etag = pointer.get("version")
+    with _load_lock:
+        if not (etag and _loaded["etag"] == etag):
+            try:
+                with open(os.path.join(RANKING_SNAPSHOT_DIR, pointer["path"]), encoding="utf-8") as f:
+                    _loaded.update(etag=etag, artifact=PublishedRanking(json.load(f)))
+            except Exception:
+                pass
+
+        artifact = _loaded["artifact"]
+        if artifact is not None and artifact.version == etag:
+            artifact.refreshed_at = pointer.get("published_at") or artifact.published_at
+        return artifact
+
+
+if __name__ == "__main__":
+    print(publish_ranking())
@@ -0,0 +1,298 @@
+# ==========================================================
+# services/scores_cache.py — local columnar cache of candidate scores
+#
+# Source: candidate_latest_scores (one row per student,
+# sql/candidate_latest_scores.sql); history=True caches the full
+# candidate_scores history instead.
+#
+# One Parquet file per institution (plus "_all" for admin views) with a
+# JSON sidecar holding the updated_at watermark. A load is:
+#   1. delta query: rows with updated_at >= watermark − overlap
+#   2. merge + rewrite only if the delta is non-empty
+#   3. memory-mapped Parquet read of the requested columns
+# The overlap re-reads rows from transactions that were still open at
+# the previous sync; duplicates collapse on the source's row key.
+# Deletes (and students moving institution) never show up in a delta,
+# so a remote row count that disagrees with the local file triggers a
+# full rebuild, and every file is rebuilt at least every
+# SCORES_REBUILD_SECONDS regardless.
+#
+# Watermark column: sql/candidate_scores_sync.sql.
+# pyarrow is optional — without it every load is a live pull.
+# ==========================================================
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from config.supabase_client import supabase_admin
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None
+    pq = None
+
+SCORES_CACHE_DIR = os.getenv("SCORES_CACHE_DIR", os.path.join(".cache", "candidate_scores"))
+SCORES_SYNC_INTERVAL_SECONDS = int(os.getenv("SCORES_SYNC_INTERVAL_SECONDS", "30") or 30)
+SCORES_REBUILD_SECONDS = int(os.getenv("SCORES_REBUILD_SECONDS", "900") or 900)
+SYNC_OVERLAP_SECONDS = 300
+PAGE_SIZE = 1000
+WATERMARK_COLUMN = "updated_at"
+
+LATEST_TABLE = "candidate_latest_scores"
+HISTORY_TABLE = "candidate_scores"
+
+# source table -> column identifying one logical row
+_ROW_KEYS = {LATEST_TABLE: "user_id", HISTORY_TABLE: "id"}
+
+_locks = {}
+_locks_guard = threading.Lock()
+_last_sync = {}  # cache key -> time.monotonic() of last delta check
+
+
+def _key(institution_id, table: str = LATEST_TABLE) -> str:
+    key = str(institution_id) if institution_id else "_all"
+    return key if table == LATEST_TABLE else f"{key}__history"
+
+
+def _paths(key: str):
+    base = os.path.join(SCORES_CACHE_DIR, key)
+    return base + ".parquet", base + ".json"
+
+
+def _lock(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _read_state(meta_path: str) -> dict:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f) or {}
+    except Exception:
+        return {}
+
+
+def _write_state(meta_path: str, state: dict):
+    tmp = meta_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, meta_path)
+
+
+# ==========================================================
+# REMOTE
+# ==========================================================
+def _fetch_rows(table: str, institution_id, since: str | None) -> list:
+    """All matching rows, paged past PostgREST's max-rows cap."""
+    rows, start = [], 0
+    while True:
+        q = supabase_admin.table(table).select("*")
+        if institution_id:
+            q = q.eq("institution_id", institution_id)
+        if since:
+            q = q.gte(WATERMARK_COLUMN, since)
+        batch = (
+            q.order(WATERMARK_COLUMN, desc=False)
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+            .data
+            or []
+        )
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def _remote_count(table: str, institution_id) -> int | None:
+    try:
+        q = supabase_admin.table(table).select(_ROW_KEYS[table], count="exact")
+        if institution_id:
+            q = q.eq("institution_id", institution_id)
+        return q.limit(1).execute().count
+    except Exception:
+        return None
+
+
+def _since(watermark: str | None) -> str | None:
+    if not watermark:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(watermark).replace("Z", "+00:00"))
+        return (dt - timedelta(seconds=SYNC_OVERLAP_SECONDS)).isoformat()
+    except Exception:
+        return None
+
+
+def _max_watermark(df: pd.DataFrame) -> str | None:
+    if df.empty or WATERMARK_COLUMN not in df.columns:
+        return None
+    ts = pd.to_datetime(df[WATERMARK_COLUMN], format="ISO8601", errors="coerce", utc=True).max()
+    return None if pd.isna(ts) else ts.isoformat()
+
+
+# ==========================================================
+# LOCAL
+# ==========================================================
+def _merge(base: pd.DataFrame | None, delta_rows: list, row_key: str) -> pd.DataFrame:
+    delta = pd.DataFrame(delta_rows)
+    if base is None or base.empty:
+        df = delta
+    else:
+        df = pd.concat([base, delta], ignore_index=True)
+    if row_key in df.columns:
+        df = df.drop_duplicates(row_key, keep="last")
+    return df.reset_index(drop=True)
+
+
+def _latest_from_history(rows: list) -> pd.DataFrame:
+    """Projection not applied yet: newest history row per user."""
+    df = pd.DataFrame(rows)
+    if df.empty or "user_id" not in df.columns:
+        return df
+    order = "created_at" if "created_at" in df.columns else WATERMARK_COLUMN
+    return (
+        df.sort_values(order, na_position="first")
+        .drop_duplicates("user_id", keep="last")
+        .reset_index(drop=True)
+    )
+
+
+def _live(institution_id, table: str, columns) -> pd.DataFrame:
+    try:
+        df = pd.DataFrame(_fetch_rows(table, institution_id, None))
+    except Exception:
+        if table != LATEST_TABLE:
+            raise
+        df = _latest_from_history(_fetch_rows(HISTORY_TABLE, institution_id, None))
+    return _select(df, columns)
+
+
+def _write_parquet(df: pd.DataFrame, data_path: str):
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    tmp = data_path + ".tmp"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+    os.replace(tmp, data_path)
+
+
+def _read_parquet(data_path: str, columns=None) -> pd.DataFrame:
+    if columns:
+        available = set(pq.read_schema(data_path).names)
+        columns = [c for c in columns if c in available]
+    return pq.read_table(data_path, columns=columns or None, memory_map=True).to_pandas()
+
+
+def _rebuild_due(state: dict) -> bool:
+    try:
+        rebuilt = datetime.fromisoformat(str(state["rebuilt_at"]).replace("Z", "+00:00"))
+    except Exception:
+        return True
+    return (datetime.now(timezone.utc) - rebuilt).total_seconds() >= SCORES_REBUILD_SECONDS
+
+
+def _sync(institution_id, table: str, key: str, force: bool):
+    data_path, meta_path = _paths(key)
+    exists = os.path.exists(data_path)
+    now = time.monotonic()
+
+    if exists and not force and now - _last_sync.get(key, float("-inf")) < SCORES_SYNC_INTERVAL_SECONDS:
+        return
+
+    state = _read_state(meta_path) if exists else {}
+    row_key = _ROW_KEYS[table]
+    incremental = exists and not force and bool(state.get("watermark")) and not _rebuild_due(state)
+
+    df = None
+    if incremental:
+        delta = _fetch_rows(table, institution_id, _since(state.get("watermark")))
+        remote = _remote_count(table, institution_id)
+
+        if not delta and remote in (None, state.get("rows")):
+            _last_sync[key] = now
+            return
+
+        df = _merge(pq.read_table(data_path).to_pandas(), delta, row_key)
+        if remote is not None and remote != len(df):
+            # rows were deleted or moved away: the delta cannot express that
+            incremental = False
+
+    if not incremental:
+        df = _merge(None, _fetch_rows(table, institution_id, None), row_key)
+        state["rebuilt_at"] = datetime.now(timezone.utc).isoformat()
+
+    _write_parquet(df, data_path)
+    _write_state(meta_path, {
+        "watermark": _max_watermark(df) or state.get("watermark"),
+        "synced_at": datetime.now(timezone.utc).isoformat(),
+        "rebuilt_at": state.get("rebuilt_at"),
+        "rows": int(len(df)),
+    })
+    _last_sync[key] = now
+
+
+def _select(df: pd.DataFrame, columns) -> pd.DataFrame:
+    if not columns or df.empty:
+        return df
+    return df[[c for c in columns if c in df.columns]]
+
+
+# ==========================================================
+# PUBLIC
+# ==========================================================
+def load_scores(
+    institution_id: str | None = None,
+    columns=None,
+    force: bool = False,
+    history: bool = False,
+) -> pd.DataFrame:
+    """
+    Latest score per student for one institution (None = every
+    institution) as a DataFrame; history=True returns every analysis.
+    `columns` limits what is read from disk; `force` rebuilds the local
+    file from a full pull.
+    """
+    table = HISTORY_TABLE if history else LATEST_TABLE
+    key = _key(institution_id, table)
+
+    if pq is None:
+        return _live(institution_id, table, columns)
+
+    data_path, _ = _paths(key)
+    with _lock(key):
+        try:
+            _sync(institution_id, table, key, force)
+        except Exception:
+            # Remote or disk failure: serve the last synced copy if any
+            if not os.path.exists(data_path):
+                return _live(institution_id, table, columns)
+
+        return _read_parquet(data_path, columns)
+
+
+def clear_scores_cache(institution_id: str | None = None):
+    """Drop one institution's cached files, or every file when None."""
+    keys = [_key(institution_id, t) for t in _ROW_KEYS] if institution_id else None
+
+    if keys is None:
+        try:
+            keys = {os.path.splitext(n)[0] for n in os.listdir(SCORES_CACHE_DIR)}
+        except FileNotFoundError:
+            keys = set()
+
+    for key in keys:
+        with _lock(key):
+            for path in _paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            _last_sync.pop(key, None)
@@ -1,48 +1,153 @@
+"""
+Skill gap engine — student supply vs employer demand per canonical skill.
+
+Counters live in Postgres (sql/skill_gap_counters.sql) and are kept
+current by triggers on job_postings / candidate_latest_scores. This
+module mirrors them in process:
+
+    demand : one Counter {skill_id: postings}, platform-wide
+    supply : one Counter per institution {skill_id: students}
+
+Each refresh pulls only counter rows whose updated_at moved (values are
+absolute, so re-reading an overlap is harmless). Top-gap queries are a
+heap selection over the merged counters.
+"""
+
+import heapq
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
 from services.supabase_client import supabase
+from services.query_batching import fetch_in_map
+
+SKILL_GAP_CHECK_SECONDS = 30
+COUNTER_OVERLAP_SECONDS = 300
+PAGE_SIZE = 1000
+
+_lock = threading.Lock()
+_names = {}        # skill_id -> canonical name
+_demand = {}       # state: {"counts", "version", "checked"}
+_supply = {}       # institution_id -> state
 
 
 # ------------------------------------------
-# STUDENT SKILL SUPPLY
+# COUNTER SYNC
 # ------------------------------------------
 
-def get_student_skill_supply(institution_id):
+def _since(version):
+    if not version:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(version).replace("Z", "+00:00"))
+        return (dt - timedelta(seconds=COUNTER_OVERLAP_SECONDS)).isoformat()
+    except Exception:
+        return None
+
+
+def _counter_rows(table, value_col, institution_id, since):
+    rows, start = [], 0
+    while True:
+        q = supabase.table(table).select(f"skill_id, {value_col}, updated_at")
+        if institution_id:
+            q = q.eq("institution_id", institution_id)
+        if since:
+            q = q.gte("updated_at", since)
+        else:
+            q = q.gt(value_col, 0)
+        batch = q.order("updated_at").range(start, start + PAGE_SIZE - 1).execute().data or []
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def _refresh(state, table, value_col, institution_id=None):
+    now = time.monotonic()
+    if state.get("counts") is not None and now - state.get("checked", 0) < SKILL_GAP_CHECK_SECONDS:
+        return state["counts"]
+
+    since = _since(state.get("version")) if state.get("counts") is not None else None
+    rows = _counter_rows(table, value_col, institution_id, since)
+
+    counts = Counter(state["counts"]) if since else Counter()
+    version = state.get("version") if since else None
+
+    for r in rows:
+        value = int(r.get(value_col) or 0)
+        if value > 0:
+            counts[r["skill_id"]] = value
+        else:
+            counts.pop(r["skill_id"], None)
+        version = max(version or "", r.get("updated_at") or "")
+
+    state.update(counts=counts, version=version, checked=now)
+    return counts
+
+
+def _resolve_names(skill_ids):
+    missing = [i for i in skill_ids if i not in _names]
+    if missing:
+        rows = fetch_in_map(supabase, "skill_catalog", "skill_id", missing, select="skill_id, canonical")
+        for sid, row in rows.items():
+            _names[sid] = row.get("canonical")
+
+
+def _counters(institution_id):
+    with _lock:
+        demand = _refresh(_demand, "skill_demand_counts", "demand")
+        supply = _refresh(
+            _supply.setdefault(institution_id, {}),
+            "skill_supply_counts",
+            "supply",
+            institution_id,
+        )
+        _resolve_names(set(demand) | set(supply))
+    return supply, demand
+
+
+def _by_name(counts):
+    return {_names.get(sid) or str(sid): n for sid, n in counts.items()}
 
-    result = (
-        supabase
-        .table("candidate_scores")
-        .select("skills")
-        .eq("institution_id", institution_id)
-        .execute()
-    )
 
-    data = result.data
+# ------------------------------------------
+# FULL-SCAN FALLBACK (counters not applied)
+# ------------------------------------------
 
-    skill_supply = {}
+def _count_skills(rows, column):
 
-    for row in data:
+    counts = Counter()
 
-        skills = row.get("skills")
+    for row in rows or []:
+
+        skills = row.get(column)
 
         if not skills:
             continue
 
-        skill_list = [s.strip().lower() for s in skills.split(",")]
+        if isinstance(skills, str):
+            skills = skills.split(",")
 
-        for skill in skill_list:
+        counts.update({s.strip().lower() for s in skills if s and s.strip()})
 
-            if skill not in skill_supply:
-                skill_supply[skill] = 0
+    return counts
 
-            skill_supply[skill] += 1
 
-    return skill_supply
+def _scan_supply(institution_id):
 
+    result = (
+        supabase
+        .table("candidate_latest_scores")
+        .select("skills")
+        .eq("institution_id", institution_id)
+        .execute()
+    )
 
-# ------------------------------------------
-# EMPLOYER SKILL DEMAND
-# ------------------------------------------
+    return _count_skills(result.data, "skills")
 
-def get_employer_skill_demand():
+
+def _scan_demand():
 
     result = (
         supabase
@@ -51,58 +156,71 @@ def get_employer_skill_demand():
         .execute()
     )
 
-    data = result.data
-
-    skill_demand = {}
+    return _count_skills(result.data, "skills_required")
 
-    for row in data:
 
-        skills = row.get("skills_required")
-
-        if not skills:
-            continue
+def _named_counters(institution_id):
+    try:
+        supply, demand = _counters(institution_id)
+        return _by_name(supply), _by_name(demand)
+    except Exception:
+        return _scan_supply(institution_id), _scan_demand()
 
-        skill_list = [s.strip().lower() for s in skills.split(",")]
 
-        for skill in skill_list:
+# ------------------------------------------
+# STUDENT SKILL SUPPLY
+# ------------------------------------------
 
-            if skill not in skill_demand:
-                skill_demand[skill] = 0
+def get_student_skill_supply(institution_id):
 
-            skill_demand[skill] += 1
+    supply, _ = _named_counters(institution_id)
 
-    return skill_demand
+    return dict(supply)
 
 
 # ------------------------------------------
-# SKILL GAP CALCULATION
+# EMPLOYER SKILL DEMAND
 # ------------------------------------------
 
-def calculate_skill_gap(institution_id):
+def get_employer_skill_demand():
 
-    supply = get_student_skill_supply(institution_id)
+    try:
+        with _lock:
+            demand = _refresh(_demand, "skill_demand_counts", "demand")
+            _resolve_names(set(demand))
+        return _by_name(demand)
+    except Exception:
+        return dict(_scan_demand())
 
-    demand = get_employer_skill_demand()
 
-    all_skills = set(supply.keys()).union(set(demand.keys()))
+# ------------------------------------------
+# SKILL GAP CALCULATION
+# ------------------------------------------
 
-    gap_results = []
+def _gap_rows(institution_id):
 
-    for skill in all_skills:
+    supply, demand = _named_counters(institution_id)
 
-        student_supply = supply.get(skill, 0)
+    for skill in supply.keys() | demand.keys():
 
+        student_supply = supply.get(skill, 0)
         employer_demand = demand.get(skill, 0)
 
-        gap = employer_demand - student_supply
-
-        gap_results.append({
+        yield {
             "skill": skill,
             "student_supply": student_supply,
             "employer_demand": employer_demand,
-            "gap": gap
-        })
+            "gap": employer_demand - student_supply,
+        }
+
+
+def top_skill_gaps(institution_id, k=15):
+    """The k largest gaps (demand − supply), largest first."""
 
-    gap_results.sort(key=lambda x: x["gap"], reverse=True)
+    return heapq.nlargest(k, _gap_rows(institution_id), key=lambda x: x["gap"])
+
+
+def calculate_skill_gap(institution_id):
+    """Every skill with supply or demand, largest gap first."""
 
-    return gap_results
\ No newline at end of file
+    return sorted(_gap_rows(institution_id), key=lambda x: x["gap"], reverse=True)
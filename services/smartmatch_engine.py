@@ -1,4 +1,5 @@
 from services.supabase_client import supabase
+from services.query_batching import fetch_in_map
 
 
 # ------------------------------------------
@@ -6,10 +7,10 @@ from services.supabase_client import supabase
 # ------------------------------------------
 def get_students(institution_id):
 
-    # Step 1: get candidate scores
+    # Step 1: get each student's latest score
     result = (
         supabase
-        .table("candidate_scores")
+        .table("candidate_latest_scores")
         .select("user_id, ers_score, cv_quality_score, trust_index, skills")
         .eq("institution_id", institution_id)
         .execute()
@@ -23,19 +24,8 @@ def get_students(institution_id):
     # Step 2: collect user_ids
     user_ids = [row["user_id"] for row in candidate_rows]
 
-    # Step 3: fetch user info
-    users_result = (
-        supabase
-        .table("users")
-        .select("id, full_name, email")
-        .in_("id", user_ids)
-        .execute()
-    )
-
-    users = users_result.data
-
-    # convert to dictionary
-    user_map = {u["id"]: u for u in users}
+    # Step 3: fetch user info (chunked — large institutions overflow one .in_())
+    user_map = fetch_in_map(supabase, "users", "id", user_ids, select="id, full_name, email")
 
     students = []
 
@@ -0,0 +1,132 @@
+# ==========================================================
+# services/sparse_heatmap.py — sparse faculty × skill grids
+#
+# Long (row, col, value) counts are kept as COO arrays; only the
+# visible slice (each row's top-K columns) is densified for Plotly.
+# Results are cached by a fingerprint of the input, so reruns with
+# unchanged data skip the build entirely.
+# ==========================================================
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+
+import numpy as np
+import pandas as pd
+
+HEATMAP_CACHE_SIZE = 32
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@dataclass
+class SparseGrid:
+    row_labels: np.ndarray
+    col_labels: np.ndarray
+    rows: np.ndarray       # COO row index per non-zero
+    cols: np.ndarray       # COO column index per non-zero
+    values: np.ndarray
+
+    @property
+    def shape(self):
+        return len(self.row_labels), len(self.col_labels)
+
+    @property
+    def nnz(self) -> int:
+        return int(self.values.size)
+
+    def dense(self, col_idx=None, row_idx=None) -> pd.DataFrame:
+        """Densify a slice (default: everything) as a labelled DataFrame."""
+        row_idx = np.arange(self.shape[0]) if row_idx is None else np.asarray(row_idx)
+        col_idx = np.arange(self.shape[1]) if col_idx is None else np.asarray(col_idx)
+
+        row_pos = np.full(self.shape[0], -1)
+        row_pos[row_idx] = np.arange(row_idx.size)
+        col_pos = np.full(self.shape[1], -1)
+        col_pos[col_idx] = np.arange(col_idx.size)
+
+        r, c = row_pos[self.rows], col_pos[self.cols]
+        keep = (r >= 0) & (c >= 0)
+
+        out = np.zeros((row_idx.size, col_idx.size), dtype=float)
+        np.add.at(out, (r[keep], c[keep]), self.values[keep])
+
+        return pd.DataFrame(
+            out,
+            index=pd.Index(self.row_labels[row_idx]),
+            columns=pd.Index(self.col_labels[col_idx]),
+        )
+
+
+def grid_from_long(df: pd.DataFrame, row: str, col: str, value: str) -> SparseGrid:
+    """
+    COO grid straight from long rows; duplicate cells are summed, zeros
+    dropped. Rows with a missing row / column label are skipped.
+    """
+    # astype(str) turns missing labels into "nan" / "None" strings, so
+    # drop them first
+    df = df[df[[row, col]].notna().all(axis=1)]
+    r_codes, r_labels = pd.factorize(df[row].astype(str), sort=True)
+    c_codes, c_labels = pd.factorize(df[col].astype(str), sort=True)
+
+    cells = pd.DataFrame({"r": r_codes, "c": c_codes, "v": pd.to_numeric(df[value], errors="coerce").fillna(0).to_numpy()})
+
+    cells = (
+        cells
+        .groupby(["r", "c"], sort=False)["v"]
+        .sum()
+    )
+    cells = cells[cells != 0]
+
+    return SparseGrid(
+        row_labels=np.asarray(r_labels),
+        col_labels=np.asarray(c_labels),
+        rows=cells.index.get_level_values("r").to_numpy(),
+        cols=cells.index.get_level_values("c").to_numpy(),
+        values=cells.to_numpy(dtype=float),
+    )
+
+
+def top_k_columns(grid: SparseGrid, k: int, max_columns: int | None = None) -> np.ndarray:
+    """
+    Union of every row's k largest-|value| columns, ordered by total
+    |value| across rows and capped at max_columns.
+    """
+    if grid.nnz == 0:
+        return np.array([], dtype=int)
+
+    cells = pd.DataFrame({"r": grid.rows, "c": grid.cols, "a": np.abs(grid.values)})
+    ranked = cells.sort_values(["r", "a"], ascending=[True, False])
+    picked = ranked[ranked.groupby("r").cumcount() < k]
+
+    weight = picked.groupby("c")["a"].sum().sort_values(ascending=False)
+    if max_columns:
+        weight = weight.head(max_columns)
+    return weight.index.to_numpy()
+
+
+def fingerprint(df: pd.DataFrame) -> int:
+    return int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+def cached_heatmap(df: pd.DataFrame, row: str, col: str, value: str, k: int, max_columns: int | None):
+    """Dense visible slice for the top-k columns per row, cached by input fingerprint."""
+    key = (fingerprint(df[[row, col, value]]), row, col, value, k, max_columns)
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    grid = grid_from_long(df, row, col, value)
+    out = grid.dense(col_idx=top_k_columns(grid, k, max_columns))
+
+    with _cache_lock:
+        _cache[key] = out
+        while len(_cache) > HEATMAP_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return out
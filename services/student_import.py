@@ -0,0 +1,320 @@
+# ==========================================================
+# services/student_import.py — streaming student registry import
+#
+# CSV is read in chunks (bounded memory), records are built with column
+# ops, and each batch is written with an upsert on
+# (institution_id, matric_number) — sql/users_app_matric_unique.sql.
+# New students get the activation defaults; existing ones only have
+# the roster fields the file actually provides refreshed (blank cells,
+# missing columns, credits and status are left alone).
+# A failing batch is bisected until the bad rows are isolated, so one
+# bad row costs ~log2(batch) extra requests instead of the import. An
+# error that cannot depend on the rows (ON CONFLICT index not applied,
+# permissions / JWT, unknown table or column, network) aborts the
+# import instead.
+# Every row of the file ends up in the report with a status; rows left
+# unwritten by an abort are reported as failed / not processed.
+# ==========================================================
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from config.supabase_client import supabase_admin
+from services.query_batching import fetch_in
+
+try:
+    import httpx
+    _TRANSPORT_ERRORS = (ConnectionError, TimeoutError, httpx.TransportError)
+except ImportError:
+    _TRANSPORT_ERRORS = (ConnectionError, TimeoutError)
+
+CHUNK_ROWS = 5000
+BATCH_SIZE = 500
+
+REQUIRED_COLUMNS = ["matric_number", "full_name", "faculty"]
+ROSTER_COLUMNS = ["full_name", "email", "faculty", "department", "program", "level"]
+
+NEW_STUDENT_DEFAULTS = {
+    "role": "student",
+    "status": "pending_activation",
+    "is_active": True,
+    "credit_balance": 0,
+    "subscription_plan": "FREEMIUM",
+}
+
+# status values in the report
+INSERTED = "inserted"
+UPDATED = "updated"
+DUPLICATE = "duplicate_in_file"
+INVALID = "invalid"
+FAILED = "failed"
+
+NOT_PROCESSED = "not processed (import stopped)"
+
+# Postgres / PostgREST error codes that fail every row the same way:
+# no unique index for ON CONFLICT, insufficient privilege, undefined
+# table / column, JWT rejected, column missing from the schema cache
+ABORT_CODES = {"42P10", "42501", "42P01", "42703", "PGRST301", "PGRST302", "PGRST303", "PGRST204"}
+
+
+class ImportFormatError(ValueError):
+    """The file itself is unusable (unreadable / missing required columns)."""
+
+
+class ImportAbortedError(RuntimeError):
+    """A write failure that affects every row, not a bad row."""
+
+
+@dataclass
+class ImportResult:
+    counts: dict = field(default_factory=lambda: {s: 0 for s in (INSERTED, UPDATED, DUPLICATE, INVALID, FAILED)})
+    report: list = field(default_factory=list)
+    aborted: str | None = None
+
+    def add(self, row_no, matric, name, status, error=None):
+        self.counts[status] += 1
+        self.report.append({
+            "row": row_no,
+            "matric_number": matric,
+            "full_name": name,
+            "status": status,
+            "error": error,
+        })
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def report_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.report, columns=["row", "matric_number", "full_name", "status", "error"])
+
+
+# ==========================================================
+# READ + NORMALISE
+# ==========================================================
+def normalise_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """'Matric_Number', ' matric number ' → 'matric_number'."""
+    df.columns = (
+        df.columns.astype(str)
+        .str.strip()
+        .str.lower()
+        .str.replace(r"[\s\-]+", "_", regex=True)
+    )
+    return df
+
+
+def read_chunks(file, chunk_rows: int = CHUNK_ROWS):
+    """
+    Yield normalised chunks. Every column is read as text so matric
+    numbers never go through float / scientific notation.
+    """
+    try:
+        reader = pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+        first = True
+        for chunk in reader:
+            chunk = normalise_columns(chunk)
+            if first:
+                missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+                if missing:
+                    raise ImportFormatError(f"Missing required columns: {missing}")
+                first = False
+            yield chunk
+    except ImportFormatError:
+        raise
+    except Exception as e:
+        raise ImportFormatError(f"Failed to read CSV file: {e}") from e
+
+
+def preview(file, rows: int = 10) -> pd.DataFrame:
+    df = normalise_columns(pd.read_csv(file, dtype=str, keep_default_na=False, nrows=rows))
+    file.seek(0)
+    return df
+
+
+def build_records(chunk: pd.DataFrame, first_row_no: int) -> pd.DataFrame:
+    """
+    Column-wise clean-up. Adds `_row` (1-based CSV line, header = 1)
+    and `_error` (validation message or None).
+    """
+    out = pd.DataFrame(index=chunk.index)
+    out["_row"] = range(first_row_no, first_row_no + len(chunk))
+
+    for col in ["matric_number"] + ROSTER_COLUMNS:
+        if col in chunk.columns:
+            s = chunk[col].astype(str).str.strip()
+            out[col] = s.where(s != "", None)
+        else:
+            out[col] = None
+
+    if "email" in chunk.columns:
+        out["email"] = out["email"].str.lower()
+
+    error = pd.Series(None, index=chunk.index, dtype=object)
+    for col in REQUIRED_COLUMNS:
+        error = error.where(out[col].notna(), error.fillna(f"missing {col}"))
+    out["_error"] = error
+
+    return out
+
+
+# ==========================================================
+# WRITE
+# ==========================================================
+def _upsert(rows: list) -> None:
+    supabase_admin.table("users_app").upsert(
+        rows, on_conflict="institution_id,matric_number"
+    ).execute()
+
+
+def _row_independent(e: Exception) -> bool:
+    return isinstance(e, _TRANSPORT_ERRORS) or str(getattr(e, "code", "") or "") in ABORT_CODES
+
+
+def _try_upsert(rows: list, meta: list, status: str, result: ImportResult) -> str | None:
+    """
+    Upsert rows and record them; returns the error text on failure.
+    Raises ImportAbortedError when the error is not about the rows.
+    """
+    try:
+        _upsert(rows)
+    except Exception as e:
+        if _row_independent(e):
+            raise ImportAbortedError(str(e)[:300]) from e
+        return str(e)[:300]
+    for m in meta:
+        result.add(m["_row"], m["matric_number"], m["full_name"], status)
+    return None
+
+
+def _bisect(rows: list, meta: list, status: str, result: ImportResult, error: str):
+    """`rows` failed with `error`: split in halves until single bad rows remain."""
+    if len(rows) == 1:
+        m = meta[0]
+        result.add(m["_row"], m["matric_number"], m["full_name"], FAILED, error)
+        return
+
+    mid = len(rows) // 2
+    halves = [(rows[:mid], meta[:mid]), (rows[mid:], meta[mid:])]
+    for r, m in halves:
+        err = _try_upsert(r, m, status, result)
+        if err is not None:
+            _bisect(r, m, status, result, err)
+
+
+def _write_bisect(rows: list, meta: list, status: str, result: ImportResult):
+    if not rows:
+        return
+    error = _try_upsert(rows, meta, status, result)
+    if error is not None:
+        _bisect(rows, meta, status, result, error)
+
+
+def _existing_matrics(institution_id, matrics: list) -> set:
+    modify = (
+        (lambda q: q.eq("institution_id", institution_id))
+        if institution_id
+        else (lambda q: q.is_("institution_id", "null"))
+    )
+    rows = fetch_in(
+        supabase_admin, "users_app", "matric_number", matrics,
+        select="matric_number", modify=modify,
+    )
+    return {r.get("matric_number") for r in rows}
+
+
+def _write_batch(batch: pd.DataFrame, institution_id, result: ImportResult):
+    existing = _existing_matrics(institution_id, batch["matric_number"].tolist())
+    is_existing = batch["matric_number"].isin(existing)
+
+    meta_cols = ["_row", "matric_number", "full_name"]
+
+    if not institution_id:
+        # NULL institution never conflicts, so an upsert would duplicate
+        for r in batch.loc[is_existing, meta_cols].itertuples(index=False):
+            result.add(r[0], r[1], r[2], DUPLICATE, "already registered without an institution")
+        batch = batch[~is_existing]
+        is_existing = is_existing[~is_existing]
+
+    # existing students: only the roster fields this row provides, so
+    # blank cells / missing columns never overwrite stored values.
+    # Rows are grouped by which fields they have (one upsert per shape).
+    upd = batch[is_existing]
+    if not upd.empty:
+        present = upd[ROSTER_COLUMNS].notna()
+        for shape, group in upd.groupby([present[c] for c in ROSTER_COLUMNS], sort=False):
+            cols = [c for c, has in zip(ROSTER_COLUMNS, shape) if has]
+            _write_bisect(
+                group[["matric_number"] + cols].assign(institution_id=institution_id).to_dict("records"),
+                group[meta_cols].to_dict("records"),
+                UPDATED,
+                result,
+            )
+
+    # new students: roster + activation defaults
+    new = batch[~is_existing]
+    new_rows = new[["matric_number"] + ROSTER_COLUMNS].assign(institution_id=institution_id, **NEW_STUDENT_DEFAULTS)
+    _write_bisect(
+        new_rows.astype(object).where(new_rows.notna(), None).to_dict("records"),
+        new[meta_cols].to_dict("records"),
+        INSERTED,
+        result,
+    )
+
+
+def _add_not_processed(recs: pd.DataFrame, result: ImportResult):
+    for r in recs[["_row", "matric_number", "full_name"]].itertuples(index=False):
+        result.add(r[0], r[1], r[2], FAILED, NOT_PROCESSED)
+
+
+def import_students(
+    file,
+    institution_id,
+    chunk_rows: int = CHUNK_ROWS,
+    batch_size: int = BATCH_SIZE,
+    on_progress=None,
+) -> ImportResult:
+    """
+    Stream `file` into users_app. Raises ImportFormatError for an
+    unusable file; row-level problems go to the report instead. A
+    failure that is not row-specific stops the import and is kept in
+    `result.aborted`; every row not written by then is reported as
+    FAILED / not processed.
+    on_progress(rows_done) is called after each batch.
+    """
+    result = ImportResult()
+    seen = set()
+    row_no = 2  # line 1 is the header
+
+    for chunk in read_chunks(file, chunk_rows):
+        recs = build_records(chunk, row_no)
+        row_no += len(chunk)
+
+        if result.aborted:
+            _add_not_processed(recs, result)
+            continue
+
+        for r in recs.loc[recs["_error"].notna(), ["_row", "matric_number", "full_name", "_error"]].itertuples(index=False):
+            result.add(r[0], r[1], r[2], INVALID, r[3])
+        recs = recs[recs["_error"].isna()]
+
+        dup = recs["matric_number"].duplicated() | recs["matric_number"].isin(seen)
+        for r in recs.loc[dup, ["_row", "matric_number", "full_name"]].itertuples(index=False):
+            result.add(r[0], r[1], r[2], DUPLICATE, "matric_number already in this file")
+        recs = recs[~dup]
+        seen.update(recs["matric_number"])
+
+        try:
+            for i in range(0, len(recs), batch_size):
+                _write_batch(recs.iloc[i:i + batch_size], institution_id, result)
+                if on_progress:
+                    on_progress(result.total)
+        except ImportAbortedError as e:
+            result.aborted = str(e)
+            done = {r["row"] for r in result.report}
+            _add_not_processed(recs[~recs["_row"].isin(done)], result)
+
+    result.report.sort(key=lambda r: r["row"])
+    return result
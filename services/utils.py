@@ -76,9 +76,9 @@ def is_admin(user_id: str) -> bool:
 # ==========================================================
 def get_subscription(user_id: str):
     """
-    ✅ FIX: Enforce expiry on read.
-    If end_date has passed, return credits=0 and status=expired,
-    and best-effort persist to DB.
+    Pure read. If end_date has passed, the returned row shows the
+    effective state (credits=0, status=expired); the DB row is expired by
+    services/expiry_sweeper.py, not here.
     """
     try:
         res = (
@@ -100,15 +100,6 @@ def get_subscription(user_id: str):
             row["subscription_status"] = "expired"
             row["credits"] = 0
 
-            # Best-effort persist (may be blocked by RLS; that's okay)
-            try:
-                supabase.table("subscriptions").update({
-                    "subscription_status": "expired",
-                    "credits": 0,
-                }).eq("user_id", user_id).execute()
-            except Exception:
-                pass
-
         return row
 
     except Exception:
@@ -127,29 +118,98 @@ def is_low_credit(subscription: dict | None, minimum_required: int = 20) -> bool
     return credits < int(minimum_required)
 
 # ==========================================================
-# CREDIT DEDUCTION (ATOMIC + RLS-SAFE)
+# CREDIT CHARGE (SINGLE ROUND-TRIP RPC)
 # ==========================================================
-def deduct_credits(user_id: str, amount: int):
+_CHARGE_MESSAGES = {
+    "no_subscription": "❌ No active subscription found. Please subscribe.",
+    "expired": "❌ Subscription expired or inactive. Please renew.",
+    "inactive": "❌ Subscription expired or inactive. Please renew.",
+    "insufficient": "❌ Insufficient credits. Please top up.",
+    "invalid_amount": "Invalid credit amount.",
+}
+
+
+def _invalidate_entitlements(user_id: str | None) -> None:
+    # Lazy: services/entitlements imports this module
+    try:
+        from services.entitlements import invalidate_entitlements
+        invalidate_entitlements(user_id)
+    except Exception:
+        pass
+
+
+def _is_missing_rpc(msg: str, name: str) -> bool:
+    return name in msg and ("not exist" in msg or "404" in msg or "PGRST202" in msg)
+
+
+def charge_credits(user_id: str, amount: int, tool: str | None = None):
     """
-    Deduct credits atomically using RPC (security definer).
-    IMPORTANT: user_id is kept for backward compatibility with your pages,
-    but the RPC MUST enforce auth.uid() inside Postgres.
+    Authorise + charge in ONE round-trip via the charge_credits RPC
+    (sql/charge_credits.sql). The RPC expires the subscription if
+    end_date has passed, checks status and balance, deducts, and returns
+    the resulting subscription snapshot. `tool` labels the credit_ledger row.
+
+    Returns (ok: bool, msg: str, subscription: dict | None).
+    user_id is kept for the legacy fallback; the RPC uses auth.uid().
+    """
+    try:
+        amount = int(amount)
+        if amount <= 0:
+            return False, _CHARGE_MESSAGES["invalid_amount"], None
+
+        res = supabase.rpc("charge_credits", {"p_amount": amount, "p_tool": tool}).execute()
+        row = _safe_single(res)
+        if not row:
+            return False, "❌ Credit deduction did not complete (RPC returned no result).", None
+
+        snapshot = {
+            "user_id": user_id,
+            "plan": row.get("plan"),
+            "credits": int(row.get("new_credits") or 0),
+            "subscription_status": row.get("subscription_status"),
+            "start_date": row.get("start_date"),
+            "end_date": row.get("end_date"),
+        }
+
+        result = (row.get("result") or "").lower()
+        _invalidate_entitlements(user_id)
+        if result != "ok":
+            return False, _CHARGE_MESSAGES.get(result, f"❌ Credit deduction failed: {result}"), snapshot
+
+        return True, f"✅ {amount} credits deducted. New balance: {snapshot['credits']}", snapshot
+
+    except Exception as e:
+        msg = str(e)
+
+        # DB not migrated yet → old multi-step chain
+        if _is_missing_rpc(msg, "charge_credits"):
+            ok, legacy_msg = _deduct_credits_legacy(user_id, amount)
+            _invalidate_entitlements(user_id)
+            return ok, legacy_msg, None
+
+        return False, f"❌ Credit deduction failed: {msg}", None
+
+
+def deduct_credits(user_id: str, amount: int, tool: str | None = None):
+    """
+    Thin wrapper over charge_credits() kept for existing pages.
     Returns (ok: bool, msg: str)
+    """
+    ok, msg, _ = charge_credits(user_id, amount, tool=tool)
+    return ok, msg
+
 
-    ✅ FIX: Block spending immediately if subscription is expired (end_date passed),
-    and best-effort zero credits + mark expired.
+def _deduct_credits_legacy(user_id: str, amount: int):
+    """
+    Pre-charge_credits chain (expire → read → consume_credits RPC).
+    Only used when the charge_credits RPC is not installed.
+    Returns (ok: bool, msg: str)
     """
     try:
         amount = int(amount)
         if amount <= 0:
             return False, "Invalid credit amount."
 
-        # ✅ Enforce expiry before any consumption
-        try:
-            auto_expire_subscription(user_id)
-        except Exception:
-            pass
-
         sub = get_subscription(user_id)
         if not sub:
             return False, "❌ No active subscription found. Please subscribe."
@@ -158,20 +218,6 @@ def deduct_credits(user_id: str, amount: int):
         if status != "active":
             return False, "❌ Subscription expired or inactive. Please renew."
 
-        # Extra safety: even if status says active, end_date could already be past
-        end_date = sub.get("end_date")
-        expiry = _parse_dt(end_date) if end_date else None
-        if expiry and expiry <= _utcnow():
-            # Best-effort persist
-            try:
-                supabase.table("subscriptions").update({
-                    "subscription_status": "expired",
-                    "credits": 0,
-                }).eq("user_id", user_id).execute()
-            except Exception:
-                pass
-            return False, "❌ Subscription expired or inactive. Please renew."
-
         # ✅ Preferred (safe): RPC function uses auth.uid() internally
         res = supabase.rpc("consume_credits", {"p_amount": amount}).execute()
         data = getattr(res, "data", None)
@@ -198,8 +244,8 @@ def deduct_credits(user_id: str, amount: int):
             return False, "❌ Insufficient credits. Please top up."
         if "No active subscription found" in msg:
             return False, "❌ No active subscription found. Please subscribe."
-        if "consume_credits" in msg and ("not exist" in msg or "404" in msg):
-            return False, "❌ Credit deduction function is missing in DB. Run the SQL to create consume_credits()."
+        if _is_missing_rpc(msg, "consume_credits"):
+            return False, "❌ Credit deduction function is missing in DB. Run sql/charge_credits.sql."
 
         return False, f"❌ Credit deduction failed: {msg}"
 
@@ -208,44 +254,35 @@ def deduct_credit(user_id: str, amount: int):
     return deduct_credits(user_id, amount)
 
 # ==========================================================
-# AUTO EXPIRATION
+# EFFECTIVE EXPIRY (IN MEMORY — NO WRITES ON READ PATHS)
 # ==========================================================
-def auto_expire_subscription(user_id: str):
+def auto_expire_subscription(user_id: str) -> bool:
     """
-    If your subscriptions table has strict RLS, this update may be blocked.
-    That's okay; it won't break the app. (Credits logic is handled by RPC.)
-    ✅ FIX: expiry comparison now works reliably (timezone-aware parse).
+    Kept for older imports. Returns True if the subscription is past
+    end_date. Persisting the expiry is done by services/expiry_sweeper.py.
     """
-    try:
-        res = (
-            supabase.table("subscriptions")
-            .select("end_date, subscription_status")
-            .eq("user_id", user_id)
-            .limit(1)
-            .execute()
-        )
-        row = _safe_single(res)
-        if not row:
-            return
+    sub = get_subscription(user_id) or {}
+    return (sub.get("subscription_status") or "").lower() == "expired"
 
-        if (row.get("subscription_status") or "").lower() != "active":
-            return
 
-        end_date = row.get("end_date")
-        if not end_date:
-            return
-
-        expiry = _parse_dt(end_date)
-        if not expiry:
-            return
-
-        if expiry <= _utcnow():
-            supabase.table("subscriptions").update({
-                "subscription_status": "expired",
-                "credits": 0,
-            }).eq("user_id", user_id).execute()
-    except Exception:
-        pass
+def effective_license_status(
+    row: dict | None,
+    status_key: str = "license_status",
+    expires_key: str = "subscription_expires_at",
+    default: str = "trial",
+) -> str:
+    """
+    Institution / employer licence status as it should be enforced now:
+    stored status, overridden to "expired" once the expiry date has passed.
+    """
+    row = row or {}
+    status = (row.get(status_key) or default).lower().strip()
+
+    expiry = _parse_dt(row.get(expires_key))
+    if expiry and expiry < _utcnow():
+        return "expired"
+
+    return status
 
 # ==========================================================
 # ADMIN CREDIT ADJUSTMENT
@@ -293,6 +330,7 @@ def adjust_user_credits(user_id: str, delta: int, reason: str, admin_id: str):
     except Exception:
         pass
 
+    _invalidate_entitlements(user_id)
     return new_balance
 
 # ==========================================================
@@ -341,6 +379,8 @@ def apply_plan_to_subscription(user_id: str, plan: str):
             "end_date": new_end.isoformat(),
         }).execute()
 
+    _invalidate_entitlements(user_id)
+
 def activate_subscription(user_id: str, plan: str):
     apply_plan_to_subscription(user_id, plan)
 
@@ -0,0 +1,201 @@
+-- ==========================================================
+-- Admin rollups — incremental revenue + credit aggregates
+-- Read by services/admin_rollups.py (pages 9_Admin_Revenue, 13_Admin_Credit_Usage).
+--
+-- refresh_admin_rollups() (schedule every 5–15 min, e.g. pg_cron:
+--   select cron.schedule('admin-rollups', '*/10 * * * *', 'select public.refresh_admin_rollups()');
+-- ) folds only rows changed since the stored watermarks into:
+--   revenue_daily          : per-day / plan approved revenue
+--   revenue_payers         : distinct paying users (first approval)
+--   subscription_plan_totals : per-plan / status subscription counts + credits
+-- Watermarks:
+--   subscription_payments.approved_at  (status = approved)
+--   subscriptions.updated_at           (kept current by a trigger below)
+-- Both stop 5 minutes short of now() so rows from still-open
+-- transactions are not skipped; pages add that small tail live.
+-- ==========================================================
+
+-- ----------------------------------------------------------
+-- subscriptions.updated_at must move on every write
+-- ----------------------------------------------------------
+alter table public.subscriptions add column if not exists updated_at timestamptz default now();
+alter table public.subscriptions alter column updated_at set default now();
+
+-- Rows written before the trigger (or by inserts that omit the column)
+-- may hold NULL, which never passes the watermark. Stamp them now() so
+-- the next refresh counts them whatever the watermark already is.
+update public.subscriptions
+set updated_at = now()
+where updated_at is null;
+
+create or replace function public.touch_subscription_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists subscriptions_touch_updated_at on public.subscriptions;
+create trigger subscriptions_touch_updated_at
+    before insert or update on public.subscriptions
+    for each row execute function public.touch_subscription_updated_at();
+
+create index if not exists subscriptions_updated_at_idx
+    on public.subscriptions (updated_at);
+
+create index if not exists subscription_payments_approved_at_idx
+    on public.subscription_payments (approved_at)
+    where status = 'approved';
+
+
+-- ----------------------------------------------------------
+-- Rollup tables
+-- ----------------------------------------------------------
+create table if not exists public.admin_rollup_state (
+    id                      integer primary key default 1 check (id = 1),
+    payments_watermark      timestamptz not null default '-infinity',
+    subscriptions_watermark timestamptz not null default '-infinity',
+    updated_at              timestamptz not null default now()
+);
+
+insert into public.admin_rollup_state (id) values (1)
+on conflict (id) do nothing;
+
+create table if not exists public.revenue_daily (
+    day         date not null,
+    plan        text not null default '',
+    revenue     bigint not null default 0,
+    payments    integer not null default 0,
+    primary key (day, plan)
+);
+
+create table if not exists public.revenue_payers (
+    user_id         uuid primary key,
+    first_paid_at   timestamptz not null
+);
+
+-- Last folded state per subscription, so changes apply as deltas
+create table if not exists public.subscription_rollup_rows (
+    user_id             uuid primary key,
+    plan                text not null default '',
+    subscription_status text not null default '',
+    credits             integer not null default 0
+);
+
+create table if not exists public.subscription_plan_totals (
+    plan                text not null,
+    subscription_status text not null,
+    subscriptions       integer not null default 0,
+    credits             bigint not null default 0,
+    primary key (plan, subscription_status)
+);
+
+alter table public.admin_rollup_state enable row level security;
+alter table public.revenue_daily enable row level security;
+alter table public.revenue_payers enable row level security;
+alter table public.subscription_rollup_rows enable row level security;
+alter table public.subscription_plan_totals enable row level security;
+
+
+-- ----------------------------------------------------------
+-- Refresh
+-- ----------------------------------------------------------
+create or replace function public.refresh_admin_rollups()
+returns table (payments_folded integer, subscriptions_folded integer,
+               payments_watermark timestamptz, subscriptions_watermark timestamptz)
+language plpgsql
+security definer
+set search_path = public
+as $$
+#variable_conflict use_column
+declare
+    v_pay_from timestamptz;
+    v_sub_from timestamptz;
+    v_to       timestamptz := now() - interval '5 minutes';
+    v_pay_n    integer := 0;
+    v_sub_n    integer := 0;
+begin
+    select s.payments_watermark, s.subscriptions_watermark
+    into v_pay_from, v_sub_from
+    from public.admin_rollup_state s
+    where s.id = 1
+    for update;
+
+    -- ---- revenue ----
+    create temporary table _new_payments on commit drop as
+    select sp.user_id, sp.plan, sp.approved_at, coalesce(sp.amount, 0)::bigint as amount
+    from public.subscription_payments sp
+    where sp.status = 'approved'
+      and sp.approved_at > v_pay_from
+      and sp.approved_at <= v_to;
+
+    get diagnostics v_pay_n = row_count;
+
+    insert into public.revenue_daily as d (day, plan, revenue, payments)
+    select (np.approved_at at time zone 'utc')::date, coalesce(np.plan, ''), sum(np.amount), count(*)
+    from _new_payments np
+    group by 1, 2
+    on conflict (day, plan) do update
+    set revenue  = d.revenue + excluded.revenue,
+        payments = d.payments + excluded.payments;
+
+    insert into public.revenue_payers (user_id, first_paid_at)
+    select np.user_id, min(np.approved_at)
+    from _new_payments np
+    where np.user_id is not null
+    group by np.user_id
+    on conflict (user_id) do nothing;
+
+    -- ---- subscriptions (apply old → new as deltas) ----
+    create temporary table _changed_subs on commit drop as
+    select s.user_id,
+           coalesce(s.plan, '') as plan,
+           lower(coalesce(s.subscription_status, '')) as subscription_status,
+           coalesce(s.credits, 0) as credits
+    from public.subscriptions s
+    where s.updated_at > v_sub_from
+      and s.updated_at <= v_to;
+
+    get diagnostics v_sub_n = row_count;
+
+    insert into public.subscription_plan_totals as t (plan, subscription_status, subscriptions, credits)
+    select x.plan, x.subscription_status, sum(x.n)::integer, sum(x.credits)
+    from (
+        select r.plan, r.subscription_status, -1 as n, -r.credits::bigint as credits
+        from public.subscription_rollup_rows r
+        join _changed_subs c on c.user_id = r.user_id
+        union all
+        select c.plan, c.subscription_status, 1, c.credits::bigint
+        from _changed_subs c
+    ) x
+    group by x.plan, x.subscription_status
+    on conflict (plan, subscription_status) do update
+    set subscriptions = t.subscriptions + excluded.subscriptions,
+        credits       = t.credits + excluded.credits;
+
+    delete from public.subscription_plan_totals where subscriptions = 0 and credits = 0;
+
+    insert into public.subscription_rollup_rows as r (user_id, plan, subscription_status, credits)
+    select c.user_id, c.plan, c.subscription_status, c.credits
+    from _changed_subs c
+    on conflict (user_id) do update
+    set plan                = excluded.plan,
+        subscription_status = excluded.subscription_status,
+        credits             = excluded.credits;
+
+    update public.admin_rollup_state
+    set payments_watermark      = greatest(payments_watermark, v_to),
+        subscriptions_watermark = greatest(subscriptions_watermark, v_to),
+        updated_at              = now()
+    where id = 1;
+
+    return query
+    select v_pay_n, v_sub_n, v_to, v_to;
+end;
+$$;
+
+revoke all on function public.refresh_admin_rollups() from public;
+grant execute on function public.refresh_admin_rollups() to service_role;
@@ -0,0 +1,26 @@
+-- ==========================================================
+-- ai_call_metrics — per-call LLM telemetry (services/ai_metrics.py)
+-- ==========================================================
+
+create table if not exists public.ai_call_metrics (
+    id                bigserial primary key,
+    created_at        timestamptz not null default now(),
+    tool              text not null,
+    model             text,
+    prompt_tokens     integer not null default 0,
+    completion_tokens integer not null default 0,
+    total_tokens      integer not null default 0,
+    latency_ms        integer not null default 0,
+    cache_hit         boolean not null default false,
+    fallback_used     boolean not null default false,
+    status            text not null default 'ok'
+);
+
+create index if not exists ai_call_metrics_created_at_idx
+    on public.ai_call_metrics (created_at desc);
+
+create index if not exists ai_call_metrics_tool_created_at_idx
+    on public.ai_call_metrics (tool, created_at desc);
+
+-- Written with the service key only
+alter table public.ai_call_metrics enable row level security;
@@ -0,0 +1,173 @@
+-- ==========================================================
+-- approve_payments_bulk(payment_ids, admin_id) — batch approval
+-- Used by pages/12_Admin_Payments.py ("Bulk approve").
+-- Requires sql/credit_ledger.sql (credit grants are labelled for the ledger).
+--
+-- One transaction, set-based:
+--   1. lock the selected subscription_payments rows (skip rows another
+--      admin is approving right now)
+--   2. classify each requested id: approved | already_approved |
+--      not_pending | invalid_plan | busy | not_found
+--   3. aggregate approvable payments per user (several payments for one
+--      user add up), lock their subscriptions rows, and apply credits +
+--      end_date with one UPDATE and one INSERT
+--   4. mark those payments approved
+-- and return one row per requested id.
+--
+-- Idempotent: only rows still 'pending' under the lock are applied, so a
+-- retried batch reports already_approved instead of granting twice.
+-- Plan credits / durations mirror PLANS in 12_Admin_Payments.py.
+-- ==========================================================
+
+create or replace function public.approve_payments_bulk(
+    p_payment_ids text[],
+    p_admin_id    uuid
+)
+returns table (
+    payment_id     text,
+    result         text,
+    user_id        uuid,
+    plan           text,
+    credits_before integer,
+    credits_after  integer,
+    end_date       timestamptz
+)
+language plpgsql
+security definer
+set search_path = public
+as $$
+#variable_conflict use_column
+declare
+    v_now     timestamptz := now();
+    v_id_type text;
+begin
+    perform public.set_credit_context('grant', 'payment_approval', null);
+
+    create temporary table _bulk_plans (plan text primary key, credits integer, days integer)
+        on commit drop;
+    insert into _bulk_plans values
+        ('FREEMIUM', 50, 7),
+        ('BASIC', 500, 90),
+        ('PRO', 1150, 180),
+        ('PREMIUM', 2500, 365),
+        ('ADMIN', 100000, 3650);
+
+    -- Requested ids cast once to the type of subscription_payments.id,
+    -- so lookups below compare the bare column and can use its index
+    select format_type(a.atttypid, a.atttypmod) into v_id_type
+    from pg_attribute a
+    where a.attrelid = 'public.subscription_payments'::regclass
+      and a.attname = 'id';
+
+    execute format(
+        'create temporary table _bulk_ids (payment_id text primary key, id %s) on commit drop',
+        v_id_type
+    );
+    execute format(
+        'insert into _bulk_ids select distinct x, x::%s from unnest($1) x',
+        v_id_type
+    ) using p_payment_ids;
+
+    -- 1 + 2: lock and classify
+    create temporary table _bulk on commit drop as
+    with locked as (
+        select i.payment_id, sp.user_id, sp.plan, lower(coalesce(sp.status, '')) as status
+        from _bulk_ids i
+        join public.subscription_payments sp on sp.id = i.id
+        for update of sp skip locked
+    )
+    select
+        r.payment_id,
+        case
+            when l.payment_id is null and exists (
+                select 1 from public.subscription_payments sp where sp.id = r.id
+            )                              then 'busy'
+            when l.payment_id is null      then 'not_found'
+            when l.status = 'approved'     then 'already_approved'
+            when l.status <> 'pending'     then 'not_pending'
+            when bp.plan is null           then 'invalid_plan'
+            else 'approved'
+        end as result,
+        l.user_id,
+        l.plan,
+        coalesce(bp.credits, 0) as credits,
+        coalesce(bp.days, 0) as days
+    from _bulk_ids r
+    left join locked l on l.payment_id = r.payment_id
+    left join _bulk_plans bp on bp.plan = l.plan;
+
+    -- 3: per-user totals (latest plan wins when one user has several)
+    create temporary table _bulk_users on commit drop as
+    select
+        b.user_id,
+        sum(b.credits)::integer as add_credits,
+        sum(b.days)::integer as add_days,
+        (array_agg(b.plan order by b.payment_id desc))[1] as plan
+    from _bulk b
+    where b.result = 'approved'
+    group by b.user_id;
+
+    alter table _bulk_users add column credits_before integer, add column credits_after integer,
+        add column end_date timestamptz;
+
+    -- Hold the balances until commit so a concurrent charge / reservation
+    -- cannot land between the read below and the write
+    perform 1
+    from public.subscriptions s
+    where s.user_id in (select user_id from _bulk_users)
+    order by s.user_id
+    for update of s;
+
+    update _bulk_users u
+    set credits_before = coalesce(s.credits, 0)
+    from public.subscriptions s
+    where s.user_id = u.user_id;
+
+    update _bulk_users
+    set credits_before = coalesce(credits_before, 0),
+        credits_after  = greatest(0, coalesce(credits_before, 0) + add_credits),
+        end_date       = v_now + make_interval(days => add_days);
+
+    update public.subscriptions s
+    set credits             = greatest(0, coalesce(s.credits, 0) + u.add_credits),
+        plan                = u.plan,
+        end_date            = u.end_date,
+        subscription_status = 'active',
+        updated_at          = v_now
+    from _bulk_users u
+    where s.user_id = u.user_id;
+
+    insert into public.subscriptions (user_id, plan, credits, amount, subscription_status, start_date, end_date, created_at)
+    select u.user_id, u.plan, u.credits_after, coalesce(p.amount, 0), 'active', v_now, u.end_date, v_now
+    from _bulk_users u
+    left join lateral (
+        select sum(coalesce(sp.amount, 0))::integer as amount
+        from _bulk b
+        join _bulk_ids i on i.payment_id = b.payment_id
+        join public.subscription_payments sp on sp.id = i.id
+        where b.result = 'approved'
+          and sp.user_id = u.user_id
+    ) p on true
+    where not exists (select 1 from public.subscriptions s where s.user_id = u.user_id);
+
+    -- 4: mark approved
+    update public.subscription_payments sp
+    set status      = 'approved',
+        approved_by = p_admin_id,
+        approved_at = v_now
+    from _bulk b
+    join _bulk_ids i on i.payment_id = b.payment_id
+    where b.result = 'approved'
+      and sp.id = i.id;
+
+    return query
+    select b.payment_id, b.result, b.user_id, b.plan,
+           u.credits_before, u.credits_after, u.end_date
+    from _bulk b
+    left join _bulk_users u on u.user_id = b.user_id and b.result = 'approved'
+    order by b.payment_id;
+end;
+$$;
+
+revoke all on function public.approve_payments_bulk(text[], uuid) from public;
+grant execute on function public.approve_payments_bulk(text[], uuid) to service_role;
@@ -0,0 +1,97 @@
+-- ==========================================================
+-- candidate_latest_scores — newest candidate_scores row per user
+--
+-- candidate_scores keeps one row per CV analysis (29_CV_Analyzer
+-- inserts, never updates). Every "current score" read and every
+-- institution aggregate reads this projection instead, so work and
+-- KPIs track students, not attempts. History stays in candidate_scores
+-- (31_CV_Analysis_History, get_candidate_score(history=True)).
+--
+-- Same columns as candidate_scores (create table ... like), so a
+-- column added to candidate_scores must be added here too.
+-- Maintained by an after-trigger on candidate_scores; apply after
+-- sql/candidate_scores_sync.sql (updated_at is the cache watermark).
+-- ==========================================================
+
+create table if not exists public.candidate_latest_scores (
+    like public.candidate_scores including defaults
+);
+
+create unique index if not exists candidate_latest_scores_user_uidx
+    on public.candidate_latest_scores (user_id);
+
+create index if not exists candidate_latest_scores_institution_updated_idx
+    on public.candidate_latest_scores (institution_id, updated_at);
+
+create index if not exists candidate_latest_scores_ers_idx
+    on public.candidate_latest_scores (ers_score desc nulls last);
+
+create index if not exists candidate_scores_user_created_idx
+    on public.candidate_scores (user_id, created_at desc);
+
+alter table public.candidate_latest_scores enable row level security;
+
+
+-- ----------------------------------------------------------
+-- Rebuild one user's projection row from history
+-- ----------------------------------------------------------
+create or replace function public.refresh_candidate_latest_score(p_user_id uuid)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    -- serialise concurrent analyses for the same user
+    perform pg_advisory_xact_lock(hashtext('candidate_latest_scores:' || p_user_id::text));
+
+    delete from public.candidate_latest_scores where user_id = p_user_id;
+
+    insert into public.candidate_latest_scores
+    select cs.*
+    from public.candidate_scores cs
+    where cs.user_id = p_user_id
+    order by cs.created_at desc nulls last, cs.updated_at desc nulls last
+    limit 1;
+end;
+$$;
+
+create or replace function public.sync_candidate_latest_score()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') and old.user_id is not null then
+        perform public.refresh_candidate_latest_score(old.user_id);
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE') and new.user_id is not null
+       and (tg_op = 'INSERT' or new.user_id is distinct from old.user_id) then
+        perform public.refresh_candidate_latest_score(new.user_id);
+    end if;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists candidate_scores_sync_latest on public.candidate_scores;
+create trigger candidate_scores_sync_latest
+    after insert or update or delete on public.candidate_scores
+    for each row execute function public.sync_candidate_latest_score();
+
+
+-- ----------------------------------------------------------
+-- Backfill
+-- ----------------------------------------------------------
+insert into public.candidate_latest_scores
+select distinct on (cs.user_id) cs.*
+from public.candidate_scores cs
+where cs.user_id is not null
+order by cs.user_id, cs.created_at desc nulls last, cs.updated_at desc nulls last
+on conflict (user_id) do nothing;
+
+revoke all on function public.refresh_candidate_latest_score(uuid) from public;
+grant execute on function public.refresh_candidate_latest_score(uuid) to service_role;
+grant select on public.candidate_latest_scores to service_role;
@@ -0,0 +1,36 @@
+-- ==========================================================
+-- candidate_scores.updated_at — delta-sync watermark
+-- Read by services/scores_cache.py, which keeps a local Parquet copy
+-- of each institution's candidate_scores and pulls only rows whose
+-- updated_at is past its stored watermark.
+--
+-- Writers set updated_at inconsistently (cv_score_writer omits it),
+-- so a trigger stamps every insert / update.
+-- ==========================================================
+
+alter table public.candidate_scores add column if not exists updated_at timestamptz default now();
+
+update public.candidate_scores
+set updated_at = coalesce(created_at, now())
+where updated_at is null;
+
+create or replace function public.touch_candidate_score_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists candidate_scores_touch_updated_at on public.candidate_scores;
+create trigger candidate_scores_touch_updated_at
+    before insert or update on public.candidate_scores
+    for each row execute function public.touch_candidate_score_updated_at();
+
+create index if not exists candidate_scores_institution_updated_idx
+    on public.candidate_scores (institution_id, updated_at);
+
+create index if not exists candidate_scores_updated_at_idx
+    on public.candidate_scores (updated_at);
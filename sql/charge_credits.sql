@@ -0,0 +1,103 @@
+-- ==========================================================
+-- charge_credits(p_amount) — single round-trip credit charge
+-- Replaces: auto_expire_subscription() + get_subscription() + consume_credits()
+-- Used by services/utils.charge_credits()
+-- Requires sql/credit_ledger.sql (balance changes are labelled for the ledger).
+--
+-- In one transaction, under a row lock on the caller's subscription:
+--   1. expire it if end_date has passed (status=expired, credits=0)
+--   2. check status = active
+--   3. check credits >= p_amount
+--   4. deduct
+-- and return the outcome plus the resulting subscription snapshot.
+--
+-- result: ok | no_subscription | expired | inactive | insufficient | invalid_amount
+-- ==========================================================
+
+drop function if exists public.charge_credits(integer);
+
+create or replace function public.charge_credits(p_amount integer, p_tool text default null)
+returns table (
+    result              text,
+    new_credits         integer,
+    plan                text,
+    subscription_status text,
+    start_date          timestamptz,
+    end_date            timestamptz
+)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_uid uuid := auth.uid();
+    v_sub public.subscriptions%rowtype;
+begin
+    if v_uid is null then
+        raise exception 'Not authenticated';
+    end if;
+
+    if p_amount is null or p_amount <= 0 then
+        return query select 'invalid_amount'::text, null::integer, null::text, null::text,
+                            null::timestamptz, null::timestamptz;
+        return;
+    end if;
+
+    select * into v_sub
+    from public.subscriptions s
+    where s.user_id = v_uid
+    limit 1
+    for update;
+
+    if not found then
+        return query select 'no_subscription'::text, null::integer, null::text, null::text,
+                            null::timestamptz, null::timestamptz;
+        return;
+    end if;
+
+    -- 1) expiry (persisted, so the result below is the effective state)
+    if v_sub.end_date is not null and v_sub.end_date <= now()
+       and (lower(coalesce(v_sub.subscription_status, '')) <> 'expired' or coalesce(v_sub.credits, 0) <> 0) then
+        perform public.set_credit_context('expire');
+
+        update public.subscriptions
+        set subscription_status = 'expired',
+            credits = 0
+        where user_id = v_uid
+        returning * into v_sub;
+    end if;
+
+    -- 2) status
+    if lower(coalesce(v_sub.subscription_status, '')) <> 'active' then
+        return query select
+            (case when lower(coalesce(v_sub.subscription_status, '')) = 'expired'
+                  then 'expired' else 'inactive' end)::text,
+            coalesce(v_sub.credits, 0), v_sub.plan, v_sub.subscription_status,
+            v_sub.start_date, v_sub.end_date;
+        return;
+    end if;
+
+    -- 3) cost
+    if coalesce(v_sub.credits, 0) < p_amount then
+        return query select 'insufficient'::text, coalesce(v_sub.credits, 0), v_sub.plan,
+                            v_sub.subscription_status, v_sub.start_date, v_sub.end_date;
+        return;
+    end if;
+
+    -- 4) deduct
+    perform public.set_credit_context('charge', p_tool);
+
+    update public.subscriptions
+    set credits = credits - p_amount
+    where user_id = v_uid
+    returning * into v_sub;
+
+    perform public.set_credit_context(null);
+
+    return query select 'ok'::text, v_sub.credits, v_sub.plan, v_sub.subscription_status,
+                        v_sub.start_date, v_sub.end_date;
+end;
+$$;
+
+revoke all on function public.charge_credits(integer, text) from public;
+grant execute on function public.charge_credits(integer, text) to authenticated;
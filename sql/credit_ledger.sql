@@ -0,0 +1,304 @@
+-- ==========================================================
+-- Append-only credit ledger + periodic balance / usage snapshots
+-- Used by services/credit_ledger.py
+--
+-- Every change to subscriptions.credits is appended to credit_ledger by a
+-- trigger, so no write path can bypass it. RPCs label their changes with
+-- set_credit_context(kind, tool, reservation_id); unlabelled changes are
+-- classified as grant / adjust / expire.
+--
+-- snapshot_credit_ledger() (schedule every 15 min) folds new ledger rows into
+--   credit_balance_snapshots : per-user balance as of a ledger id
+--   credit_usage_daily       : per-day / user / tool / kind totals
+-- Balances are read as latest snapshot + bounded ledger tail
+-- (credit_balance()); reports read credit_usage_daily only.
+--
+-- Apply before sql/credit_reservations.sql and sql/charge_credits.sql.
+-- ==========================================================
+
+create table if not exists public.credit_ledger (
+    id              bigserial primary key,
+    created_at      timestamptz not null default now(),
+    user_id         uuid not null,
+    delta           integer not null,          -- signed change to spendable credits
+    kind            text not null,             -- opening | reserve | commit | release | charge | grant | adjust | expire
+    tool            text,
+    reservation_id  uuid,
+    note            text
+);
+
+create index if not exists credit_ledger_user_id_idx
+    on public.credit_ledger (user_id, id desc);
+
+alter table public.credit_ledger enable row level security;
+
+-- Append-only: no updates or deletes, even for the service role
+create or replace function public.credit_ledger_append_only()
+returns trigger
+language plpgsql
+as $$
+begin
+    raise exception 'credit_ledger is append-only';
+end;
+$$;
+
+drop trigger if exists credit_ledger_no_update on public.credit_ledger;
+create trigger credit_ledger_no_update
+    before update or delete on public.credit_ledger
+    for each row execute function public.credit_ledger_append_only();
+
+drop trigger if exists credit_ledger_no_truncate on public.credit_ledger;
+create trigger credit_ledger_no_truncate
+    before truncate on public.credit_ledger
+    for each statement execute function public.credit_ledger_append_only();
+
+
+-- ----------------------------------------------------------
+-- Context for the trigger (transaction-local)
+-- ----------------------------------------------------------
+create or replace function public.set_credit_context(
+    p_kind           text,
+    p_tool           text default null,
+    p_reservation_id uuid default null
+)
+returns void
+language sql
+as $$
+    select set_config('talentiq.credit_kind', coalesce(p_kind, ''), true),
+           set_config('talentiq.credit_tool', coalesce(p_tool, ''), true),
+           set_config('talentiq.reservation_id', coalesce(p_reservation_id::text, ''), true);
+$$;
+
+
+-- ----------------------------------------------------------
+-- Trigger: subscriptions.credits change → ledger row
+-- ----------------------------------------------------------
+create or replace function public.log_subscription_credit_change()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_delta integer;
+    v_kind  text;
+begin
+    -- Set-based callers that write their own ledger rows
+    if current_setting('talentiq.ledger_manual', true) = 'on' then
+        return new;
+    end if;
+
+    if tg_op = 'INSERT' then
+        v_delta := coalesce(new.credits, 0);
+    else
+        v_delta := coalesce(new.credits, 0) - coalesce(old.credits, 0);
+    end if;
+
+    if v_delta = 0 then
+        return new;
+    end if;
+
+    v_kind := nullif(current_setting('talentiq.credit_kind', true), '');
+
+    if v_kind is null then
+        if tg_op = 'UPDATE'
+           and lower(coalesce(new.subscription_status, '')) = 'expired'
+           and coalesce(new.credits, 0) = 0 then
+            v_kind := 'expire';
+        elsif v_delta > 0 then
+            v_kind := 'grant';
+        else
+            v_kind := 'adjust';
+        end if;
+    end if;
+
+    insert into public.credit_ledger (user_id, delta, kind, tool, reservation_id)
+    values (
+        new.user_id,
+        v_delta,
+        v_kind,
+        nullif(current_setting('talentiq.credit_tool', true), ''),
+        nullif(current_setting('talentiq.reservation_id', true), '')::uuid
+    );
+
+    return new;
+end;
+$$;
+
+drop trigger if exists subscriptions_credit_ledger on public.subscriptions;
+create trigger subscriptions_credit_ledger
+    after insert or update of credits on public.subscriptions
+    for each row execute function public.log_subscription_credit_change();
+
+
+-- ----------------------------------------------------------
+-- Opening balances so ledger sum == subscriptions.credits
+-- ----------------------------------------------------------
+insert into public.credit_ledger (user_id, delta, kind, note)
+select s.user_id,
+       coalesce(s.credits, 0) - coalesce(l.total, 0),
+       'opening',
+       'ledger opening balance'
+from public.subscriptions s
+left join (
+    select user_id, sum(delta)::integer as total
+    from public.credit_ledger
+    group by user_id
+) l on l.user_id = s.user_id
+where coalesce(s.credits, 0) - coalesce(l.total, 0) <> 0;
+
+
+-- ----------------------------------------------------------
+-- Snapshots
+-- ----------------------------------------------------------
+create table if not exists public.credit_snapshot_state (
+    id              integer primary key default 1 check (id = 1),
+    last_ledger_id  bigint not null default 0,
+    updated_at      timestamptz not null default now()
+);
+
+insert into public.credit_snapshot_state (id) values (1)
+on conflict (id) do nothing;
+
+create table if not exists public.credit_balance_snapshots (
+    user_id         uuid not null,
+    last_ledger_id  bigint not null,
+    balance         integer not null,
+    snapshot_at     timestamptz not null default now(),
+    primary key (user_id, last_ledger_id)
+);
+
+create table if not exists public.credit_usage_daily (
+    day             date not null,
+    user_id         uuid not null,
+    tool            text not null default '',
+    kind            text not null,
+    credits_in      integer not null default 0,   -- sum of positive deltas
+    credits_out     integer not null default 0,   -- sum of negative deltas (as positive)
+    events          integer not null default 0,
+    primary key (day, user_id, tool, kind)
+);
+
+create index if not exists credit_usage_daily_day_idx
+    on public.credit_usage_daily (day desc);
+
+alter table public.credit_snapshot_state enable row level security;
+alter table public.credit_balance_snapshots enable row level security;
+alter table public.credit_usage_daily enable row level security;
+
+
+create or replace function public.snapshot_credit_ledger()
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_from bigint;
+    v_to   bigint;
+    v_rows integer;
+begin
+    select last_ledger_id into v_from
+    from public.credit_snapshot_state
+    where id = 1
+    for update;
+
+    -- Leave a grace window so rows from still-open transactions
+    -- (which hold lower ids) are not skipped.
+    select coalesce(max(id), v_from) into v_to
+    from public.credit_ledger
+    where id > v_from
+      and created_at < now() - interval '5 minutes';
+
+    if v_to <= v_from then
+        return 0;
+    end if;
+
+    insert into public.credit_usage_daily as d (day, user_id, tool, kind, credits_in, credits_out, events)
+    select (l.created_at at time zone 'utc')::date,
+           l.user_id,
+           coalesce(l.tool, ''),
+           l.kind,
+           sum(greatest(l.delta, 0))::integer,
+           sum(greatest(-l.delta, 0))::integer,
+           count(*)::integer
+    from public.credit_ledger l
+    where l.id > v_from and l.id <= v_to
+    group by 1, 2, 3, 4
+    on conflict (day, user_id, tool, kind) do update
+    set credits_in  = d.credits_in  + excluded.credits_in,
+        credits_out = d.credits_out + excluded.credits_out,
+        events      = d.events      + excluded.events;
+
+    insert into public.credit_balance_snapshots (user_id, last_ledger_id, balance)
+    select l.user_id,
+           max(l.id),
+           coalesce(prev.balance, 0) + sum(l.delta)::integer
+    from public.credit_ledger l
+    left join lateral (
+        select s.balance
+        from public.credit_balance_snapshots s
+        where s.user_id = l.user_id
+        order by s.last_ledger_id desc
+        limit 1
+    ) prev on true
+    where l.id > v_from and l.id <= v_to
+    group by l.user_id, prev.balance;
+
+    get diagnostics v_rows = row_count;
+
+    update public.credit_snapshot_state
+    set last_ledger_id = v_to, updated_at = now()
+    where id = 1;
+
+    return v_rows;
+end;
+$$;
+
+
+-- Latest snapshot + ledger tail since it
+create or replace function public.credit_balance(p_user_id uuid)
+returns table (balance integer, snapshot_ledger_id bigint, tail_events integer)
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    with snap as (
+        select s.balance, s.last_ledger_id
+        from public.credit_balance_snapshots s
+        where s.user_id = p_user_id
+        order by s.last_ledger_id desc
+        limit 1
+    ),
+    tail as (
+        select coalesce(sum(l.delta), 0)::integer as delta, count(*)::integer as n
+        from public.credit_ledger l
+        where l.user_id = p_user_id
+          and l.id > coalesce((select last_ledger_id from snap), 0)
+    )
+    select coalesce((select balance from snap), 0) + tail.delta,
+           coalesce((select last_ledger_id from snap), 0),
+           tail.n
+    from tail;
+$$;
+
+
+revoke all on function public.snapshot_credit_ledger() from public;
+revoke all on function public.credit_balance(uuid) from public;
+grant execute on function public.snapshot_credit_ledger() to service_role;
+grant execute on function public.credit_balance(uuid) to service_role;
+
+-- Scheduled here when pg_cron is installed; otherwise the admin credit
+-- usage page runs it when the last snapshot is older than 15 minutes.
+do $$
+begin
+    if exists (select 1 from pg_extension where extname = 'pg_cron') then
+        perform cron.schedule(
+            'credit-ledger-snapshot',
+            '*/15 * * * *',
+            'select public.snapshot_credit_ledger()'
+        );
+    end if;
+end;
+$$;
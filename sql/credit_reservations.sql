@@ -0,0 +1,267 @@
+-- ==========================================================
+-- Credit reservations (hold / commit / release) + append-only ledger
+-- Used by services/credit_engine.py (service key only)
+--
+-- reserve_credits()  : atomically moves N credits from the balance into a hold
+-- commit_credit_reservation()  : finalises the hold after the tool succeeded
+-- release_credit_reservation() : returns held credits (failure / abandon)
+-- release_expired_credit_reservations() : TTL sweep (schedule every minute)
+--
+-- Balance changes reach credit_ledger through the subscriptions trigger
+-- (requires sql/credit_ledger.sql).
+-- ==========================================================
+
+create table if not exists public.credit_reservations (
+    id          uuid primary key default gen_random_uuid(),
+    user_id     uuid not null,
+    tool        text not null,
+    amount      integer not null check (amount > 0),
+    status      text not null default 'held',  -- held | committed | released
+    created_at  timestamptz not null default now(),
+    expires_at  timestamptz not null,
+    settled_at  timestamptz
+);
+
+create index if not exists credit_reservations_held_expiry_idx
+    on public.credit_reservations (expires_at)
+    where status = 'held';
+
+alter table public.credit_reservations enable row level security;
+
+
+-- ----------------------------------------------------------
+-- TTL sweep: release every expired hold (set-based)
+-- ----------------------------------------------------------
+create or replace function public.release_expired_credit_reservations(p_user_id uuid default null)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_count integer;
+begin
+    -- One refund per user below; ledger rows are written per reservation
+    perform set_config('talentiq.ledger_manual', 'on', true);
+
+    with expired as (
+        update public.credit_reservations r
+        set status = 'released', settled_at = now()
+        where r.status = 'held'
+          and r.expires_at <= now()
+          and (p_user_id is null or r.user_id = p_user_id)
+        returning r.id, r.user_id, r.tool, r.amount
+    ),
+    per_user as (
+        select user_id, sum(amount)::integer as amount
+        from expired
+        group by user_id
+    ),
+    refunded as (
+        update public.subscriptions s
+        set credits = coalesce(s.credits, 0) + p.amount
+        from per_user p
+        where s.user_id = p.user_id
+        returning s.user_id
+    ),
+    logged as (
+        insert into public.credit_ledger (user_id, delta, kind, tool, reservation_id, note)
+        select user_id, amount, 'release', tool, id, 'ttl expired'
+        from expired
+        returning 1
+    )
+    select count(*) into v_count from logged;
+
+    perform set_config('talentiq.ledger_manual', '', true);
+
+    return coalesce(v_count, 0);
+end;
+$$;
+
+
+-- ----------------------------------------------------------
+-- Reserve: check subscription + balance and hold N credits
+-- ----------------------------------------------------------
+create or replace function public.reserve_credits(
+    p_user_id     uuid,
+    p_tool        text,
+    p_amount      integer,
+    p_ttl_seconds integer default 600
+)
+returns table (result text, reservation_id uuid, new_credits integer)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_sub public.subscriptions%rowtype;
+    v_res_id uuid;
+begin
+    if p_amount is null or p_amount <= 0 then
+        return query select 'invalid_amount'::text, null::uuid, null::integer;
+        return;
+    end if;
+
+    -- Abandoned holds for this user go back to the balance first
+    perform public.release_expired_credit_reservations(p_user_id);
+
+    select * into v_sub
+    from public.subscriptions s
+    where s.user_id = p_user_id
+    limit 1
+    for update;
+
+    if not found then
+        return query select 'no_subscription'::text, null::uuid, null::integer;
+        return;
+    end if;
+
+    if v_sub.end_date is not null and v_sub.end_date <= now() then
+        return query select 'expired'::text, null::uuid, coalesce(v_sub.credits, 0);
+        return;
+    end if;
+
+    if lower(coalesce(v_sub.subscription_status, '')) <> 'active' then
+        return query select 'inactive'::text, null::uuid, coalesce(v_sub.credits, 0);
+        return;
+    end if;
+
+    if coalesce(v_sub.credits, 0) < p_amount then
+        return query select 'insufficient'::text, null::uuid, coalesce(v_sub.credits, 0);
+        return;
+    end if;
+
+    insert into public.credit_reservations (user_id, tool, amount, expires_at)
+    values (p_user_id, p_tool, p_amount, now() + make_interval(secs => greatest(p_ttl_seconds, 1)))
+    returning id into v_res_id;
+
+    perform public.set_credit_context('reserve', p_tool, v_res_id);
+
+    update public.subscriptions
+    set credits = credits - p_amount
+    where user_id = p_user_id
+    returning * into v_sub;
+
+    perform public.set_credit_context(null);
+
+    return query select 'ok'::text, v_res_id, v_sub.credits;
+end;
+$$;
+
+
+-- ----------------------------------------------------------
+-- Commit: the held credits become a final charge
+-- ----------------------------------------------------------
+create or replace function public.commit_credit_reservation(p_reservation_id uuid)
+returns table (result text, new_credits integer)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_res public.credit_reservations%rowtype;
+    v_credits integer;
+begin
+    select * into v_res
+    from public.credit_reservations r
+    where r.id = p_reservation_id
+    for update;
+
+    if not found then
+        return query select 'not_found'::text, null::integer;
+        return;
+    end if;
+
+    select s.credits into v_credits
+    from public.subscriptions s
+    where s.user_id = v_res.user_id
+    limit 1;
+
+    -- Idempotent on retries
+    if v_res.status = 'committed' then
+        return query select 'ok'::text, v_credits;
+        return;
+    end if;
+
+    if v_res.status <> 'held' then
+        return query select v_res.status, v_credits;
+        return;
+    end if;
+
+    update public.credit_reservations
+    set status = 'committed', settled_at = now()
+    where id = p_reservation_id;
+
+    -- Balance already moved at reserve time; record the settlement only
+    insert into public.credit_ledger (user_id, delta, kind, tool, reservation_id)
+    values (v_res.user_id, 0, 'commit', v_res.tool, v_res.id);
+
+    return query select 'ok'::text, v_credits;
+end;
+$$;
+
+
+-- ----------------------------------------------------------
+-- Release: give held credits back
+-- ----------------------------------------------------------
+create or replace function public.release_credit_reservation(p_reservation_id uuid)
+returns table (result text, new_credits integer)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_res public.credit_reservations%rowtype;
+    v_credits integer;
+begin
+    select * into v_res
+    from public.credit_reservations r
+    where r.id = p_reservation_id
+    for update;
+
+    if not found then
+        return query select 'not_found'::text, null::integer;
+        return;
+    end if;
+
+    if v_res.status <> 'held' then
+        select s.credits into v_credits
+        from public.subscriptions s
+        where s.user_id = v_res.user_id
+        limit 1;
+
+        return query select (case when v_res.status = 'released' then 'ok' else v_res.status end)::text, v_credits;
+        return;
+    end if;
+
+    update public.credit_reservations
+    set status = 'released', settled_at = now()
+    where id = p_reservation_id;
+
+    perform public.set_credit_context('release', v_res.tool, v_res.id);
+
+    update public.subscriptions
+    set credits = coalesce(credits, 0) + v_res.amount
+    where user_id = v_res.user_id
+    returning credits into v_credits;
+
+    perform public.set_credit_context(null);
+
+    return query select 'ok'::text, v_credits;
+end;
+$$;
+
+
+revoke all on function public.release_expired_credit_reservations(uuid) from public;
+revoke all on function public.reserve_credits(uuid, text, integer, integer) from public;
+revoke all on function public.commit_credit_reservation(uuid) from public;
+revoke all on function public.release_credit_reservation(uuid) from public;
+
+grant execute on function public.release_expired_credit_reservations(uuid) to service_role;
+grant execute on function public.reserve_credits(uuid, text, integer, integer) to service_role;
+grant execute on function public.commit_credit_reservation(uuid) to service_role;
+grant execute on function public.release_credit_reservation(uuid) to service_role;
+
+-- Optional (pg_cron): release abandoned holds every minute
+-- select cron.schedule('release-credit-holds', '* * * * *',
+--                      $$select public.release_expired_credit_reservations()$$);
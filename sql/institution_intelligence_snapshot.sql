@@ -0,0 +1,355 @@
+-- ==========================================================
+-- institution_intelligence_snapshot — materialised per-institution KPIs
+-- Read by pages/16_Institution_Executive_Dashboard.py
+-- (services/intelligence_snapshot.py).
+--
+-- Incremental:
+--   triggers on candidate_scores / institution_applications /
+--   institution_candidate_scores mark (institution_id, year) dirty on
+--   insert, update (old and new year) and delete;
+--   refresh_institution_intelligence() walks every dirty year, oldest
+--   first, recomputing only dirty institutions in set-based passes,
+--   upserting them and re-ranking that year (one row per institution,
+--   cheap). A refreshed year re-marks the following year's existing
+--   rows so their YoY growth follows late edits.
+-- Full rebuild (kept for 17_Admin_institution's button):
+--   refresh_all_institution_intelligence(p_year)
+--
+-- Schedule, e.g. pg_cron every 15 min:
+--   select cron.schedule('inst-intel', '*/15 * * * *',
+--     $$select public.refresh_institution_intelligence()$$);
+-- ==========================================================
+
+create table if not exists public.institution_intelligence_snapshot (
+    institution_id  uuid not null,
+    reporting_year  integer not null,
+    primary key (institution_id, reporting_year)
+);
+
+alter table public.institution_intelligence_snapshot
+    add column if not exists employability_score   numeric,
+    add column if not exists avg_ers               numeric,
+    add column if not exists avg_trust             numeric,
+    add column if not exists students_analyzed     integer not null default 0,
+    add column if not exists cv_analyses           integer not null default 0,
+    add column if not exists total_applications    integer not null default 0,
+    add column if not exists avg_application_score numeric,
+    add column if not exists job_ready_rate        numeric,
+    add column if not exists total_hires           integer not null default 0,
+    add column if not exists hire_rate             numeric,
+    add column if not exists employer_rating       numeric,
+    add column if not exists yoy_growth            numeric,
+    add column if not exists national_rank         integer,
+    add column if not exists public_tier           text,
+    add column if not exists updated_at            timestamptz not null default now();
+
+create index if not exists institution_intelligence_snapshot_year_idx
+    on public.institution_intelligence_snapshot (reporting_year, employability_score desc);
+
+
+-- ----------------------------------------------------------
+-- Dirty set
+-- ----------------------------------------------------------
+create table if not exists public.institution_snapshot_dirty (
+    institution_id  uuid not null,
+    reporting_year  integer not null,
+    marked_at       timestamptz not null default now(),
+    primary key (institution_id, reporting_year)
+);
+
+alter table public.institution_intelligence_snapshot enable row level security;
+alter table public.institution_snapshot_dirty enable row level security;
+
+create or replace function public.mark_institution_snapshot_dirty()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_row  record;
+    v_inst uuid;
+    v_at   timestamptz;
+    i      integer;
+begin
+    -- i = 1: the old row (update / delete), i = 2: the new row (insert / update)
+    for i in 1..2 loop
+        if i = 1 then
+            continue when tg_op = 'INSERT';
+            v_row := old;
+        else
+            continue when tg_op = 'DELETE';
+            v_row := new;
+        end if;
+
+        if tg_table_name = 'institution_candidate_scores' then
+            select a.institution_id, a.created_at into v_inst, v_at
+            from public.institution_applications a
+            where a.id = v_row.application_id;
+        else
+            v_inst := v_row.institution_id;
+            v_at   := v_row.created_at;
+        end if;
+
+        if v_inst is not null then
+            insert into public.institution_snapshot_dirty (institution_id, reporting_year)
+            values (v_inst, extract(year from coalesce(v_at, now()))::integer)
+            on conflict (institution_id, reporting_year) do update set marked_at = now();
+        end if;
+    end loop;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists candidate_scores_snapshot_dirty on public.candidate_scores;
+create trigger candidate_scores_snapshot_dirty
+    after insert or update or delete on public.candidate_scores
+    for each row execute function public.mark_institution_snapshot_dirty();
+
+drop trigger if exists institution_applications_snapshot_dirty on public.institution_applications;
+create trigger institution_applications_snapshot_dirty
+    after insert or update or delete on public.institution_applications
+    for each row execute function public.mark_institution_snapshot_dirty();
+
+drop trigger if exists institution_candidate_scores_snapshot_dirty on public.institution_candidate_scores;
+create trigger institution_candidate_scores_snapshot_dirty
+    after insert or update or delete on public.institution_candidate_scores
+    for each row execute function public.mark_institution_snapshot_dirty();
+
+
+-- ----------------------------------------------------------
+-- Incremental refresh (one year)
+-- ----------------------------------------------------------
+create or replace function public.refresh_institution_intelligence_year(
+    p_year integer
+)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_year  integer := p_year;
+    v_start timestamptz := make_timestamptz(v_year, 1, 1, 0, 0, 0, 'UTC');
+    v_end   timestamptz := make_timestamptz(v_year + 1, 1, 1, 0, 0, 0, 'UTC');
+    v_rows  integer;
+begin
+    -- called once per dirty year in the same transaction
+    drop table if exists _dirty, _cv, _apps;
+
+    create temporary table _dirty on commit drop as
+    with taken as (
+        delete from public.institution_snapshot_dirty d
+        where d.reporting_year = v_year
+        returning d.institution_id
+    )
+    select distinct institution_id from taken;
+
+    if not exists (select 1 from _dirty) then
+        return 0;
+    end if;
+
+    -- pass 1: CV analyses — averages over each student's latest
+    -- analysis in the year, cv_analyses counts every attempt
+    create temporary table _cv on commit drop as
+    with yearly as (
+        select cs.institution_id, cs.user_id, cs.ers_score, cs.trust_index, cs.created_at,
+               count(*) over (partition by cs.institution_id, cs.user_id) as attempts
+        from public.candidate_scores cs
+        join _dirty d on d.institution_id = cs.institution_id
+        where cs.created_at >= v_start and cs.created_at < v_end
+    ),
+    latest as (
+        select distinct on (institution_id, user_id) *
+        from yearly
+        order by institution_id, user_id, created_at desc
+    )
+    select institution_id,
+           avg(ers_score)::numeric           as avg_ers,
+           avg(trust_index)::numeric         as avg_trust,
+           count(distinct user_id)::integer  as students_analyzed,
+           sum(attempts)::integer            as cv_analyses
+    from latest
+    group by institution_id;
+
+    -- pass 2: applications + latest application score
+    create temporary table _apps on commit drop as
+    select a.institution_id,
+           count(*)::integer                                            as total_applications,
+           avg(s.overall_score)::numeric                                as avg_application_score,
+           avg(case when s.overall_score >= 70 then 1.0 else 0.0 end)
+               filter (where s.overall_score is not null)               as job_ready_rate,
+           count(*) filter (where lower(coalesce(a.status, '')) in ('hired', 'placed', 'offer_accepted'))::integer
+                                                                        as total_hires
+    from public.institution_applications a
+    join _dirty d on d.institution_id = a.institution_id
+    left join lateral (
+        select ics.overall_score
+        from public.institution_candidate_scores ics
+        where ics.application_id = a.id
+        order by ics.created_at desc
+        limit 1
+    ) s on true
+    where a.created_at >= v_start and a.created_at < v_end
+    group by a.institution_id;
+
+    -- upsert
+    insert into public.institution_intelligence_snapshot as snap (
+        institution_id, reporting_year,
+        employability_score, avg_ers, avg_trust, students_analyzed, cv_analyses,
+        total_applications, avg_application_score, job_ready_rate,
+        total_hires, hire_rate, updated_at
+    )
+    select d.institution_id, v_year,
+           round(coalesce(cv.avg_ers, ap.avg_application_score), 2),
+           round(cv.avg_ers, 2),
+           round(cv.avg_trust, 2),
+           coalesce(cv.students_analyzed, 0),
+           coalesce(cv.cv_analyses, 0),
+           coalesce(ap.total_applications, 0),
+           round(ap.avg_application_score, 2),
+           round(ap.job_ready_rate * 100, 2),
+           coalesce(ap.total_hires, 0),
+           case when coalesce(ap.total_applications, 0) > 0
+                then round(100.0 * ap.total_hires / ap.total_applications, 2) end,
+           now()
+    from _dirty d
+    left join _cv cv on cv.institution_id = d.institution_id
+    left join _apps ap on ap.institution_id = d.institution_id
+    on conflict (institution_id, reporting_year) do update
+    set employability_score   = excluded.employability_score,
+        avg_ers               = excluded.avg_ers,
+        avg_trust             = excluded.avg_trust,
+        students_analyzed     = excluded.students_analyzed,
+        cv_analyses           = excluded.cv_analyses,
+        total_applications    = excluded.total_applications,
+        avg_application_score = excluded.avg_application_score,
+        job_ready_rate        = excluded.job_ready_rate,
+        total_hires           = excluded.total_hires,
+        hire_rate             = excluded.hire_rate,
+        updated_at            = excluded.updated_at;
+
+    get diagnostics v_rows = row_count;
+
+    -- next year's YoY compares against these rows: re-mark existing ones
+    insert into public.institution_snapshot_dirty (institution_id, reporting_year)
+    select snap.institution_id, snap.reporting_year
+    from public.institution_intelligence_snapshot snap
+    join _dirty d on d.institution_id = snap.institution_id
+    where snap.reporting_year = v_year + 1
+    on conflict (institution_id, reporting_year) do update set marked_at = now();
+
+    -- YoY growth for the refreshed rows
+    update public.institution_intelligence_snapshot cur
+    set yoy_growth = case
+            when prev.employability_score is null or prev.employability_score = 0 then null
+            else round(100.0 * (cur.employability_score - prev.employability_score) / prev.employability_score, 2)
+        end
+    from _dirty d
+    left join public.institution_intelligence_snapshot prev
+           on prev.institution_id = d.institution_id and prev.reporting_year = v_year - 1
+    where cur.institution_id = d.institution_id
+      and cur.reporting_year = v_year;
+
+    -- rank + tier across the year's scored institutions; unscored rows get null
+    with ranked as (
+        select institution_id,
+               rank() over (order by employability_score desc)         as r,
+               percent_rank() over (order by employability_score desc) as pr
+        from public.institution_intelligence_snapshot
+        where reporting_year = v_year
+          and employability_score is not null
+    ),
+    tiered as (
+        select s.institution_id, k.r,
+               case
+                   when k.r is null then null
+                   when k.pr < 0.10 then 'Tier A'
+                   when k.pr < 0.35 then 'Tier B'
+                   when k.pr < 0.70 then 'Tier C'
+                   else 'Tier D'
+               end as tier
+        from public.institution_intelligence_snapshot s
+        left join ranked k on k.institution_id = s.institution_id
+        where s.reporting_year = v_year
+    )
+    update public.institution_intelligence_snapshot snap
+    set national_rank = t.r,
+        public_tier = t.tier
+    from tiered t
+    where snap.institution_id = t.institution_id
+      and snap.reporting_year = v_year
+      and (snap.national_rank is distinct from t.r or snap.public_tier is distinct from t.tier);
+
+    return v_rows;
+end;
+$$;
+
+
+-- ----------------------------------------------------------
+-- Incremental refresh: p_year only, or every dirty year (null)
+-- ----------------------------------------------------------
+create or replace function public.refresh_institution_intelligence(
+    p_year integer default null
+)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_year integer;
+    v_rows integer := 0;
+begin
+    if p_year is not null then
+        return public.refresh_institution_intelligence_year(p_year);
+    end if;
+
+    -- oldest first, re-reading the dirty set each time so a year marked
+    -- by the previous pass (YoY) is picked up in this run
+    v_year := (select min(reporting_year) from public.institution_snapshot_dirty);
+
+    while v_year is not null loop
+        v_rows := v_rows + public.refresh_institution_intelligence_year(v_year);
+        v_year := (
+            select min(reporting_year)
+            from public.institution_snapshot_dirty
+            where reporting_year > v_year
+        );
+    end loop;
+
+    return v_rows;
+end;
+$$;
+
+
+-- ----------------------------------------------------------
+-- Full rebuild: mark every institution dirty, then refresh
+-- ----------------------------------------------------------
+create or replace function public.refresh_all_institution_intelligence(
+    p_year integer default null
+)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_year integer := coalesce(p_year, extract(year from now())::integer);
+begin
+    insert into public.institution_snapshot_dirty (institution_id, reporting_year)
+    select i.id, v_year
+    from public.institutions i
+    on conflict (institution_id, reporting_year) do update set marked_at = now();
+
+    return public.refresh_institution_intelligence(v_year);
+end;
+$$;
+
+revoke all on function public.refresh_institution_intelligence_year(integer) from public;
+revoke all on function public.refresh_institution_intelligence(integer) from public;
+revoke all on function public.refresh_all_institution_intelligence(integer) from public;
+grant execute on function public.refresh_institution_intelligence_year(integer) to service_role;
+grant execute on function public.refresh_institution_intelligence(integer) to service_role;
+grant execute on function public.refresh_all_institution_intelligence(integer) to service_role;
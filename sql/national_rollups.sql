@@ -0,0 +1,446 @@
+-- ==========================================================
+-- National rollups — institution → region → national aggregates
+-- Read by services/national_rollups.py
+-- (19_Government_Executive_Dashboard, 21_Public_Institution_Ranking).
+--
+-- Every level stores the same mergeable partial state:
+--   counts, sums and sums of squares (ERS, salary, hired score),
+-- so means / placement rates / standard deviations derive from any
+-- level and levels combine by addition.
+--
+-- Incremental:
+--   triggers mark an institution dirty when its students' latest
+--   scores, applications, application scores, hires or the institution
+--   row itself change. refresh_national_rollups() recomputes only dirty
+--   institutions, then applies (new − old) per region and nationally —
+--   O(1) per changed institution at the upper levels — and re-ranks
+--   (one row per institution).
+-- Full rebuild: rebuild_national_rollups().
+--
+-- Sources (latest score per student — sql/candidate_latest_scores.sql):
+--   ERS          candidate_latest_scores.ers_score
+--   placement    institution_applications (hired / placed / offer_accepted)
+--   hired score  latest institution_candidate_scores of hired applications
+--   salary       employer_applications hires × employer_job_posts salary
+--                midpoint, attributed via users_app.institution_id
+-- national_score = 0.4 placement rate + 0.4 avg ERS + 0.2 avg hired score
+-- (all 0–100). Tiers follow the snapshot: A top 10%, B 35%, C 70%, D.
+--
+-- Schedule, e.g. pg_cron every 10 min:
+--   select cron.schedule('national-rollups', '*/10 * * * *',
+--     $$select public.refresh_national_rollups()$$);
+-- ==========================================================
+
+alter table public.institutions add column if not exists region text;
+
+
+-- ----------------------------------------------------------
+-- Partial-state tables
+-- ----------------------------------------------------------
+create table if not exists public.institution_rollup_partials (
+    institution_id    uuid primary key,
+    institution_name  text,
+    region            text not null default 'Unassigned',
+    students          bigint  not null default 0,
+    ers_sum           numeric not null default 0,
+    ers_sumsq         numeric not null default 0,
+    applications      bigint  not null default 0,
+    hires             bigint  not null default 0,
+    hired_score_n     bigint  not null default 0,
+    hired_score_sum   numeric not null default 0,
+    salary_n          bigint  not null default 0,
+    salary_sum        numeric not null default 0,
+    salary_sumsq      numeric not null default 0,
+    national_score    numeric,
+    national_rank     integer,
+    performance_tier  text,
+    updated_at        timestamptz not null default now()
+);
+
+create index if not exists institution_rollup_partials_score_idx
+    on public.institution_rollup_partials (national_score desc nulls last);
+
+create table if not exists public.region_rollups (
+    region            text primary key,
+    institutions      bigint  not null default 0,
+    students          bigint  not null default 0,
+    ers_sum           numeric not null default 0,
+    ers_sumsq         numeric not null default 0,
+    applications      bigint  not null default 0,
+    hires             bigint  not null default 0,
+    hired_score_n     bigint  not null default 0,
+    hired_score_sum   numeric not null default 0,
+    salary_n          bigint  not null default 0,
+    salary_sum        numeric not null default 0,
+    salary_sumsq      numeric not null default 0,
+    updated_at        timestamptz not null default now()
+);
+
+create table if not exists public.national_rollup (
+    id                integer primary key default 1 check (id = 1),
+    institutions      bigint  not null default 0,
+    students          bigint  not null default 0,
+    ers_sum           numeric not null default 0,
+    ers_sumsq         numeric not null default 0,
+    applications      bigint  not null default 0,
+    hires             bigint  not null default 0,
+    hired_score_n     bigint  not null default 0,
+    hired_score_sum   numeric not null default 0,
+    salary_n          bigint  not null default 0,
+    salary_sum        numeric not null default 0,
+    salary_sumsq      numeric not null default 0,
+    updated_at        timestamptz not null default now()
+);
+
+insert into public.national_rollup (id) values (1)
+on conflict (id) do nothing;
+
+create or replace view public.national_rollup_tiers as
+select performance_tier, count(*)::integer as institution_count
+from public.institution_rollup_partials
+where performance_tier is not null
+group by performance_tier;
+
+create table if not exists public.national_rollup_dirty (
+    institution_id  uuid primary key,
+    marked_at       timestamptz not null default now()
+);
+
+alter table public.institution_rollup_partials enable row level security;
+alter table public.region_rollups enable row level security;
+alter table public.national_rollup enable row level security;
+alter table public.national_rollup_dirty enable row level security;
+
+
+-- ----------------------------------------------------------
+-- Dirty marking
+-- ----------------------------------------------------------
+create or replace function public.mark_national_rollup_dirty()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_rows jsonb[];
+    v_row  jsonb;
+    v_inst uuid;
+begin
+    v_rows := case tg_op
+        when 'INSERT' then array[to_jsonb(new)]
+        when 'DELETE' then array[to_jsonb(old)]
+        else array[to_jsonb(old), to_jsonb(new)]
+    end;
+
+    foreach v_row in array v_rows loop
+        v_inst := null;
+
+        if tg_table_name = 'institutions' then
+            v_inst := (v_row ->> 'id')::uuid;
+        elsif tg_table_name = 'institution_candidate_scores' then
+            select a.institution_id into v_inst
+            from public.institution_applications a
+            where a.id = (v_row ->> 'application_id')::uuid;
+        elsif tg_table_name = 'employer_applications' then
+            select u.institution_id into v_inst
+            from public.users_app u
+            where u.id = (v_row ->> 'candidate_user_id')::uuid;
+        else
+            v_inst := (v_row ->> 'institution_id')::uuid;
+        end if;
+
+        if v_inst is not null then
+            insert into public.national_rollup_dirty (institution_id)
+            values (v_inst)
+            on conflict (institution_id) do update set marked_at = now();
+        end if;
+    end loop;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists institutions_national_rollup_dirty on public.institutions;
+create trigger institutions_national_rollup_dirty
+    after insert or update of name, region or delete on public.institutions
+    for each row execute function public.mark_national_rollup_dirty();
+
+drop trigger if exists candidate_latest_scores_national_rollup_dirty on public.candidate_latest_scores;
+create trigger candidate_latest_scores_national_rollup_dirty
+    after insert or update or delete on public.candidate_latest_scores
+    for each row execute function public.mark_national_rollup_dirty();
+
+drop trigger if exists institution_applications_national_rollup_dirty on public.institution_applications;
+create trigger institution_applications_national_rollup_dirty
+    after insert or update or delete on public.institution_applications
+    for each row execute function public.mark_national_rollup_dirty();
+
+drop trigger if exists institution_candidate_scores_national_rollup_dirty on public.institution_candidate_scores;
+create trigger institution_candidate_scores_national_rollup_dirty
+    after insert or update or delete on public.institution_candidate_scores
+    for each row execute function public.mark_national_rollup_dirty();
+
+drop trigger if exists employer_applications_national_rollup_dirty on public.employer_applications;
+create trigger employer_applications_national_rollup_dirty
+    after insert or update or delete on public.employer_applications
+    for each row execute function public.mark_national_rollup_dirty();
+
+
+-- ----------------------------------------------------------
+-- Incremental refresh
+-- ----------------------------------------------------------
+create or replace function public.refresh_national_rollups()
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_rows integer;
+begin
+    -- One refresh at a time (pg_cron + the page 19 button): the deltas
+    -- below read "old" partials that a concurrent run may be rewriting
+    perform pg_advisory_xact_lock(hashtext('refresh_national_rollups'));
+
+    create temporary table _nr_dirty on commit drop as
+    with taken as (
+        delete from public.national_rollup_dirty
+        returning institution_id
+    )
+    select distinct institution_id from taken;
+
+    if not exists (select 1 from _nr_dirty) then
+        return 0;
+    end if;
+
+    -- fresh partial state for each dirty institution that still exists
+    create temporary table _nr_new on commit drop as
+    select i.id                                                     as institution_id,
+           i.name                                                   as institution_name,
+           coalesce(nullif(btrim(i.region), ''), 'Unassigned')      as region,
+           coalesce(e.students, 0)         as students,
+           coalesce(e.ers_sum, 0)          as ers_sum,
+           coalesce(e.ers_sumsq, 0)        as ers_sumsq,
+           coalesce(a.applications, 0)     as applications,
+           coalesce(a.hires, 0)            as hires,
+           coalesce(a.hired_score_n, 0)    as hired_score_n,
+           coalesce(a.hired_score_sum, 0)  as hired_score_sum,
+           coalesce(s.salary_n, 0)         as salary_n,
+           coalesce(s.salary_sum, 0)       as salary_sum,
+           coalesce(s.salary_sumsq, 0)     as salary_sumsq
+    from _nr_dirty d
+    join public.institutions i on i.id = d.institution_id
+    left join lateral (
+        select count(*)                           as students,
+               sum(ls.ers_score)                  as ers_sum,
+               sum(ls.ers_score * ls.ers_score)   as ers_sumsq
+        from public.candidate_latest_scores ls
+        where ls.institution_id = d.institution_id
+          and ls.ers_score is not null
+    ) e on true
+    left join lateral (
+        select count(*)                                          as applications,
+               count(*) filter (where x.hired)                   as hires,
+               count(x.score) filter (where x.hired)             as hired_score_n,
+               sum(x.score) filter (where x.hired)               as hired_score_sum
+        from (
+            select lower(coalesce(ia.status, '')) in ('hired', 'placed', 'offer_accepted') as hired,
+                   (select ics.overall_score
+                    from public.institution_candidate_scores ics
+                    where ics.application_id = ia.id
+                    order by ics.created_at desc
+                    limit 1) as score
+            from public.institution_applications ia
+            where ia.institution_id = d.institution_id
+        ) x
+    ) a on true
+    left join lateral (
+        select count(*)                    as salary_n,
+               sum(y.salary)               as salary_sum,
+               sum(y.salary * y.salary)    as salary_sumsq
+        from (
+            select (coalesce(jp.salary_min, jp.salary_max) + coalesce(jp.salary_max, jp.salary_min)) / 2.0 as salary
+            from public.employer_applications ea
+            join public.users_app u on u.id = ea.candidate_user_id
+            join public.employer_job_posts jp on jp.id = ea.job_post_id
+            where u.institution_id = d.institution_id
+              and lower(coalesce(ea.status, '')) in ('hired', 'placed', 'offer_accepted')
+              and coalesce(jp.salary_min, jp.salary_max) is not null
+        ) y
+    ) s on true;
+
+    -- (new − old) per region
+    create temporary table _nr_delta on commit drop as
+    select region,
+           sum(institutions) as institutions, sum(students) as students,
+           sum(ers_sum) as ers_sum, sum(ers_sumsq) as ers_sumsq,
+           sum(applications) as applications, sum(hires) as hires,
+           sum(hired_score_n) as hired_score_n, sum(hired_score_sum) as hired_score_sum,
+           sum(salary_n) as salary_n, sum(salary_sum) as salary_sum, sum(salary_sumsq) as salary_sumsq
+    from (
+        select p.region, -1 as institutions, -p.students as students,
+               -p.ers_sum as ers_sum, -p.ers_sumsq as ers_sumsq,
+               -p.applications as applications, -p.hires as hires,
+               -p.hired_score_n as hired_score_n, -p.hired_score_sum as hired_score_sum,
+               -p.salary_n as salary_n, -p.salary_sum as salary_sum, -p.salary_sumsq as salary_sumsq
+        from public.institution_rollup_partials p
+        join _nr_dirty d on d.institution_id = p.institution_id
+        union all
+        select n.region, 1, n.students, n.ers_sum, n.ers_sumsq, n.applications, n.hires,
+               n.hired_score_n, n.hired_score_sum, n.salary_n, n.salary_sum, n.salary_sumsq
+        from _nr_new n
+    ) x
+    group by region;
+
+    insert into public.region_rollups as r (
+        region, institutions, students, ers_sum, ers_sumsq, applications, hires,
+        hired_score_n, hired_score_sum, salary_n, salary_sum, salary_sumsq, updated_at
+    )
+    select region, institutions, students, ers_sum, ers_sumsq, applications, hires,
+           hired_score_n, hired_score_sum, salary_n, salary_sum, salary_sumsq, now()
+    from _nr_delta
+    on conflict (region) do update
+    set institutions    = r.institutions    + excluded.institutions,
+        students        = r.students        + excluded.students,
+        ers_sum         = r.ers_sum         + excluded.ers_sum,
+        ers_sumsq       = r.ers_sumsq       + excluded.ers_sumsq,
+        applications    = r.applications    + excluded.applications,
+        hires           = r.hires           + excluded.hires,
+        hired_score_n   = r.hired_score_n   + excluded.hired_score_n,
+        hired_score_sum = r.hired_score_sum + excluded.hired_score_sum,
+        salary_n        = r.salary_n        + excluded.salary_n,
+        salary_sum      = r.salary_sum      + excluded.salary_sum,
+        salary_sumsq    = r.salary_sumsq    + excluded.salary_sumsq,
+        updated_at      = now();
+
+    delete from public.region_rollups where institutions <= 0;
+
+    update public.national_rollup nr
+    set institutions    = nr.institutions    + t.institutions,
+        students        = nr.students        + t.students,
+        ers_sum         = nr.ers_sum         + t.ers_sum,
+        ers_sumsq       = nr.ers_sumsq       + t.ers_sumsq,
+        applications    = nr.applications    + t.applications,
+        hires           = nr.hires           + t.hires,
+        hired_score_n   = nr.hired_score_n   + t.hired_score_n,
+        hired_score_sum = nr.hired_score_sum + t.hired_score_sum,
+        salary_n        = nr.salary_n        + t.salary_n,
+        salary_sum      = nr.salary_sum      + t.salary_sum,
+        salary_sumsq    = nr.salary_sumsq    + t.salary_sumsq,
+        updated_at      = now()
+    from (
+        select coalesce(sum(institutions), 0) as institutions, coalesce(sum(students), 0) as students,
+               coalesce(sum(ers_sum), 0) as ers_sum, coalesce(sum(ers_sumsq), 0) as ers_sumsq,
+               coalesce(sum(applications), 0) as applications, coalesce(sum(hires), 0) as hires,
+               coalesce(sum(hired_score_n), 0) as hired_score_n, coalesce(sum(hired_score_sum), 0) as hired_score_sum,
+               coalesce(sum(salary_n), 0) as salary_n, coalesce(sum(salary_sum), 0) as salary_sum,
+               coalesce(sum(salary_sumsq), 0) as salary_sumsq
+        from _nr_delta
+    ) t
+    where nr.id = 1;
+
+    -- institution level
+    delete from public.institution_rollup_partials p
+    using _nr_dirty d
+    where p.institution_id = d.institution_id
+      and not exists (select 1 from _nr_new n where n.institution_id = d.institution_id);
+
+    insert into public.institution_rollup_partials as p (
+        institution_id, institution_name, region, students, ers_sum, ers_sumsq,
+        applications, hires, hired_score_n, hired_score_sum,
+        salary_n, salary_sum, salary_sumsq, national_score, updated_at
+    )
+    select n.institution_id, n.institution_name, n.region, n.students, n.ers_sum, n.ers_sumsq,
+           n.applications, n.hires, n.hired_score_n, n.hired_score_sum,
+           n.salary_n, n.salary_sum, n.salary_sumsq,
+           case when n.students = 0 and n.applications = 0 then null else round(
+               0.4 * coalesce(100.0 * n.hires / nullif(n.applications, 0), 0)
+             + 0.4 * coalesce(n.ers_sum / nullif(n.students, 0), 0)
+             + 0.2 * coalesce(n.hired_score_sum / nullif(n.hired_score_n, 0), 0), 2) end,
+           now()
+    from _nr_new n
+    on conflict (institution_id) do update
+    set institution_name = excluded.institution_name,
+        region           = excluded.region,
+        students         = excluded.students,
+        ers_sum          = excluded.ers_sum,
+        ers_sumsq        = excluded.ers_sumsq,
+        applications     = excluded.applications,
+        hires            = excluded.hires,
+        hired_score_n    = excluded.hired_score_n,
+        hired_score_sum  = excluded.hired_score_sum,
+        salary_n         = excluded.salary_n,
+        salary_sum       = excluded.salary_sum,
+        salary_sumsq     = excluded.salary_sumsq,
+        national_score   = excluded.national_score,
+        updated_at       = excluded.updated_at;
+
+    get diagnostics v_rows = row_count;
+
+    -- rank + tier over scored institutions only; unscored rows get null
+    with ranked as (
+        select institution_id,
+               rank() over (order by national_score desc)         as r,
+               percent_rank() over (order by national_score desc) as pr
+        from public.institution_rollup_partials
+        where national_score is not null
+    ),
+    tiered as (
+        select p.institution_id, k.r,
+               case
+                   when k.r is null then null
+                   when k.pr < 0.10 then 'Tier A'
+                   when k.pr < 0.35 then 'Tier B'
+                   when k.pr < 0.70 then 'Tier C'
+                   else 'Tier D'
+               end as tier
+        from public.institution_rollup_partials p
+        left join ranked k on k.institution_id = p.institution_id
+    )
+    update public.institution_rollup_partials p
+    set national_rank = t.r,
+        performance_tier = t.tier
+    from tiered t
+    where p.institution_id = t.institution_id
+      and (p.national_rank is distinct from t.r or p.performance_tier is distinct from t.tier);
+
+    return v_rows;
+end;
+$$;
+
+
+-- ----------------------------------------------------------
+-- Full rebuild: reset every level, mark all institutions dirty
+-- ----------------------------------------------------------
+create or replace function public.rebuild_national_rollups()
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    perform pg_advisory_xact_lock(hashtext('refresh_national_rollups'));
+
+    delete from public.institution_rollup_partials;
+    delete from public.region_rollups;
+
+    update public.national_rollup
+    set institutions = 0, students = 0, ers_sum = 0, ers_sumsq = 0,
+        applications = 0, hires = 0, hired_score_n = 0, hired_score_sum = 0,
+        salary_n = 0, salary_sum = 0, salary_sumsq = 0, updated_at = now()
+    where id = 1;
+
+    insert into public.national_rollup_dirty (institution_id)
+    select i.id from public.institutions i
+    on conflict (institution_id) do update set marked_at = now();
+
+    return public.refresh_national_rollups();
+end;
+$$;
+
+revoke all on function public.refresh_national_rollups() from public;
+revoke all on function public.rebuild_national_rollups() from public;
+grant execute on function public.refresh_national_rollups() to service_role;
+grant execute on function public.rebuild_national_rollups() to service_role;
+
+select public.rebuild_national_rollups();
@@ -0,0 +1,261 @@
+-- ==========================================================
+-- Skill gap counters — incremental supply / demand by canonical skill
+-- Read by services/skill_gap_engine.py (27_Institution_Intelligence).
+--
+--   skill_catalog        : canonical skill id per normalised name
+--   skill_aliases        : optional synonyms → canonical id ("js" → javascript)
+--   skill_demand_counts  : job postings requiring each skill (platform-wide)
+--   skill_supply_counts  : students per (institution, skill), from each
+--                          student's latest score (candidate_latest_scores)
+--
+-- Triggers apply ±1 deltas on every write, so reads never rescan
+-- postings or candidate rows. Rows are kept at 0 rather than deleted so
+-- updated_at always moves; the engine uses max(updated_at) as a cache
+-- version. rebuild_skill_counters() recomputes everything (backfill /
+-- after editing aliases).
+--
+-- job_postings carries skills as skills_required (comma text) or
+-- required_skills (array, 33_Employer_Jobs); both are read via to_jsonb
+-- so either column may be absent.
+-- ==========================================================
+
+create table if not exists public.skill_catalog (
+    skill_id    bigserial primary key,
+    canonical   text not null unique,
+    created_at  timestamptz not null default now()
+);
+
+create table if not exists public.skill_aliases (
+    alias     text primary key,
+    skill_id  bigint not null references public.skill_catalog (skill_id) on delete cascade
+);
+
+create table if not exists public.skill_demand_counts (
+    skill_id    bigint primary key references public.skill_catalog (skill_id) on delete cascade,
+    demand      integer not null default 0,
+    updated_at  timestamptz not null default now()
+);
+
+create table if not exists public.skill_supply_counts (
+    institution_id  uuid not null,
+    skill_id        bigint not null references public.skill_catalog (skill_id) on delete cascade,
+    supply          integer not null default 0,
+    updated_at      timestamptz not null default now(),
+    primary key (institution_id, skill_id)
+);
+
+create index if not exists skill_demand_counts_updated_idx
+    on public.skill_demand_counts (updated_at);
+
+create index if not exists skill_supply_counts_inst_updated_idx
+    on public.skill_supply_counts (institution_id, updated_at);
+
+alter table public.skill_catalog enable row level security;
+alter table public.skill_aliases enable row level security;
+alter table public.skill_demand_counts enable row level security;
+alter table public.skill_supply_counts enable row level security;
+
+
+-- ----------------------------------------------------------
+-- Canonicalisation
+-- ----------------------------------------------------------
+create or replace function public.skill_normalise(p_name text)
+returns text
+language sql
+immutable
+as $$
+    select nullif(regexp_replace(lower(btrim(coalesce(p_name, ''))), '\s+', ' ', 'g'), '');
+$$;
+
+create or replace function public.skill_id_for(p_name text)
+returns bigint
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_name text := public.skill_normalise(p_name);
+    v_id   bigint;
+begin
+    if v_name is null then
+        return null;
+    end if;
+
+    select a.skill_id into v_id from public.skill_aliases a where a.alias = v_name;
+    if v_id is not null then
+        return v_id;
+    end if;
+
+    insert into public.skill_catalog (canonical) values (v_name)
+    on conflict (canonical) do nothing;
+
+    select c.skill_id into v_id from public.skill_catalog c where c.canonical = v_name;
+    return v_id;
+end;
+$$;
+
+-- Distinct canonical ids from comma text, a text[] or a JSON array
+create or replace function public.skill_ids_from(p_value text)
+returns setof bigint
+language sql
+security definer
+set search_path = public
+as $$
+    select distinct public.skill_id_for(s)
+    from regexp_split_to_table(translate(coalesce(p_value, ''), '{}[]"', ''), ',') as s
+    where public.skill_normalise(s) is not null;
+$$;
+
+create or replace function public.posting_skills_text(p_row jsonb)
+returns text
+language sql
+immutable
+as $$
+    select nullif(concat_ws(',', p_row ->> 'skills_required', p_row ->> 'required_skills'), '');
+$$;
+
+
+-- ----------------------------------------------------------
+-- Demand: job_postings
+-- ----------------------------------------------------------
+create or replace function public.track_skill_demand()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_old text;
+    v_new text;
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        v_old := public.posting_skills_text(to_jsonb(old));
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        v_new := public.posting_skills_text(to_jsonb(new));
+    end if;
+
+    if tg_op = 'UPDATE' and v_old is not distinct from v_new then
+        return null;
+    end if;
+
+    if v_old is not null then
+        update public.skill_demand_counts c
+        set demand = greatest(c.demand - 1, 0), updated_at = now()
+        where c.skill_id in (select public.skill_ids_from(v_old));
+    end if;
+
+    if v_new is not null then
+        insert into public.skill_demand_counts as c (skill_id, demand)
+        select id, 1 from public.skill_ids_from(v_new) as id
+        on conflict (skill_id) do update
+        set demand = c.demand + 1, updated_at = now();
+    end if;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists job_postings_skill_demand on public.job_postings;
+create trigger job_postings_skill_demand
+    after insert or update or delete on public.job_postings
+    for each row execute function public.track_skill_demand();
+
+
+-- ----------------------------------------------------------
+-- Supply: candidate_latest_scores (one row per student)
+-- ----------------------------------------------------------
+create or replace function public.track_skill_supply()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_old_inst uuid;
+    v_new_inst uuid;
+    v_old      text;
+    v_new      text;
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        v_old_inst := old.institution_id;
+        v_old := to_jsonb(old) ->> 'skills';
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        v_new_inst := new.institution_id;
+        v_new := to_jsonb(new) ->> 'skills';
+    end if;
+
+    if tg_op = 'UPDATE'
+       and v_old_inst is not distinct from v_new_inst
+       and v_old is not distinct from v_new then
+        return null;
+    end if;
+
+    if v_old_inst is not null and v_old is not null then
+        update public.skill_supply_counts c
+        set supply = greatest(c.supply - 1, 0), updated_at = now()
+        where c.institution_id = v_old_inst
+          and c.skill_id in (select public.skill_ids_from(v_old));
+    end if;
+
+    if v_new_inst is not null and v_new is not null then
+        insert into public.skill_supply_counts as c (institution_id, skill_id, supply)
+        select v_new_inst, id, 1 from public.skill_ids_from(v_new) as id
+        on conflict (institution_id, skill_id) do update
+        set supply = c.supply + 1, updated_at = now();
+    end if;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists candidate_latest_scores_skill_supply on public.candidate_latest_scores;
+create trigger candidate_latest_scores_skill_supply
+    after insert or update or delete on public.candidate_latest_scores
+    for each row execute function public.track_skill_supply();
+
+
+-- ----------------------------------------------------------
+-- Full rebuild (backfill)
+-- ----------------------------------------------------------
+create or replace function public.rebuild_skill_counters()
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_rows integer;
+begin
+    lock table public.skill_demand_counts, public.skill_supply_counts in exclusive mode;
+
+    update public.skill_demand_counts set demand = 0, updated_at = now();
+    update public.skill_supply_counts set supply = 0, updated_at = now();
+
+    insert into public.skill_demand_counts as c (skill_id, demand)
+    select id, count(*)
+    from public.job_postings jp
+    cross join lateral public.skill_ids_from(public.posting_skills_text(to_jsonb(jp))) as id
+    group by id
+    on conflict (skill_id) do update
+    set demand = excluded.demand, updated_at = now();
+
+    insert into public.skill_supply_counts as c (institution_id, skill_id, supply)
+    select ls.institution_id, id, count(*)
+    from public.candidate_latest_scores ls
+    cross join lateral public.skill_ids_from(to_jsonb(ls) ->> 'skills') as id
+    where ls.institution_id is not null
+    group by ls.institution_id, id
+    on conflict (institution_id, skill_id) do update
+    set supply = excluded.supply, updated_at = now();
+
+    get diagnostics v_rows = row_count;
+    return v_rows;
+end;
+$$;
+
+revoke all on function public.rebuild_skill_counters() from public;
+grant execute on function public.rebuild_skill_counters() to service_role;
+
+select public.rebuild_skill_counters();
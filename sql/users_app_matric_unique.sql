@@ -0,0 +1,14 @@
+-- ==========================================================
+-- users_app (institution_id, matric_number) — student import key
+-- services/student_import.py upserts on this pair so re-importing a
+-- registry updates students instead of duplicating them.
+--
+-- Existing duplicates must be merged before the index can build:
+--   select institution_id, matric_number, count(*)
+--   from public.users_app
+--   where matric_number is not null
+--   group by 1, 2 having count(*) > 1;
+-- ==========================================================
+
+create unique index if not exists users_app_institution_matric_uidx
+    on public.users_app (institution_id, matric_number);
@@ -0,0 +1,50 @@
+from services.analytics_kernels import score_band_counts, skill_counts, subscore_means, volume_trend
+
+
+def test_volume_trend_mixed_timestamp_precision():
+    counts = volume_trend([
+        "2026-01-05T10:00:00+00:00",
+        "2026-01-06T10:00:00.123+00:00",
+        "2026-01-06T11:30:00.5+00:00",
+    ])
+
+    assert counts.to_dict() == {"2026-01-05": 1, "2026-01-06": 2}
+
+
+def test_volume_trend_skips_unparsable():
+    counts = volume_trend(["2026-01-05T10:00:00+00:00", None, "not a date"])
+
+    assert counts.to_dict() == {"2026-01-05": 1}
+
+
+def test_score_band_counts_unparsable_scores_count_as_zero():
+    counts = score_band_counts([45, "n/a", None, 95, 70.5])
+
+    assert counts.to_dict() == {
+        "0–49": 2,
+        "50–59": 0,
+        "60–69": 0,
+        "70–79": 1,
+        "80–89": 0,
+        "90–100": 1,
+    }
+
+
+def test_subscore_means_skips_non_dicts():
+    means = subscore_means([{"skills": 80, "clarity": "x"}, {"skills": "60"}, None, "bad"])
+
+    assert means.to_dict() == {"skills": 70.0, "clarity": 0.0}
+
+
+def test_skill_counts_text_and_list_skills():
+    counts = skill_counts([
+        {"faculty": "Eng", "skills": "Python, SQL"},
+        {"faculty": None, "skills": ["sql", " "]},
+        {"faculty": "Eng", "skills": None},
+    ])
+
+    assert counts.to_dict("records") == [
+        {"faculty": "Eng", "skill": "python", "supply_count": 1},
+        {"faculty": "Eng", "skill": "sql", "supply_count": 1},
+        {"faculty": "Unknown", "skill": "sql", "supply_count": 1},
+    ]
@@ -0,0 +1,17 @@
+import pandas as pd
+
+from services.sparse_heatmap import grid_from_long
+
+
+def test_grid_from_long_skips_missing_labels():
+    df = pd.DataFrame({
+        "row": ["a", None, "b", float("nan"), "a"],
+        "col": ["x", "y", None, "x", "x"],
+        "v": [1, 2, 3, 4, 2],
+    })
+
+    grid = grid_from_long(df, "row", "col", "v")
+
+    assert list(grid.row_labels) == ["a"]
+    assert list(grid.col_labels) == ["x"]
+    assert grid.values.tolist() == [3.0]